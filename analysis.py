@@ -0,0 +1,308 @@
+import numpy as np
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+# Gap between the pipes as a fraction of the screen height (FlappyBirdEnv.pipe_gap / height)
+PIPE_GAP = 100 / 512
+
+# Coordinates of the analysis planes, their ranges and their values when held fixed
+COORDINATES = {
+    'bird_y': (0.0, 1.0, 0.5),
+    'gap_centre': (0.2, 0.8, 0.5),
+    'velocity': (-0.8, 2.0, 0.0),
+    'pipe_distance': (-0.2, 0.85, 0.3),
+}
+
+# Planes (x coordinate, y coordinate) evaluated per checkpoint
+DEFAULT_PLANES = {
+    'position': ('bird_y', 'gap_centre'),
+    'velocity': ('velocity', 'bird_y'),
+    'approach': ('pipe_distance', 'bird_y'),
+}
+
+def coordinates_to_states(bird_y, gap_centre, velocity, pipe_distance):
+    """Observation features (as FlappyBirdEnv produces them) of arrays of plane coordinates"""
+    states = np.empty((len(bird_y), 5), dtype=np.float32)
+    states[:, 0] = bird_y
+    states[:, 1] = velocity
+    states[:, 2] = pipe_distance
+    states[:, 3] = bird_y - (gap_centre - PIPE_GAP / 2)  # Below the top pipe's edge
+    states[:, 4] = (gap_centre + PIPE_GAP / 2) - bird_y  # Above the bottom pipe's edge
+    return states
+
+def states_to_coordinates(states):
+    """Plane coordinates of observation features, the inverse of coordinates_to_states()"""
+    return {'bird_y': states[:, 0], 'velocity': states[:, 1], 'pipe_distance': states[:, 2],
+            'gap_centre': states[:, 0] - states[:, 3] + PIPE_GAP / 2}
+
+def plane_grid(plane, resolution):
+    """States of a resolution x resolution grid over a plane, other coordinates fixed
+
+    Row i, column j of the grid is state i * resolution + j, with the x
+    coordinate varying along columns and y along rows.
+    """
+    x_name, y_name = plane
+    axes = {name: np.linspace(low, high, resolution) for name, (low, high, _) in COORDINATES.items()}
+    ys, xs = np.meshgrid(axes[y_name], axes[x_name], indexing='ij')
+    values = {name: np.full(resolution * resolution, fixed) for name, (_, _, fixed) in COORDINATES.items()}
+    values[x_name] = xs.ravel()
+    values[y_name] = ys.ravel()
+    return coordinates_to_states(**values)
+
+def file_hash(path):
+    """Short content hash of a file"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def _spec_hash(planes, resolution):
+    spec = {'planes': planes, 'resolution': resolution, 'coordinates': COORDINATES, 'gap': PIPE_GAP}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:8]
+
+def q_landscape(model_path, planes=None, resolution=200, batch_size=65536, cache_dir='logs/analysis_cache'):
+    """Q-values of a checkpoint over the grid of every plane, {plane: (resolution, resolution, actions)}
+
+    All grid states go through the network in batch_size forward passes.
+    Results are cached in cache_dir under the hash of the checkpoint's
+    contents and of the grid, so a checkpoint is only evaluated again if
+    its file or the grid changed.
+    """
+    from inference_server import load_numpy_policy
+    planes = planes or DEFAULT_PLANES
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"q_{file_hash(model_path)}_{_spec_hash(planes, resolution)}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                return {name: cached[name] for name in planes}
+
+    policy = load_numpy_policy(model_path, batch_size)
+    states = np.concatenate([plane_grid(plane, resolution) for plane in planes.values()])
+    q = np.concatenate([policy.q_values_batch(states[start:start + batch_size]).copy()
+                        for start in range(0, len(states), batch_size)])
+    cells = resolution * resolution
+    landscape = {name: q[i * cells:(i + 1) * cells].reshape(resolution, resolution, -1)
+                 for i, name in enumerate(planes)}
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **landscape)
+        os.replace(tmp_path, cache_path)
+    return landscape
+
+def decision_boundary(actions):
+    """Mask of the grid cells whose greedy action differs from a right or lower neighbour"""
+    boundary = np.zeros(actions.shape, dtype=bool)
+    boundary[:, :-1] |= actions[:, 1:] != actions[:, :-1]
+    boundary[:-1, :] |= actions[1:, :] != actions[:-1, :]
+    return boundary
+
+def visitation(data_dir, planes=None, resolution=200, cache_dir='logs/analysis_cache'):
+    """Visit counts of recorded states over the grid of every plane, {plane: (resolution, resolution)}
+
+    data_dir is a trajectory dataset (see trajectories.py), read one chunk at
+    a time. Results are cached under the hash of the dataset's episode index.
+    """
+    from trajectories import TrajectoryDataset
+    planes = planes or DEFAULT_PLANES
+    dataset = TrajectoryDataset(data_dir)
+    cache_path = None
+    if cache_dir:
+        index_hash = file_hash(os.path.join(data_dir, 'episodes.npy'))
+        cache_path = os.path.join(cache_dir, f"visits_{index_hash}_{_spec_hash(planes, resolution)}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                return {name: cached[name] for name in planes}
+
+    counts = {name: np.zeros((resolution, resolution), dtype=np.int64) for name in planes}
+    for chunk in np.unique(dataset.episodes['chunk']):
+        coordinates = states_to_coordinates(dataset.load_chunk(int(chunk))[0])
+        for name, (x_name, y_name) in planes.items():
+            x_low, x_high, _ = COORDINATES[x_name]
+            y_low, y_high, _ = COORDINATES[y_name]
+            # Bins centred on the grid points, like the Q-value grid
+            x_pad = (x_high - x_low) / (resolution - 1) / 2
+            y_pad = (y_high - y_low) / (resolution - 1) / 2
+            hist, _, _ = np.histogram2d(coordinates[y_name], coordinates[x_name], bins=resolution,
+                                        range=[[y_low - y_pad, y_high + y_pad], [x_low - x_pad, x_high + x_pad]])
+            counts[name] += hist.astype(np.int64)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **counts)
+        os.replace(tmp_path, cache_path)
+    return counts
+
+def smooth(counts, width):
+    """Box-filter a 2D grid with a (2 * width + 1)^2 window"""
+    out = counts.astype(np.float64)
+    for axis in (0, 1):
+        padded = np.pad(out, [(width + 1, width) if a == axis else (0, 0) for a in (0, 1)], mode='edge')
+        sums = np.cumsum(padded, axis=axis)
+        out = (np.take(sums, np.arange(2 * width + 1, sums.shape[axis]), axis=axis)
+               - np.take(sums, np.arange(sums.shape[axis] - 2 * width - 1), axis=axis)) / (2 * width + 1)
+    return out
+
+def summarize_landscape(landscape, visits=None):
+    """Per-plane statistics: share of flap cells, boundary cells, mean |Q-gap| (over visited cells too)"""
+    summary = {}
+    for name, q in landscape.items():
+        gap = q[..., 1] - q[..., 0]  # Flap minus do nothing
+        stats = {
+            'flap_fraction': float(np.mean(gap > 0)),
+            'boundary_fraction': float(np.mean(decision_boundary(gap > 0))),
+            'mean_abs_gap': float(np.mean(np.abs(gap))),
+        }
+        if visits is not None and visits[name].sum():
+            weights = visits[name] / visits[name].sum()
+            stats['visited_flap_fraction'] = float(np.sum(weights * (gap > 0)))
+            stats['visited_mean_abs_gap'] = float(np.sum(weights * np.abs(gap)))
+        summary[name] = stats
+    return summary
+
+def plot_landscape(landscape, output, planes=None, visits=None, title=None):
+    """Plot each plane's greedy actions with the decision boundary and its Q-gap, outlining visited states"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    planes = planes or DEFAULT_PLANES
+
+    fig, axes = plt.subplots(len(landscape), 2, figsize=(12, 5 * len(landscape)), squeeze=False)
+    for row, (name, q) in zip(axes, landscape.items()):
+        x_name, y_name = planes[name]
+        extent = (*COORDINATES[x_name][:2], *COORDINATES[y_name][:2])
+        gap = q[..., 1] - q[..., 0]
+        limit = max(float(np.abs(gap).max()), 1e-6)
+
+        row[0].imshow(gap > 0, origin='lower', extent=extent, aspect='auto', cmap='coolwarm', vmin=0, vmax=1)
+        row[0].contour(gap, levels=[0.0], colors='black', linewidths=1, origin='lower', extent=extent)
+        row[0].set_title(f"{name}: greedy action (red = flap)")
+        image = row[1].imshow(gap, origin='lower', extent=extent, aspect='auto', cmap='RdBu_r',
+                              vmin=-limit, vmax=limit)
+        fig.colorbar(image, ax=row[1], label='Q(flap) - Q(do nothing)')
+        row[1].set_title(f"{name}: Q-gap")
+        for ax in row:
+            if visits is not None and visits[name].any():
+                # Outline of the region the recorded episodes visited
+                visited = smooth(visits[name], max(1, visits[name].shape[0] // 50)) > 0
+                ax.contour(visited, levels=[0.5], colors='lime', linewidths=1.2, origin='lower', extent=extent)
+            ax.set_xlabel(x_name)
+            ax.set_ylabel(y_name)
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    root, ext = os.path.splitext(output)
+    tmp_path = f"{root}.tmp{ext}"
+    fig.savefig(tmp_path, dpi=100)
+    plt.close(fig)
+    os.replace(tmp_path, output)
+
+def analyze_checkpoints(model_paths, output_dir='figures/analysis', data_dir=None, planes=None, resolution=200,
+                        batch_size=65536, cache_dir='logs/analysis_cache', plots=True):
+    """Landscape summaries (and plots) of many checkpoints, in order
+
+    Each result also has 'changed_fraction', the share of grid cells whose
+    greedy action differs from the previous checkpoint's. Checkpoints that
+    can't be loaded (other architectures, corrupt files) get an 'error'.
+    """
+    planes = planes or DEFAULT_PLANES
+    visits = visitation(data_dir, planes, resolution, cache_dir) if data_dir else None
+    results = []
+    previous = None
+    for path in model_paths:
+        try:
+            landscape = q_landscape(path, planes, resolution, batch_size, cache_dir)
+        except Exception as e:
+            results.append({'model': path, 'error': f"{type(e).__name__}: {e}"})
+            continue
+        result = {'model': path, 'planes': summarize_landscape(landscape, visits)}
+        actions = np.stack([q.argmax(-1) for q in landscape.values()])
+        if previous is not None and previous.shape == actions.shape:
+            result['changed_fraction'] = float(np.mean(actions != previous))
+        previous = actions
+        if plots:
+            name = os.path.splitext(os.path.basename(path))[0]
+            plot_landscape(landscape, os.path.join(output_dir, f"{name}.png"), planes, visits, title=name)
+        results.append(result)
+    return results
+
+def plot_sweep(results, output):
+    """Plot the flap share, mean |Q-gap| and action changes across a sweep of checkpoints"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    results = [r for r in results if 'error' not in r]
+    if not results:
+        return
+    names = [os.path.splitext(os.path.basename(r['model']))[0] for r in results]
+    x = np.arange(len(results))
+    fig, axes = plt.subplots(3, 1, figsize=(max(10, len(results) * 0.25), 10), sharex=True)
+    for plane in results[0]['planes']:
+        axes[0].plot(x, [r['planes'][plane]['flap_fraction'] for r in results], label=plane)
+        axes[1].plot(x, [r['planes'][plane]['mean_abs_gap'] for r in results], label=plane)
+    axes[2].plot(x, [r.get('changed_fraction', np.nan) for r in results])
+    for ax, title in zip(axes, ['Share of flap cells', 'Mean |Q-gap|', 'Cells changing action from the previous checkpoint']):
+        ax.set_title(title)
+    axes[0].legend()
+    axes[2].set_xticks(x)
+    axes[2].set_xticklabels(names, rotation=90, fontsize=7)
+    fig.tight_layout()
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.savefig(output, dpi=100)
+    plt.close(fig)
+
+def main():
+    from evaluate import checkpoint_sort_key
+    parser = argparse.ArgumentParser(description='Q-value landscapes, decision boundaries and visitation of DQN checkpoints')
+    parser.add_argument('--models', type=str, default='models/*.pt', help='checkpoint path or glob pattern')
+    parser.add_argument('--output-dir', type=str, default='figures/analysis', help='plots and summary.json')
+    parser.add_argument('--data', type=str, default=None, help='trajectory dataset for visitation heatmaps (see trajectories.py)')
+    parser.add_argument('--resolution', type=int, default=200, help='grid points per plane axis')
+    parser.add_argument('--batch-size', type=int, default=65536, help='states per forward pass')
+    parser.add_argument('--cache-dir', type=str, default='logs/analysis_cache', help="cached results ('' disables)")
+    parser.add_argument('--no-plots', action='store_true', help='only write summary.json')
+    args = parser.parse_args()
+
+    model_paths = sorted(glob.glob(args.models), key=checkpoint_sort_key)
+    if not model_paths:
+        print(f"No checkpoints match {args.models}")
+        return
+
+    start = time.time()
+    results = analyze_checkpoints(model_paths, output_dir=args.output_dir, data_dir=args.data,
+                                  resolution=args.resolution, batch_size=args.batch_size,
+                                  cache_dir=args.cache_dir or None, plots=not args.no_plots)
+    for r in results:
+        name = os.path.basename(r['model'])
+        if 'error' in r:
+            print(f"{name:<36} skipped ({r['error'].splitlines()[0][:60]})")
+        else:
+            flap = " ".join(f"{plane} {stats['flap_fraction']:.2f}" for plane, stats in r['planes'].items())
+            changed = f", changed {r['changed_fraction']:.3f}" if 'changed_fraction' in r else ""
+            print(f"{name:<36} flap share: {flap}{changed}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, 'summary.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    if len(results) > 1:
+        plot_sweep(results, os.path.join(args.output_dir, 'sweep.png'))
+    print(f"Analyzed {len(model_paths)} checkpoints in {time.time() - start:.1f}s, results in {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import numpy as np
+import torch
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from flappy_env import FlappyBirdEnv
+from vec_env import VecFlappyBirdEnv
+from dqn_agent import DQNAgent
+
+STATE_SIZE = 5
+ACTION_SIZE = 2
+
+def seed_everything(seed):
+    """Seed Python, NumPy and torch RNGs"""
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+def percentiles(samples_us):
+    """Summarize latency samples (in microseconds)"""
+    samples = np.asarray(samples_us)
+    return {
+        'mean_us': float(samples.mean()),
+        'p50_us': float(np.percentile(samples, 50)),
+        'p90_us': float(np.percentile(samples, 90)),
+        'p99_us': float(np.percentile(samples, 99)),
+        'max_us': float(samples.max()),
+    }
+
+def random_states(n):
+    """Observation-like random states for inference benchmarks"""
+    return np.random.rand(n, STATE_SIZE) * np.array([1.0, 2.0, 1.0, 1.0, 1.0]) - np.array([0.0, 1.0, 0.0, 0.5, 0.5])
+
+def bench_env_step(steps):
+    """FlappyBirdEnv.step throughput with random actions"""
+    env = FlappyBirdEnv(use_assets=False, seed=0)
+    env.reset()
+    actions = np.random.rand(steps) < 0.1
+    start = time.perf_counter()
+    for action in actions:
+        _, _, done, _ = env.step(int(action))
+        if done:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    return {'steps': steps, 'steps_per_sec': steps / elapsed}
+
+def bench_env_reset(resets):
+    """FlappyBirdEnv construction and reset cost"""
+    start = time.perf_counter()
+    for _ in range(resets):
+        FlappyBirdEnv(use_assets=False)
+    construct_us = (time.perf_counter() - start) / resets * 1e6
+
+    env = FlappyBirdEnv(use_assets=False, seed=0)
+    start = time.perf_counter()
+    for _ in range(resets):
+        env.reset()
+    reset_us = (time.perf_counter() - start) / resets * 1e6
+    return {'construct_us': construct_us, 'reset_us': reset_us}
+
+def bench_vec_env_step(num_envs, steps):
+    """VecFlappyBirdEnv.step throughput, counted in single-env steps"""
+    env = VecFlappyBirdEnv(num_envs, seed=0)
+    env.reset()
+    actions = (np.random.rand(steps, num_envs) < 0.1).astype(np.int64)
+    start = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions)
+    elapsed = time.perf_counter() - start
+    return {'num_envs': num_envs, 'steps': steps, 'env_steps_per_sec': num_envs * steps / elapsed}
+
+def bench_act(calls, numpy_inference=False):
+    """Greedy DQNAgent.act latency"""
+    agent = DQNAgent(STATE_SIZE, ACTION_SIZE)
+    if numpy_inference:
+        agent.enable_numpy_inference()
+    states = random_states(calls)
+    for state in states[:100]:  # Warm up
+        agent.act(state, training=False)
+    samples = np.empty(calls)
+    for i, state in enumerate(states):
+        start = time.perf_counter()
+        agent.act(state, training=False)
+        samples[i] = (time.perf_counter() - start) * 1e6
+    return percentiles(samples)
+
+def bench_replay(fill, batch_size, updates, gradient_steps=1, prioritized=False):
+    """DQNAgent.replay gradient updates per second at a given memory fill"""
+    agent = DQNAgent(STATE_SIZE, ACTION_SIZE, memory_size=max(fill, 50000), prioritized=prioritized)
+    states = random_states(fill).astype(np.float32)
+    agent.remember_batch(states, np.random.randint(ACTION_SIZE, size=fill),
+                         np.full(fill, 0.2, dtype=np.float32), states, np.random.rand(fill) < 0.02)
+    agent.replay(batch_size, gradient_steps=gradient_steps)  # Warm up
+    calls = max(1, updates // gradient_steps)
+    start = time.perf_counter()
+    for _ in range(calls):
+        agent.replay(batch_size, gradient_steps=gradient_steps)
+    elapsed = time.perf_counter() - start
+    return {'fill': fill, 'batch_size': batch_size, 'gradient_steps': gradient_steps,
+            'prioritized': prioritized, 'updates_per_sec': calls * gradient_steps / elapsed}
+
+def bench_train(episodes):
+    """End-to-end headless train_dqn_agent throughput"""
+    from train import train_dqn_agent
+    with tempfile.TemporaryDirectory() as save_dir, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        train_dqn_agent(episodes=episodes, use_assets=False, render_freq=0, save_dir=save_dir, plot=False,
+                        metrics_log=os.path.join(save_dir, 'metrics.bin'), seed=0)
+        elapsed = time.perf_counter() - start
+    return {'episodes': episodes, 'seconds': elapsed, 'episodes_per_minute': episodes / elapsed * 60}
+
+def git_commit():
+    """Current git commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(quick=False, seed=0):
+    """Run the full suite and return the results as a JSON-serializable dict"""
+    scale = 0.1 if quick else 1.0
+
+    def n(count):
+        return max(1, int(count * scale))
+
+    torch.set_num_threads(1)
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'torch': torch.__version__,
+            'platform': platform.platform(),
+            'quick': quick,
+            'seed': seed,
+        },
+    }
+
+    benchmarks = [
+        ('env_step', lambda: bench_env_step(n(200000))),
+        ('env_reset', lambda: bench_env_reset(n(20000))),
+        ('vec_env_step', lambda: [bench_vec_env_step(num_envs, n(2000)) for num_envs in (16, 256)]),
+        ('act_torch', lambda: bench_act(n(20000))),
+        ('act_numpy', lambda: bench_act(n(20000), numpy_inference=True)),
+        ('replay', lambda: [bench_replay(fill, batch_size, n(2000))
+                            for fill in (1000, 50000, 500000)
+                            for batch_size in (32, 256)]),
+        ('replay_superbatch', lambda: [bench_replay(50000, 32, n(2000), gradient_steps=8)]),
+        ('replay_prioritized', lambda: [bench_replay(fill, 32, n(2000), prioritized=True)
+                                        for fill in (1000, 50000)]),
+        ('train', lambda: bench_train(max(2, n(30)))),
+    ]
+    for name, bench in benchmarks:
+        seed_everything(seed)
+        print(f"Running {name}...")
+        results[name] = bench()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Flappy Bird RL performance benchmarks')
+    parser.add_argument('--quick', action='store_true', help='run with 10x fewer iterations')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--output', type=str, default=None, help='write JSON results to this file')
+    args = parser.parse_args()
+
+    results = run_benchmarks(quick=args.quick, seed=args.seed)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"Results saved to: {args.output}")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import torch
+import os
+import queue
+import threading
+
+def save_checkpoint_file(checkpoint, path):
+    """Write a checkpoint dict atomically (temp file, then rename)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    torch.save(checkpoint, tmp_path)
+    os.replace(tmp_path, path)
+
+def load_checkpoint_file(path, map_location='cpu'):
+    """Read a checkpoint dict written by save_checkpoint_file"""
+    # Full checkpoints hold NumPy arrays and RNG states, not only tensors
+    return torch.load(path, map_location=map_location, weights_only=False)
+
+class AsyncCheckpointWriter:
+    """Writes checkpoint snapshots to disk from a background thread.
+
+    save() only enqueues an already-copied snapshot, so the training loop
+    never waits for serialization or disk I/O unless a previous save is still
+    pending. Call wait() to block until everything queued has been written.
+    A save's before_write callable (e.g. flushing a memory-mapped replay
+    buffer) also runs on the writer thread, before the file is written.
+    """
+
+    def __init__(self, max_pending=1):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            checkpoint, path, before_write = item
+            try:
+                if before_write is not None:
+                    before_write()
+                save_checkpoint_file(checkpoint, path)
+            except Exception as e:
+                self.error = e
+                print(f"Failed to save checkpoint {path}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def save(self, checkpoint, path, before_write=None):
+        """Queue a snapshot for writing, calling before_write() on the writer thread first"""
+        if self.error is not None:
+            raise RuntimeError("A previous checkpoint failed to save") from self.error
+        self.queue.put((checkpoint, path, before_write))
+
+    def wait(self):
+        """Block until every queued checkpoint has been written"""
+        self.queue.join()
+
+    def close(self):
+        """Flush pending checkpoints and stop the writer thread"""
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,50 @@
+import hashlib
+import json
+
+# Training hyperparameters that can be set from a config file, with their defaults
+HYPERPARAMETERS = {
+    'gamma': 0.99,
+    'learning_rate': 0.0005,
+    'epsilon_decay': 0.9995,
+    'epsilon_min': 0.01,
+    'hidden_size': 64,
+    'batch_size': 32,
+    'memory_size': 50000,
+    'train_freq': 1,
+    'gradient_steps': 1,
+    'target_update_steps': None,
+    'tau': 1.0,
+    'n_step': 1,
+    'double_dqn': False,
+}
+
+def make_config(**overrides):
+    """Return the default hyperparameters updated with overrides"""
+    unknown = set(overrides) - set(HYPERPARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown hyperparameters: {', '.join(sorted(unknown))}")
+    config = dict(HYPERPARAMETERS)
+    config.update(overrides)
+    return config
+
+def load_config(path, base=None):
+    """Read a JSON config file of hyperparameters
+
+    Values missing from the file are taken from base (a full config, the
+    defaults if None).
+    """
+    with open(path) as f:
+        values = json.load(f)
+    make_config(**values)  # Reject unknown keys
+    config = make_config(**(base or {}))
+    config.update(values)
+    return config
+
+def save_config(config, path):
+    """Write a config as JSON"""
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2, sort_keys=True)
+
+def config_hash(config):
+    """Short stable hash identifying a config"""
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
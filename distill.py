@@ -0,0 +1,131 @@
+import numpy as np
+import argparse
+import os
+import time
+from evaluate import load_policy, run_episode, summarize
+from lookup_policy import LookupTablePolicy, save_table
+
+# Observation features and the range of each covered by the grid; values
+# outside a range fall into the edge cell
+FEATURES = ('bird_y', 'velocity', 'pipe_distance', 'top_diff', 'bottom_diff')
+DEFAULT_LOWS = (0.0, -0.8, -0.2, -0.65, -0.85)
+DEFAULT_HIGHS = (0.85, 2.0, 0.85, 0.65, 0.85)
+DEFAULT_BINS = (16, 24, 24, 32, 32)
+
+def build_table(policy, lows, highs, bins, batch_size=65536):
+    """Evaluate a policy's greedy action at the centre of every grid cell
+
+    policy needs act_batch() (e.g. a NumpyPolicy); cells are evaluated
+    batch_size at a time. Returns a uint8 array of shape bins.
+    """
+    shape = tuple(int(n) for n in bins)
+    table = np.empty(shape, dtype=np.uint8)
+    flat = table.reshape(-1)
+    centres = [low + (np.arange(n) + 0.5) * (high - low) / n for low, high, n in zip(lows, highs, shape)]
+
+    states = np.empty((batch_size, len(shape)), dtype=np.float32)
+    for start in range(0, flat.size, batch_size):
+        n = min(batch_size, flat.size - start)
+        cells = np.unravel_index(np.arange(start, start + n), shape)
+        for feature, (centre, cell) in enumerate(zip(centres, cells)):
+            states[:n, feature] = centre[cell]
+        flat[start:start + n] = policy.act_batch(states[:n])
+    return table
+
+def collect_states(policy, seeds, max_steps):
+    """Observations visited by greedy headless episodes of a policy"""
+    from flappy_env import FlappyBirdEnv
+    states = []
+    for seed in seeds:
+        env = FlappyBirdEnv(use_assets=False, seed=seed)
+        state = env.reset()
+        for _ in range(max_steps):
+            states.append(state)
+            state, _, done, _ = env.step(policy.act(state))
+            if done:
+                break
+    return np.array(states, dtype=np.float32)
+
+def fit_ranges(states, percentile=0.5, margin=0.05):
+    """Grid ranges covering the central part of a set of visited states
+
+    Each feature spans its [percentile, 100 - percentile] range widened by
+    margin times its width, so the cells concentrate where the policy plays.
+    """
+    lows = np.percentile(states, percentile, axis=0)
+    highs = np.percentile(states, 100 - percentile, axis=0)
+    pad = (highs - lows) * margin
+    return tuple(lows - pad), tuple(highs + pad)
+
+def evaluate_policy(policy, seeds, max_steps):
+    """Score statistics of a policy over seeded headless episodes"""
+    scores, steps = zip(*(run_episode(policy, seed, max_steps) for seed in seeds))
+    return summarize(scores, steps, max_steps)
+
+def distill(model_path, output_path, bins=DEFAULT_BINS, lows=DEFAULT_LOWS, highs=DEFAULT_HIGHS,
+            episodes=20, max_steps=10000, seed=0, batch_size=65536, fit_range=False):
+    """Distill a DQN checkpoint into a lookup table file and report how well it matches
+
+    Agreement is measured on the states the network visits in `episodes`
+    seeded greedy episodes; both policies are then scored on the same seeds.
+    With fit_range the grid ranges are fitted (see fit_ranges) to states from
+    a separate set of episodes instead of using lows/highs.
+    """
+    network = load_policy(model_path)
+    seeds = [seed + i for i in range(episodes)]
+    if fit_range:
+        calibration_seeds = [seed + episodes + i for i in range(episodes)]
+        lows, highs = fit_ranges(collect_states(network, calibration_seeds, max_steps))
+
+    start = time.time()
+    table = build_table(network, lows, highs, bins, batch_size)
+    build_time = time.time() - start
+    save_table(output_path, table, lows, highs, features=list(FEATURES), source=model_path)
+    lookup = LookupTablePolicy(output_path)
+
+    states = collect_states(network, seeds, max_steps)
+    agreement = float(np.mean(lookup.act_batch(states) == network.act_batch(states)))
+
+    return {
+        'model': model_path,
+        'table': output_path,
+        'cells': int(table.size),
+        'bytes': os.path.getsize(output_path),
+        'build_seconds': build_time,
+        'agreement': agreement,
+        'visited_states': int(len(states)),
+        'network': evaluate_policy(network, seeds, max_steps),
+        'lookup': evaluate_policy(lookup, seeds, max_steps),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Distill a DQN checkpoint into a torch-free lookup table policy')
+    parser.add_argument('--model', type=str, default='models/flappy_dqn_final.pt', help='DQN checkpoint to distill')
+    parser.add_argument('--output', type=str, default=None, help='table file (default: checkpoint path with .lut)')
+    parser.add_argument('--bins', type=int, nargs='+', default=list(DEFAULT_BINS),
+                        help=f"cells per feature, one value or one per feature ({', '.join(FEATURES)})")
+    parser.add_argument('--fit-range', action='store_true',
+                        help='fit the grid to the states the network visits instead of the full feature ranges')
+    parser.add_argument('--episodes', type=int, default=20, help='seeded episodes for agreement and scoring')
+    parser.add_argument('--max-steps', type=int, default=10000, help='step cap per episode')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first episode')
+    parser.add_argument('--batch-size', type=int, default=65536, help='grid cells per forward pass')
+    args = parser.parse_args()
+
+    bins = args.bins * len(FEATURES) if len(args.bins) == 1 else args.bins
+    if len(bins) != len(FEATURES):
+        parser.error(f"--bins takes 1 or {len(FEATURES)} values")
+    output = args.output or os.path.splitext(args.model)[0] + '.lut'
+
+    report = distill(args.model, output, bins=bins, episodes=args.episodes, max_steps=args.max_steps,
+                     seed=args.seed, batch_size=args.batch_size, fit_range=args.fit_range)
+    print(f"Table: {report['table']} ({report['cells']:,} cells, {report['bytes'] / 1e6:.1f} MB, "
+          f"built in {report['build_seconds']:.1f}s)")
+    print(f"Agreement with the network on {report['visited_states']:,} visited states: {report['agreement']:.2%}")
+    for name in ('network', 'lookup'):
+        r = report[name]
+        print(f"{name.capitalize():<8} mean score {r['mean']:.2f} (median {r['median']:.1f}, max {r['max']}) "
+              f"over {r['episodes']} episodes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import numpy as np
+import torch
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import queue
+import random
+import time
+import os
+from dqn_agent import DQNAgent, DQNNetwork
+from config import make_config, config_hash
+from registry import CheckpointRegistry
+
+# One transition record: state, action, reward, next_state, done
+def _record_width(state_size):
+    return 2 * state_size + 3
+
+def actor_epsilon(actor_id, num_actors, base=0.4, spread=7.0):
+    """Exploration floor for an actor, spread geometrically across actors (Ape-X style)"""
+    if num_actors == 1:
+        return base
+    return base ** (1 + spread * actor_id / (num_actors - 1))
+
+def _actor_process(actor_id, num_actors, state_size, action_size, slots,
+                   transitions_name, weights_name, write_counts, weights_version,
+                   weights_lock, stats_queue, stop_event, sync_interval, epsilon_decay, hidden_size, seed,
+                   learner_updates, updates_per_step, max_update_lag):
+    """Run FlappyBirdEnv episodes and stream transitions into shared memory"""
+    from flappy_env import FlappyBirdEnv
+
+    torch.set_num_threads(1)
+    # Don't block process exit on undelivered episode statistics
+    stats_queue.cancel_join_thread()
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    width = _record_width(state_size)
+    transitions_shm = shared_memory.SharedMemory(name=transitions_name)
+    weights_shm = shared_memory.SharedMemory(name=weights_name)
+    ring = np.ndarray((num_actors, slots, width), dtype=np.float32, buffer=transitions_shm.buf)[actor_id]
+
+    model = DQNNetwork(state_size, action_size, hidden_size)
+    model.eval()
+    flat_weights = np.ndarray((sum(p.numel() for p in model.parameters()),),
+                              dtype=np.float32, buffer=weights_shm.buf)
+    local_version = -1
+
+    # Each actor decays from full exploration towards its own floor
+    epsilon = 1.0
+    epsilon_min = actor_epsilon(actor_id, num_actors)
+
+    env = FlappyBirdEnv(use_assets=False, seed=seed)
+    state = env.reset()
+    total_reward = 0
+    steps = 0
+    record = np.empty(width, dtype=np.float32)
+
+    try:
+        while not stop_event.is_set():
+            # Pick up the latest weights broadcast by the learner
+            if steps % sync_interval == 0 and weights_version.value != local_version:
+                with weights_lock:
+                    local_version = weights_version.value
+                    vector = torch.from_numpy(flat_weights.copy())
+                torch.nn.utils.vector_to_parameters(vector, model.parameters())
+
+            # Hold off while the learner is too far behind the replay ratio target
+            if max_update_lag is not None and steps % sync_interval == 0:
+                while (not stop_event.is_set() and learner_updates.value > 0 and
+                       sum(write_counts) * updates_per_step - learner_updates.value > max_update_lag):
+                    time.sleep(0.001)
+
+            if np.random.rand() <= epsilon:
+                action = random.randrange(action_size)
+            else:
+                with torch.no_grad():
+                    q_values = model(torch.from_numpy(state.astype(np.float32)).unsqueeze(0))
+                action = int(torch.argmax(q_values, dim=1).item())
+            epsilon = max(epsilon_min, epsilon * epsilon_decay)
+
+            next_state, reward, done, info = env.step(action)
+
+            # Write the transition, then publish it by bumping the counter
+            record[:state_size] = state
+            record[state_size] = action
+            record[state_size + 1] = reward
+            record[state_size + 2:2 * state_size + 2] = next_state
+            record[-1] = done
+            count = write_counts[actor_id]
+            ring[count % slots] = record
+            write_counts[actor_id] = count + 1
+
+            state = next_state
+            total_reward += reward
+            steps += 1
+
+            if done:
+                stats_queue.put((actor_id, info['score'], total_reward, epsilon))
+                state = env.reset()
+                total_reward = 0
+    finally:
+        env.close()
+        transitions_shm.close()
+        weights_shm.close()
+
+def train_distributed(episodes=1000, num_actors=4, batch_size=32, target_update_steps=1000,
+                      broadcast_interval=100, sync_interval=100, slots=4096, seed=0, device=None,
+                      gamma=0.99, learning_rate=0.0005, epsilon_decay=0.9995, epsilon_min=0.01, hidden_size=64,
+                      memory_size=50000, train_freq=1, gradient_steps=1, tau=1.0, n_step=1, double_dqn=False,
+                      keep_checkpoints=None, print_freq=1, max_update_lag=1000):
+    """Train a DQNAgent with num_actors actor processes feeding a single learner
+
+    Actors run headless environments and write transitions into per-actor
+    shared-memory rings. The learner (this process) owns the DQNAgent,
+    drains the rings into its replay memory, performs the gradient updates
+    and broadcasts fresh weights to the actors every broadcast_interval
+    updates. Training stops once the actors have finished `episodes` episodes.
+
+    The hyperparameters match train_dqn_agent's (see config.py), except:
+    the learner runs gradient_steps updates per train_freq env steps
+    received, and actors pause while it is more than max_update_lag updates
+    behind that ratio (None lets them run free, the achieved ratio is
+    printed either way); target_update_steps counts gradient updates (None means 1000);
+    each actor decays epsilon by epsilon_decay per env step towards its own
+    floor (see actor_epsilon()), so epsilon_min is unused; n_step must be 1
+    since transitions of different actors are interleaved in the replay
+    memory. keep_checkpoints keeps only that many of the run's latest
+    episode checkpoints.
+    """
+    if n_step != 1:
+        raise ValueError("Distributed training only supports n_step=1")
+    if target_update_steps is None:
+        target_update_steps = 1000  # The learner has no episodes to count
+    if device is None:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    print(f"Using device: {device}, actors: {num_actors}")
+
+    state_size = 5
+    action_size = 2
+    width = _record_width(state_size)
+
+    agent = DQNAgent(state_size, action_size, device=device, memory_size=memory_size, gamma=gamma,
+                     learning_rate=learning_rate, epsilon_decay=epsilon_decay, epsilon_min=epsilon_min,
+                     hidden_size=hidden_size, double_dqn=double_dqn)
+    run_hash = config_hash(make_config(gamma=gamma, learning_rate=learning_rate, epsilon_decay=epsilon_decay,
+                                       epsilon_min=epsilon_min, hidden_size=hidden_size, batch_size=batch_size,
+                                       memory_size=memory_size, train_freq=train_freq,
+                                       gradient_steps=gradient_steps, target_update_steps=target_update_steps,
+                                       tau=tau, n_step=n_step, double_dqn=double_dqn))
+    updates_per_step = gradient_steps / train_freq  # Replay ratio target, as in train_dqn_agent
+
+    if not os.path.exists('models'):
+        os.makedirs('models')
+
+    ctx = mp.get_context('spawn')
+    num_weights = sum(p.numel() for p in agent.model.parameters())
+    transitions_shm = shared_memory.SharedMemory(create=True, size=num_actors * slots * width * 4)
+    weights_shm = shared_memory.SharedMemory(create=True, size=num_weights * 4)
+    rings = np.ndarray((num_actors, slots, width), dtype=np.float32, buffer=transitions_shm.buf)
+    flat_weights = np.ndarray((num_weights,), dtype=np.float32, buffer=weights_shm.buf)
+
+    write_counts = ctx.Array('q', num_actors, lock=False)
+    weights_version = ctx.Value('q', 0, lock=False)
+    learner_updates = ctx.Value('q', 0, lock=False)
+    weights_lock = ctx.Lock()
+    stats_queue = ctx.Queue()
+    stop_event = ctx.Event()
+
+    def broadcast_weights():
+        vector = torch.nn.utils.parameters_to_vector(agent.model.parameters())
+        with weights_lock:
+            flat_weights[:] = vector.detach().cpu().numpy()
+            weights_version.value += 1
+
+    broadcast_weights()
+
+    actors = [ctx.Process(target=_actor_process,
+                          args=(i, num_actors, state_size, action_size, slots,
+                                transitions_shm.name, weights_shm.name, write_counts,
+                                weights_version, weights_lock, stats_queue, stop_event,
+                                sync_interval, epsilon_decay, hidden_size, seed + i,
+                                learner_updates, updates_per_step, max_update_lag),
+                          daemon=True)
+              for i in range(num_actors)]
+    for actor in actors:
+        actor.start()
+
+    read_counts = [0] * num_actors
+    actor_epsilons = [1.0] * num_actors  # Latest exploration rate reported by each actor
+    scores = []
+    updates = 0
+    env_steps = 0
+    start_time = time.time()
+
+    try:
+        while len(scores) < episodes:
+            # Drain new transitions from every actor's ring
+            received = 0
+            for i in range(num_actors):
+                count = write_counts[i]
+                # If an actor lapped us, only its newest half ring is still safe to read
+                start = max(read_counts[i], count - slots // 2)
+                if count > start:
+                    idx = np.arange(start, count) % slots
+                    batch = rings[i, idx]
+                    agent.remember_batch(batch[:, :state_size],
+                                         batch[:, state_size],
+                                         batch[:, state_size + 1],
+                                         batch[:, state_size + 2:2 * state_size + 2],
+                                         batch[:, -1] > 0.5)
+                    received += count - start
+                read_counts[i] = count
+            env_steps += received
+
+            # Collect finished episode statistics
+            while True:
+                try:
+                    actor_id, score, total_reward, epsilon = stats_queue.get_nowait()
+                except queue.Empty:
+                    break
+                scores.append(total_reward)
+                actor_epsilons[actor_id] = epsilon
+                e = len(scores)
+                avg_score = np.mean(scores[-100:])
+                if print_freq and e % print_freq == 0:
+                    print(f"Episode: {e}/{episodes}, Actor: {actor_id}, Score: {score}, Reward: {total_reward:.2f}, Epsilon: {epsilon:.2f}, Avg Score (last 100): {avg_score:.2f}, Updates/step: {updates / max(env_steps, 1):.3f}")
+                if e % 100 == 0:
+                    # The learner's own epsilon is never used, record the actors'
+                    agent.save(f"models/flappy_dqn_episode_{e}.pt", episode=e, step=env_steps,
+                               config_hash=run_hash, actors=num_actors, epsilon=None,
+                               actor_epsilons=[round(x, 4) for x in actor_epsilons])
+                    if keep_checkpoints:
+                        CheckpointRegistry('models').prune(keep_last=keep_checkpoints, config_hash=run_hash,
+                                                           since=start_time)
+
+            # Wait for data when there is too little of it or the learner is ahead of the target ratio
+            if len(agent.memory) <= batch_size or updates >= env_steps * updates_per_step:
+                time.sleep(0.001)
+                continue
+
+            agent.replay(batch_size, gradient_steps=gradient_steps)
+            previous, updates = updates, updates + gradient_steps
+            learner_updates.value = updates
+
+            if updates // target_update_steps != previous // target_update_steps:
+                if tau < 1.0:
+                    agent.soft_update_target_model(tau)
+                else:
+                    agent.update_target_model()
+            if updates // broadcast_interval != previous // broadcast_interval:
+                broadcast_weights()
+    finally:
+        stop_event.set()
+        for actor in actors:
+            actor.join(timeout=5)
+            if actor.is_alive():
+                actor.terminate()
+        transitions_shm.close()
+        transitions_shm.unlink()
+        weights_shm.close()
+        weights_shm.unlink()
+
+    elapsed = time.time() - start_time
+    print(f"Env steps: {env_steps} ({env_steps / elapsed:.0f}/s), gradient updates: {updates} ({updates / elapsed:.0f}/s), "
+          f"updates per env step: {updates / max(env_steps, 1):.3f} (target {updates_per_step:.3f})")
+
+    agent.save("models/flappy_dqn_final.pt", episode=len(scores), step=env_steps, config_hash=run_hash,
+               actors=num_actors, epsilon=None, actor_epsilons=[round(x, 4) for x in actor_epsilons])
+    return agent
@@ -3,17 +3,21 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
-from collections import deque
 import random
 import os
+from replay_buffer import ReplayBuffer, PrioritizedReplayBuffer, FrameReplayBuffer, DiskReplayBuffer
+from numpy_policy import NumpyPolicy
+from profiler import NullProfiler
+from checkpoint import load_checkpoint_file
+from registry import CheckpointRegistry
 
 class DQNNetwork(nn.Module):
-    def __init__(self, state_size, action_size):
+    def __init__(self, state_size, action_size, hidden_size=64):
         super(DQNNetwork, self).__init__()
-        self.fc1 = nn.Linear(state_size, 64)  # Increase from 24 to 64 neurons
-        self.fc2 = nn.Linear(64, 64)          # Increase from 24 to 64 neurons
-        self.fc3 = nn.Linear(64, 32)          # Add an extra layer
-        self.fc4 = nn.Linear(32, action_size)
+        self.fc1 = nn.Linear(state_size, hidden_size)  # hidden_size neurons (64 by default)
+        self.fc2 = nn.Linear(hidden_size, hidden_size)
+        self.fc3 = nn.Linear(hidden_size, hidden_size // 2)  # Add an extra layer
+        self.fc4 = nn.Linear(hidden_size // 2, action_size)
         self.dropout = nn.Dropout(0.2)        # Add dropout for regularization
         
     def forward(self, x):
@@ -23,27 +27,120 @@ class DQNNetwork(nn.Module):
         x = F.relu(self.fc3(x))
         return self.fc4(x)
 
+def network_from_state_dict(state_dict):
+    """Build a DQNNetwork sized to match a saved state dict and load it"""
+    hidden_size, state_size = state_dict['fc1.weight'].shape
+    model = DQNNetwork(state_size, state_dict['fc4.weight'].shape[0], hidden_size=hidden_size)
+    model.load_state_dict(state_dict)
+    return model
+
+class ConvDQNNetwork(nn.Module):
+    """Convolutional Q-network for stacked grayscale frames of shape (stack, H, W)"""
+    def __init__(self, state_shape, action_size):
+        super(ConvDQNNetwork, self).__init__()
+        stack, height, width = state_shape
+        self.conv1 = nn.Conv2d(stack, 32, kernel_size=8, stride=4)
+        self.conv2 = nn.Conv2d(32, 64, kernel_size=4, stride=2)
+        self.conv3 = nn.Conv2d(64, 64, kernel_size=3, stride=1)
+
+        # Infer the flattened conv output size from a dummy frame stack
+        with torch.no_grad():
+            conv_size = self._features(torch.zeros(1, stack, height, width)).shape[1]
+        self.fc1 = nn.Linear(conv_size, 512)
+        self.fc2 = nn.Linear(512, action_size)
+
+    def _features(self, x):
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = F.relu(self.conv3(x))
+        return x.flatten(1)
+
+    def forward(self, x):
+        x = x.float() / 255.0  # Frames are stored as uint8
+        x = F.relu(self.fc1(self._features(x)))
+        return self.fc2(x)
+
 class DQNAgent:
-    def __init__(self, state_size, action_size, device="cpu"):
+    def __init__(self, state_size, action_size, device="cpu", memory_size=50000, pin_memory=False,
+                 prioritized=False, alpha=0.6, beta=0.4, network='mlp', gamma=0.99, learning_rate=0.0005,
+                 epsilon_decay=0.9995, epsilon_min=0.01, hidden_size=64, n_step=1, double_dqn=False,
+                 replay_dir=None, replay_dtype='float32'):
+        # network='conv' learns from pixels: state_size is then the (stack, H, W) frame stack shape
+        # hidden_size is the MLP width (the conv network ignores it)
+        # n_step > 1 bootstraps from n-step returns, double_dqn picks target actions with the online network
+        # replay_dir keeps the replay memory in memory-mapped files there (reopened if it exists)
+        if network not in ('mlp', 'conv'):
+            raise ValueError(f"Invalid network: {network}. Use 'mlp' or 'conv'")
+        if network == 'conv' and prioritized:
+            raise ValueError("Prioritized replay is not supported with the conv network")
+        if network == 'conv' and n_step > 1:
+            raise ValueError("n-step returns are not supported with the conv network")
+        if replay_dir is not None and (network == 'conv' or prioritized):
+            raise ValueError("Disk replay is only supported with uniform replay and the mlp network")
+        self.network = network
         self.state_size = state_size  # Size of state vector (5 features)
         self.action_size = action_size  # Number of actions (2: do nothing, flap)
         self.device = device  # CPU or GPU
         
         # Hyperparameters
-        self.gamma = 0.99  # Discount factor
+        self.gamma = gamma  # Discount factor
         self.epsilon = 1.0  # Exploration rate
-        self.epsilon_min = 0.01
-        self.epsilon_decay = 0.9995
-        self.learning_rate = 0.0005  # Learning rate
+        self.epsilon_min = epsilon_min
+        self.epsilon_decay = epsilon_decay
+        self.learning_rate = learning_rate  # Learning rate
+        self.hidden_size = hidden_size
+        self.n_step = n_step
+        self.double_dqn = double_dqn
         
         # Memory for experience replay
-        self.memory = deque(maxlen=50000)
+        self.prioritized = prioritized
+        self.beta = beta  # Importance-sampling exponent for prioritized replay
+        if self.network == 'conv':
+            self.memory = FrameReplayBuffer(memory_size, state_size[1:], stack=state_size[0], pin_memory=pin_memory)
+        elif self.prioritized:
+            self.memory = PrioritizedReplayBuffer(memory_size, state_size, alpha=alpha, pin_memory=pin_memory)
+        elif replay_dir is not None:
+            self.memory = DiskReplayBuffer(replay_dir, memory_size, state_size, state_dtype=replay_dtype,
+                                           pin_memory=pin_memory)
+        else:
+            self.memory = ReplayBuffer(memory_size, state_size, pin_memory=pin_memory)
         
         # Build the neural network model
-        self.model = DQNNetwork(state_size, action_size).to(self.device)
-        self.target_model = DQNNetwork(state_size, action_size).to(self.device)
+        if self.network == 'conv':
+            self.model = ConvDQNNetwork(state_size, action_size).to(self.device)
+            self.target_model = ConvDQNNetwork(state_size, action_size).to(self.device)
+        else:
+            self.model = DQNNetwork(state_size, action_size, hidden_size).to(self.device)
+            self.target_model = DQNNetwork(state_size, action_size, hidden_size).to(self.device)
         self.optimizer = optim.Adam(self.model.parameters(), lr=self.learning_rate)
         self.update_target_model()
+
+        # Phase timings for replay(), replaced by a TrainingProfiler when profiling
+        self.profiler = NullProfiler()
+
+        # Loss and Q-value sums since the last pop_training_stats(), kept on the
+        # device so replay() never waits for the GPU
+        self._loss_sum = torch.zeros((), device=self.device)
+        self._q_sum = torch.zeros((), device=self.device)
+        self._stat_updates = 0
+
+        # Optional torch-free inference path, resynced lazily after weight updates
+        self.numpy_policy = None
+        self._numpy_policy_stale = False
+
+    def enable_numpy_inference(self):
+        """Serve act()/act_batch() from a NumpyPolicy snapshot of the online model"""
+        if self.network != 'mlp':
+            raise ValueError("NumPy inference only supports the MLP network")
+        self.numpy_policy = NumpyPolicy(self.model)
+        self._numpy_policy_stale = False
+        return self.numpy_policy
+
+    def _refresh_numpy_policy(self):
+        """Resync the NumPy snapshot if the online weights changed since the last call"""
+        if self._numpy_policy_stale:
+            self.numpy_policy.refresh()
+            self._numpy_policy_stale = False
     
     def update_target_model(self):
         """Copy weights from model to target_model"""
@@ -51,7 +148,11 @@ class DQNAgent:
     
     def remember(self, state, action, reward, next_state, done):
         """Store experience in memory for replay"""
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of experiences, e.g. from a VecFlappyBirdEnv step"""
+        self.memory.add_batch(states, actions, rewards, next_states, dones)
     
     def act(self, state, training=True):
         """Choose action based on epsilon-greedy policy"""
@@ -60,59 +161,196 @@ class DQNAgent:
             return random.randrange(self.action_size)
         
         # Exploitation: choose best action according to the model
-        state = torch.FloatTensor(state.reshape(1, -1)).to(self.device)
+        if self.numpy_policy is not None:
+            self._refresh_numpy_policy()
+            return self.numpy_policy.act(state)
+        state = torch.FloatTensor(np.asarray(state)[None]).to(self.device)
         self.model.eval()
         with torch.no_grad():
             act_values = self.model(state)
         self.model.train()
         return torch.argmax(act_values, dim=1).item()
-    
-    def replay(self, batch_size):
-        """Train the model with random samples from memory"""
+
+    def act_batch(self, states, training=True):
+        """Choose one epsilon-greedy action per row of an (N, state_size) batch"""
+        if self.numpy_policy is not None:
+            self._refresh_numpy_policy()
+            actions = self.numpy_policy.act_batch(states).copy()
+        else:
+            states = torch.FloatTensor(np.asarray(states, dtype=np.float32)).to(self.device)
+            self.model.eval()
+            with torch.no_grad():
+                actions = torch.argmax(self.model(states), dim=1).cpu().numpy()
+            self.model.train()
+
+        if training:
+            # Exploration: replace a random subset with random actions
+            explore = np.random.rand(len(actions)) <= self.epsilon
+            actions[explore] = np.random.randint(self.action_size, size=explore.sum())
+        return actions
+
+    def soft_update_target_model(self, tau):
+        """Polyak-average model weights into target_model: target = tau * model + (1 - tau) * target"""
+        with torch.no_grad():
+            for target_param, param in zip(self.target_model.parameters(), self.model.parameters()):
+                target_param.lerp_(param, tau)
+
+    def replay(self, batch_size, gradient_steps=1):
+        """Train the model with random samples from memory
+
+        With gradient_steps > 1 a single superbatch of batch_size * gradient_steps
+        transitions is sampled and moved to the device once, then sliced into
+        gradient_steps minibatch updates. Epsilon is not decayed here, see
+        decay_epsilon().
+        """
         if len(self.memory) < batch_size:
             return
         
-        minibatch = random.sample(self.memory, batch_size)
-        states = np.array([i[0] for i in minibatch])
-        actions = np.array([i[1] for i in minibatch])
-        rewards = np.array([i[2] for i in minibatch])
-        next_states = np.array([i[3] for i in minibatch])
-        dones = np.array([i[4] for i in minibatch])
-        
-        # Convert to PyTorch tensors
-        states = torch.FloatTensor(states).to(self.device)
-        actions = torch.LongTensor(actions).unsqueeze(1).to(self.device)
-        rewards = torch.FloatTensor(rewards).to(self.device)
-        next_states = torch.FloatTensor(next_states).to(self.device)
-        dones = torch.FloatTensor(dones).to(self.device)
-        
-        # Get current Q values
-        current_q_values = self.model(states).gather(1, actions)
-        
-        # Compute target Q values
-        with torch.no_grad():
-            max_next_q_values = self.target_model(next_states).max(1)[0]
-            target_q_values = rewards + (1 - dones) * self.gamma * max_next_q_values
-            target_q_values = target_q_values.unsqueeze(1)
-        
-        # Compute loss
-        loss = F.mse_loss(current_q_values, target_q_values)
-        
-        # Optimize the model
-        self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
-        
-        # Decay epsilon for less exploration over time
+        profile_start = self.profiler.start()
+        superbatch_size = batch_size * gradient_steps
+        if self.prioritized:
+            idx, weights = self.memory.sample_prioritized(superbatch_size, self.beta)
+            weights = torch.from_numpy(weights).unsqueeze(1).to(self.device)
+        elif self.n_step > 1:
+            idx = self.memory.sample_indices(superbatch_size)
+        if self.n_step > 1:
+            # Discounted n-step returns, bootstrapped with gamma ** (steps actually used)
+            states, actions, rewards, next_states, dones, discounts = self.memory.gather_n_step_tensors(
+                idx, self.n_step, self.gamma, self.device)
+        else:
+            if self.prioritized:
+                states, actions, rewards, next_states, dones = self.memory.gather_tensors(idx, self.device)
+            else:
+                states, actions, rewards, next_states, dones = self.memory.sample_tensors(superbatch_size, self.device)
+            discounts = torch.full_like(rewards, self.gamma)
+        actions = actions.unsqueeze(1)
+        self.profiler.stop('replay_sample', profile_start)
+
+        profile_start = self.profiler.start()
+        for step in range(gradient_steps):
+            batch = slice(step * batch_size, (step + 1) * batch_size)
+            
+            # Get current Q values
+            current_q_values = self.model(states[batch]).gather(1, actions[batch])
+            
+            # Compute target Q values
+            with torch.no_grad():
+                next_q_values = self.target_model(next_states[batch])
+                if self.double_dqn:
+                    # Online network picks the action, target network evaluates it
+                    next_actions = self.model(next_states[batch]).argmax(1, keepdim=True)
+                    max_next_q_values = next_q_values.gather(1, next_actions).squeeze(1)
+                else:
+                    max_next_q_values = next_q_values.max(1)[0]
+                target_q_values = rewards[batch] + (1 - dones[batch]) * discounts[batch] * max_next_q_values
+                target_q_values = target_q_values.unsqueeze(1)
+            
+            # Compute loss, weighting each sample by its importance-sampling weight
+            if self.prioritized:
+                td_errors = target_q_values - current_q_values
+                loss = (weights[batch] * td_errors.pow(2)).mean()
+                self.memory.update_priorities(idx[batch], td_errors.detach().squeeze(1).cpu().numpy())
+            else:
+                loss = F.mse_loss(current_q_values, target_q_values)
+            
+            # Optimize the model
+            self.optimizer.zero_grad()
+            loss.backward()
+            self.optimizer.step()
+            self._loss_sum += loss.detach()
+            self._q_sum += current_q_values.detach().mean()
+            self._stat_updates += 1
+        self.profiler.stop('replay_update', profile_start)
+        self.profiler.count('gradient_updates', gradient_steps)
+
+        self._numpy_policy_stale = self.numpy_policy is not None
+    
+    def decay_epsilon(self):
+        """Decay epsilon for less exploration over time, call once per env step"""
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
-    
+
+    def pop_training_stats(self):
+        """Return (mean loss, mean Q-value) of the updates since the last call, NaN if none"""
+        if not self._stat_updates:
+            return float('nan'), float('nan')
+        loss, q = (torch.stack([self._loss_sum, self._q_sum]) / self._stat_updates).tolist()
+        self._loss_sum.zero_()
+        self._q_sum.zero_()
+        self._stat_updates = 0
+        return loss, q
+
     def load(self, name):
         """Load model weights from file"""
         if os.path.isfile(name):
             self.model.load_state_dict(torch.load(name))
             self.target_model.load_state_dict(torch.load(name))
+            self._numpy_policy_stale = self.numpy_policy is not None
     
-    def save(self, name):
-        """Save model weights to file"""
-        torch.save(self.model.state_dict(), name)
\ No newline at end of file
+    def save(self, name, register=True, **metadata):
+        """Save model weights to file
+
+        The file is also recorded in its directory's checkpoint index (see
+        registry.py) with the current epsilon (unless metadata gives one) and
+        any metadata given, e.g. episode, step and config_hash.
+        """
+        torch.save(self.model.state_dict(), name)
+        if register:
+            metadata.setdefault('epsilon', self.epsilon)
+            CheckpointRegistry.for_path(name).register(name, **metadata)
+
+    def checkpoint_state(self, episode=0, include_memory=True, **extra):
+        """Snapshot everything needed to resume training into a standalone dict
+
+        Tensors are copied to the CPU and replay arrays are copied, so the
+        snapshot can be written from another thread while training continues.
+        Extra keyword arguments (e.g. score history) are stored alongside.
+        """
+        checkpoint = {
+            'model': _clone_to_cpu(self.model.state_dict()),
+            'target_model': _clone_to_cpu(self.target_model.state_dict()),
+            'optimizer': _clone_to_cpu(self.optimizer.state_dict()),
+            'epsilon': self.epsilon,
+            'beta': self.beta,
+            'episode': episode,
+            'rng': {
+                'python': random.getstate(),
+                'numpy': np.random.get_state(),
+                'torch': torch.get_rng_state(),
+                'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+            },
+            'memory': self.memory.state_dict() if include_memory else None,
+        }
+        checkpoint.update(extra)
+        return checkpoint
+
+    def load_checkpoint(self, name):
+        """Restore a full checkpoint written from checkpoint_state(), return the checkpoint dict"""
+        checkpoint = load_checkpoint_file(name)
+        self.model.load_state_dict(checkpoint['model'])
+        self.target_model.load_state_dict(checkpoint['target_model'])
+        self.optimizer.load_state_dict(checkpoint['optimizer'])
+        self.epsilon = checkpoint['epsilon']
+        self.beta = checkpoint.get('beta', self.beta)
+
+        rng = checkpoint['rng']
+        random.setstate(rng['python'])
+        np.random.set_state(rng['numpy'])
+        torch.set_rng_state(rng['torch'])
+        if rng['cuda'] is not None and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(rng['cuda'])
+
+        if checkpoint['memory'] is not None:
+            self.memory.load_state_dict(checkpoint['memory'])
+        self._numpy_policy_stale = self.numpy_policy is not None
+        return checkpoint
+
+def _clone_to_cpu(obj):
+    """Recursively copy every tensor in a (nested) state dict to the CPU"""
+    if torch.is_tensor(obj):
+        return obj.detach().cpu().clone()
+    if isinstance(obj, dict):
+        return {k: _clone_to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_clone_to_cpu(v) for v in obj)
+    return obj
\ No newline at end of file
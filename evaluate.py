@@ -0,0 +1,151 @@
+import numpy as np
+import torch
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import re
+import time
+from dqn_agent import network_from_state_dict
+from numpy_policy import NumpyPolicy
+from registry import CheckpointRegistry
+
+# Policies loaded by this worker process, keyed by checkpoint path
+_policy_cache = {}
+
+def load_policy(model_path):
+    """Load a checkpoint into a NumpyPolicy, caching it per process"""
+    if model_path not in _policy_cache:
+        model = network_from_state_dict(torch.load(model_path, map_location='cpu'))
+        model.eval()
+        _policy_cache[model_path] = NumpyPolicy(model, max_batch_size=1)
+    return _policy_cache[model_path]
+
+def run_episode(policy, seed, max_steps):
+    """Play one greedy headless episode, return (score, steps)"""
+    from flappy_env import FlappyBirdEnv
+    env = FlappyBirdEnv(use_assets=False, seed=seed)
+    state = env.reset()
+    for step in range(max_steps):
+        state, _, done, info = env.step(policy.act(state))
+        if done:
+            return info['score'], step + 1
+    return env.score, max_steps
+
+def _evaluate_chunk(task):
+    """Worker entry point: play the episodes of one (checkpoint, seeds) chunk"""
+    model_path, seeds, max_steps = task
+    try:
+        policy = load_policy(model_path)
+    except Exception as e:
+        return model_path, None, f"{type(e).__name__}: {e}"
+    return model_path, [run_episode(policy, seed, max_steps) for seed in seeds], None
+
+def summarize(scores, steps, max_steps):
+    """Score statistics for one checkpoint"""
+    scores = np.asarray(scores)
+    return {
+        'episodes': int(len(scores)),
+        'mean': float(scores.mean()),
+        'std': float(scores.std()),
+        'median': float(np.median(scores)),
+        'p10': float(np.percentile(scores, 10)),
+        'p90': float(np.percentile(scores, 90)),
+        'min': int(scores.min()),
+        'max': int(scores.max()),
+        'mean_steps': float(np.mean(steps)),
+        'truncated': int(np.sum(np.asarray(steps) >= max_steps)),
+    }
+
+def checkpoint_sort_key(path):
+    """Order checkpoints by the episode number in their name, then by name"""
+    match = re.search(r'(\d+)\.pt$', path)
+    return (int(match.group(1)) if match else float('inf'), path)
+
+def evaluate_checkpoints(model_paths, episodes=100, max_steps=10000, workers=None, seed=0, chunk_size=10):
+    """Evaluate checkpoints headlessly across a process pool
+
+    Every checkpoint plays the same seeded episodes (seed, seed + 1, ...), so
+    scores are directly comparable. Episodes are capped at max_steps.
+    Returns a list of per-checkpoint result dicts sorted by mean score.
+    """
+    workers = workers or os.cpu_count()
+    seeds = [seed + i for i in range(episodes)]
+    tasks = [(path, seeds[i:i + chunk_size], max_steps)
+             for path in model_paths
+             for i in range(0, episodes, chunk_size)]
+
+    episode_results = {path: [] for path in model_paths}
+    errors = {}
+    ctx = mp.get_context('spawn')
+    with ctx.Pool(workers) as pool:
+        for path, chunk, error in pool.imap_unordered(_evaluate_chunk, tasks):
+            if error is not None:
+                errors[path] = error
+            else:
+                episode_results[path].extend(chunk)
+
+    results = []
+    for path in model_paths:
+        if path in errors:
+            results.append({'model': path, 'error': errors[path]})
+            continue
+        scores, steps = zip(*episode_results[path])
+        results.append({'model': path, **summarize(scores, steps, max_steps)})
+
+    results.sort(key=lambda r: r.get('mean', float('-inf')), reverse=True)
+    return results
+
+def record_eval_scores(results, seed=0):
+    """Store each checkpoint's evaluation statistics in its directory's checkpoint index"""
+    for r in results:
+        if 'error' in r:
+            continue
+        CheckpointRegistry.for_path(r['model']).update(
+            r['model'], eval_mean=r['mean'], eval_median=r['median'], eval_max=r['max'],
+            eval_episodes=r['episodes'], eval_seed=seed, eval_time=time.time())
+
+def print_results(results):
+    """Print a score table, best checkpoint first"""
+    print(f"{'Model':<45} {'Mean':>7} {'Median':>7} {'P10':>6} {'P90':>6} {'Max':>6} {'Trunc':>6}")
+    for r in results:
+        name = os.path.basename(r['model'])
+        if 'error' in r:
+            print(f"{name:<45} skipped ({r['error'].splitlines()[0][:60]})")
+        else:
+            print(f"{name:<45} {r['mean']:>7.2f} {r['median']:>7.1f} {r['p10']:>6.1f} "
+                  f"{r['p90']:>6.1f} {r['max']:>6d} {r['truncated']:>6d}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless parallel evaluation of Flappy Bird DQN checkpoints')
+    parser.add_argument('--models', type=str, default='models/flappy_dqn_*.pt', help='checkpoint path or glob pattern')
+    parser.add_argument('--episodes', type=int, default=100, help='episodes per checkpoint')
+    parser.add_argument('--max-steps', type=int, default=10000, help='step cap per episode')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first episode')
+    parser.add_argument('--output', type=str, default=None, help='write JSON results to this file')
+    parser.add_argument('--no-record', action='store_true', help="don't store the scores in the checkpoint index")
+    args = parser.parse_args()
+
+    model_paths = sorted(glob.glob(args.models), key=checkpoint_sort_key)
+    if not model_paths:
+        print(f"No checkpoints match {args.models}")
+        return
+
+    print(f"Evaluating {len(model_paths)} checkpoints x {args.episodes} episodes...")
+    start = time.time()
+    results = evaluate_checkpoints(model_paths, episodes=args.episodes, max_steps=args.max_steps,
+                                   workers=args.workers, seed=args.seed)
+    print_results(results)
+    print(f"Evaluation took {time.time() - start:.1f}s")
+    if not args.no_record:
+        record_eval_scores(results, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,95 +1,61 @@
-import pygame
 import random
 import numpy as np
-from collections import deque
-import os
 
 class FlappyBirdEnv:
-    def __init__(self, width=288, height=512, use_assets=True):
+    """Flappy Bird simulation core.
+
+    The game logic is pure Python/NumPy and never imports pygame. A renderer
+    (see renderer.py) is only created the first time render() is called.
+
+    render_mode: None, 'human' (pygame window) or 'rgb_array' (offscreen frame
+    returned as a (height, width, 3) uint8 array)
+    seed: seeds the env's own random.Random for pipe heights; by default it
+    is seeded from OS entropy
+    """
+
+    render_modes = (None, 'human', 'rgb_array')
+
+    def __init__(self, width=288, height=512, use_assets=True, render_mode=None, seed=None):
+        if render_mode not in self.render_modes:
+            raise ValueError(f"Invalid render_mode: {render_mode}. Use one of {self.render_modes}")
+
         self.width = width
         self.height = height
         self.pipe_gap = 100  # Gap between pipes
         self.pipe_width = 52
         self.bird_width = 34
         self.bird_height = 24
+        self.max_pipes = 3
         self.use_assets = use_assets
+        self.render_mode = render_mode
+        self.rng = random.Random(seed)
+
+        # Renderer is attached lazily by render()
+        self.renderer = None
+        self.game_over = False
+
+        # Optional FrameRecorder capturing rendered frames
+        self.recorder = None
+        self._owns_recorder = False
+
+        # Pipes live in a fixed ring of slots, oldest at _head. _next is the
+        # offset from _head of the first pipe the bird hasn't passed yet
+        self._pipe_x = [0] * self.max_pipes
+        self._pipe_top = [0] * self.max_pipes
+        self._pipe_bottom = [0] * self.max_pipes
+        self._pipe_passed = [False] * self.max_pipes
+        self._head = 0
+        self._count = 0
+        self._next = 0
 
-        # Initialize pygame
-        pygame.init()
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption('Flappy Bird RL')
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        
-        # Create assets directory if it doesn't exist
-        if not os.path.exists('assets'):
-            os.makedirs('assets')
-            print("Please download and place the following files in the 'assets' directory:")
-            print("- background.png (game background)")
-            print("- bird1.png, bird2.png, bird3.png (bird animation frames)")
-            print("- pipe.png (pipe obstacle)")
-            print("- base.png (ground)")
-        
-        # Load images if assets are available and use_assets is True
-        self.bg_color = (135, 206, 250)  # Sky blue (fallback)
-        self.bird_color = (255, 255, 0)  # Yellow (fallback)
-        self.pipe_color = (0, 128, 0)  # Green (fallback)
-        self.base_color = (222, 216, 149)  # Tan (fallback)
-        
-        if self.use_assets:
-            try:
-                # Try to load assets
-                self.bg_img = self.load_image('assets/background.png')
-                self.base_img = self.load_image('assets/base.png')
-                self.pipe_img = self.load_image('assets/pipe.png')
-                
-                # Load bird animation frames
-                self.bird_frames = [
-                    self.load_image('assets/bird1.png'),
-                    self.load_image('assets/bird2.png'),
-                    self.load_image('assets/bird3.png')
-                ]
-                self.bird_frame_idx = 0
-                self.animation_time = 0
-                
-                # Check if all assets loaded successfully
-                self.assets_loaded = (self.bg_img and self.base_img and 
-                                     self.pipe_img and all(self.bird_frames))
-                
-                if not self.assets_loaded:
-                    print("Some assets failed to load. Using simple graphics instead.")
-                else:
-                    print("Assets loaded successfully!")
-                    
-                    # Update dimensions based on actual images
-                    if self.bird_frames[0]:
-                        self.bird_width, self.bird_height = self.bird_frames[0].get_size()
-                    if self.pipe_img:
-                        self.pipe_width = self.pipe_img.get_width()
-                    
-            except Exception as e:
-                print(f"Error loading assets: {e}")
-                self.assets_loaded = False
-        else:
-            self.assets_loaded = False
-        
         # Game variables
         self.reset()
-    
-    def load_image(self, path):
-        """Load an image and return the surface, or None if it fails"""
-        try:
-            if os.path.exists(path):
-                return pygame.image.load(path).convert_alpha()
-            else:
-                print(f"Warning: Asset not found: {path}")
-                return None
-        except pygame.error:
-            print(f"Failed to load image: {path}")
-            return None
-    
-    def reset(self):
-        """Reset the environment to initial state and return observation"""
+
+    def reset(self, out=None):
+        """Reset the environment to initial state and return observation
+
+        out: optional buffer the observation is written into (see _get_observation)
+        """
         self.bird_x = 50
         self.bird_y = self.height // 2
         self.bird_velocity = 0
@@ -97,47 +63,131 @@ class FlappyBirdEnv:
         self.flap_power = -8
         
         # Generate first pipes
-        self.pipes = []
+        self._head = 0
+        self._count = 0
+        self._next = 0
         self.add_pipe()
         
         self.score = 0
         self.ticks = 0
         self.game_over = False
         
-        return self._get_observation()
+        # Each episode is recorded separately
+        if self.recorder is not None:
+            self.recorder.begin_episode()
+        
+        return self._get_observation(out)
     
     def add_pipe(self):
         """Add a new pipe to the environment"""
-        pipe_y = random.randint(self.pipe_gap + 50, self.height - 50 - self.pipe_gap)
-        self.pipes.append({
-            'x': self.width,
-            'top_height': pipe_y - self.pipe_gap // 2,
-            'bottom_y': pipe_y + self.pipe_gap // 2,
-            'passed': False
-        })
+        if self._count == self.max_pipes:
+            raise RuntimeError(f"At most {self.max_pipes} pipes can be active")
+        pipe_y = self._random_pipe_y()
+        i = (self._head + self._count) % self.max_pipes
+        self._pipe_x[i] = self.width
+        self._pipe_top[i] = pipe_y - self.pipe_gap // 2
+        self._pipe_bottom[i] = pipe_y + self.pipe_gap // 2
+        self._pipe_passed[i] = False
+        self._count += 1
+
+    def _random_pipe_y(self):
+        return self.rng.randint(self.pipe_gap + 50, self.height - 50 - self.pipe_gap)
+
+    def seed(self, seed):
+        """Reseed the pipe RNG so the next reset() starts the episode FlappyBirdEnv(seed=seed) would"""
+        self.rng.seed(seed)
+        self._random_pipe_y()  # The first pipe of the constructor's reset()
+
+    def iter_pipes(self):
+        """Yield (x, top_height, bottom_y, passed) for each active pipe, oldest first"""
+        for k in range(self._count):
+            i = (self._head + k) % self.max_pipes
+            yield self._pipe_x[i], self._pipe_top[i], self._pipe_bottom[i], self._pipe_passed[i]
+
+    @property
+    def pipes(self):
+        """The active pipes as a list of dicts, oldest first (a copy, read only)"""
+        return [{'x': x, 'top_height': top, 'bottom_y': bottom, 'passed': passed}
+                for x, top, bottom, passed in self.iter_pipes()]
     
-    def _get_observation(self):
-        """Return the current state observation for the RL agent"""
-        # Find the next pipe (the closest one that the bird hasn't passed yet)
-        next_pipe = None
-        for pipe in self.pipes:
-            if pipe['x'] + self.pipe_width > self.bird_x and not pipe['passed']:
-                next_pipe = pipe
+    def get_state(self, include_rng=True):
+        """Return a compact, picklable snapshot of the game state
+
+        Holds the bird, pipes, score, tick counter and (optionally) the pipe
+        RNG state; renderer and recorder are not included.
+        """
+        return {
+            'bird_y': self.bird_y,
+            'bird_velocity': self.bird_velocity,
+            'score': self.score,
+            'ticks': self.ticks,
+            'game_over': self.game_over,
+            'pipes': list(self.iter_pipes()),
+            'rng': self.rng.getstate() if include_rng else None,
+        }
+
+    def set_state(self, state):
+        """Restore a snapshot from get_state() and return its observation"""
+        self.bird_y = state['bird_y']
+        self.bird_velocity = state['bird_velocity']
+        self.score = state['score']
+        self.ticks = state['ticks']
+        self.game_over = state['game_over']
+        if len(state['pipes']) > self.max_pipes:
+            raise ValueError(f"State has {len(state['pipes'])} pipes, at most {self.max_pipes} are supported")
+        self._head = 0
+        self._count = len(state['pipes'])
+        self._next = self._count
+        for i, (x, top, bottom, passed) in enumerate(state['pipes']):
+            self._pipe_x[i] = x
+            self._pipe_top[i] = top
+            self._pipe_bottom[i] = bottom
+            self._pipe_passed[i] = passed
+            if not passed and self._next == self._count:
+                self._next = i
+        if state['rng'] is not None:
+            self.rng.setstate(state['rng'])
+        return self._get_observation()
+
+    def clone(self):
+        """Return a headless copy at the same state with its own pipe RNG
+
+        Stepping the clone never affects this environment, so it can be used
+        for lookahead search or counterfactual rollouts.
+        """
+        env = FlappyBirdEnv(self.width, self.height, use_assets=self.use_assets, seed=0)
+        env.set_state(self.get_state())
+        return env
+
+    def _get_observation(self, out=None):
+        """Return the current state observation for the RL agent
+
+        If out is given (e.g. a float32 array of shape (5,)) the features are
+        written into it and it is returned instead of a new float64 array.
+        """
+        # Find the next pipe (the closest one that the bird hasn't passed yet),
+        # starting from the first unpassed slot
+        cap = self.max_pipes
+        next_pipe = -1
+        for k in range(self._next, self._count):
+            i = (self._head + k) % cap
+            if self._pipe_x[i] + self.pipe_width > self.bird_x:
+                next_pipe = i
                 break
-        
-        if next_pipe is None and len(self.pipes) > 0:
-            next_pipe = self.pipes[0]
-        
-        if next_pipe is None:
+
+        if next_pipe < 0 and self._count > 0:
+            next_pipe = self._head
+
+        if next_pipe < 0:
             # If no pipes, use default values
             horizontal_distance = self.width
             height_diff_top = 0
             height_diff_bottom = 0
         else:
             # Calculate features
-            horizontal_distance = next_pipe['x'] - self.bird_x
-            height_diff_top = self.bird_y - next_pipe['top_height']
-            height_diff_bottom = next_pipe['bottom_y'] - self.bird_y
+            horizontal_distance = self._pipe_x[next_pipe] - self.bird_x
+            height_diff_top = self.bird_y - self._pipe_top[next_pipe]
+            height_diff_bottom = self._pipe_bottom[next_pipe] - self.bird_y
         
         # Normalize the values
         bird_y_normalized = self.bird_y / self.height
@@ -146,18 +196,26 @@ class FlappyBirdEnv:
         height_diff_top_normalized = height_diff_top / self.height
         height_diff_bottom_normalized = height_diff_bottom / self.height
         
-        return np.array([
-            bird_y_normalized,
-            bird_velocity_normalized,
-            horizontal_distance_normalized,
-            height_diff_top_normalized,
-            height_diff_bottom_normalized
-        ])
+        if out is None:
+            return np.array([
+                bird_y_normalized,
+                bird_velocity_normalized,
+                horizontal_distance_normalized,
+                height_diff_top_normalized,
+                height_diff_bottom_normalized
+            ])
+        out[0] = bird_y_normalized
+        out[1] = bird_velocity_normalized
+        out[2] = horizontal_distance_normalized
+        out[3] = height_diff_top_normalized
+        out[4] = height_diff_bottom_normalized
+        return out
     
-    def step(self, action):
+    def step(self, action, out=None):
         """
         Take action in the environment:
         action: 0 = do nothing, 1 = flap
+        out: optional buffer the observation is written into (see _get_observation)
         """
         reward = 0.2  # Small reward for staying alive
         
@@ -170,21 +228,31 @@ class FlappyBirdEnv:
         self.bird_velocity += self.gravity
         
         # Update pipes
-        for pipe in self.pipes:
-            pipe['x'] -= 3  # Pipe speed
-            
-            # Check if bird has passed the pipe
-            if not pipe['passed'] and pipe['x'] + self.pipe_width < self.bird_x:
-                pipe['passed'] = True
-                self.score += 1
-                reward += 2.0  # Reward for passing a pipe
+        cap = self.max_pipes
+        pipe_x = self._pipe_x
+        for k in range(self._count):
+            pipe_x[(self._head + k) % cap] -= 3  # Pipe speed
+
+        # Check if bird has passed the next pipe(s); pipes are ordered by x,
+        # so only the ones from the first unpassed slot on can be passed
+        while self._next < self._count:
+            i = (self._head + self._next) % cap
+            if pipe_x[i] + self.pipe_width >= self.bird_x:
+                break
+            self._pipe_passed[i] = True
+            self._next += 1
+            self.score += 1
+            reward += 2.0  # Reward for passing a pipe
                 
-        # Remove pipes that have gone off-screen
-        self.pipes = [p for p in self.pipes if p['x'] > -self.pipe_width]
+        # Remove pipes that have gone off-screen (always the oldest ones)
+        while self._count > 0 and pipe_x[self._head] <= -self.pipe_width:
+            self._head = (self._head + 1) % cap
+            self._count -= 1
+            self._next = max(self._next - 1, 0)
         
         # Add new pipes if needed
-        if len(self.pipes) < 3:
-            if len(self.pipes) == 0 or self.pipes[-1]['x'] < self.width - 150:
+        if self._count < self.max_pipes:
+            if self._count == 0 or pipe_x[(self._head + self._count - 1) % cap] < self.width - 150:
                 self.add_pipe()
         
         # Check for collisions
@@ -194,7 +262,7 @@ class FlappyBirdEnv:
         
         self.ticks += 1
         
-        return self._get_observation(), reward, done, {"score": self.score}
+        return self._get_observation(out), reward, done, {"score": self.score}
     
     def _check_collision(self):
         """Check if the bird has collided with pipes or boundaries"""
@@ -205,105 +273,75 @@ class FlappyBirdEnv:
         if self.bird_y <= 0 or self.bird_y + self.bird_height >= base_y:
             return True
         
-        # Check pipe collisions
-        for pipe in self.pipes:
-            if (pipe['x'] < self.bird_x + self.bird_width and 
-                pipe['x'] + self.pipe_width > self.bird_x):
+        # Check pipe collisions; passed pipes are behind the bird and pipes
+        # further right than the bird's front edge can't overlap it either
+        cap = self.max_pipes
+        for k in range(self._next, self._count):
+            i = (self._head + k) % cap
+            if self._pipe_x[i] >= self.bird_x + self.bird_width:
+                break
+            if self._pipe_x[i] + self.pipe_width > self.bird_x:
                 
-                if (self.bird_y < pipe['top_height'] or 
-                    self.bird_y + self.bird_height > pipe['bottom_y']):
+                if (self.bird_y < self._pipe_top[i] or 
+                    self.bird_y + self.bird_height > self._pipe_bottom[i]):
                     return True
         
         return False
     
-    def render(self, mode='human'):
-        """Render the current environment state"""
+    def render(self, mode=None):
+        """Render the current environment state
+
+        Returns a (height, width, 3) uint8 array in 'rgb_array' mode.
+        """
+        mode = mode or self.render_mode or 'human'
         if self.game_over:
+            return None
+
+        if self.renderer is None or self.renderer.mode != mode:
+            from renderer import FlappyBirdRenderer
+            if self.renderer is not None:
+                self.renderer.close()
+            self.renderer = FlappyBirdRenderer(self, mode=mode, use_assets=self.use_assets)
+
+        frame = self.renderer.render()
+        if self.recorder is not None:
+            self.recorder.capture(self.renderer.screen)
+
+        if self.renderer.quit_requested:
+            self.game_over = True
+            self.renderer.close()
+            self.renderer = None
+        return frame
+
+    def start_recording(self, recorder=None, **kwargs):
+        """Record every rendered frame, one recording per episode
+
+        Pass a FrameRecorder to share it, or keyword arguments (output_dir,
+        format, frame_stride, ...) to create one owned by this environment.
+        """
+        self.stop_recording()
+        if recorder is None:
+            from recorder import FrameRecorder
+            recorder = FrameRecorder(**kwargs)
+            self._owns_recorder = True
+        self.recorder = recorder
+        self.recorder.begin_episode()
+        return recorder
+
+    def stop_recording(self):
+        """Stop recording, finishing the current episode's recording"""
+        if self.recorder is None:
             return
-        
-        # Update bird animation
-        self.animation_time += 1
-        if self.animation_time % 5 == 0:  # Change frame every 5 ticks
-            self.bird_frame_idx = (self.bird_frame_idx + 1) % 3
-            
-        # Fill background
-        if self.assets_loaded and self.bg_img:
-            # Tile the background if needed
-            for i in range(0, self.width, self.bg_img.get_width()):
-                self.screen.blit(self.bg_img, (i, 0))
+        if self._owns_recorder:
+            self.recorder.close()
         else:
-            self.screen.fill(self.bg_color)
-        
-        # Draw pipes
-        for pipe in self.pipes:
-            if self.assets_loaded and self.pipe_img:
-                # Top pipe (flipped)
-                top_pipe = pygame.transform.flip(self.pipe_img, False, True)
-                self.screen.blit(top_pipe, (pipe['x'], pipe['top_height'] - top_pipe.get_height()))
-                
-                # Bottom pipe
-                self.screen.blit(self.pipe_img, (pipe['x'], pipe['bottom_y']))
-            else:
-                # Draw simple rectangles if no assets
-                # Top pipe
-                pygame.draw.rect(
-                    self.screen, 
-                    self.pipe_color, 
-                    pygame.Rect(pipe['x'], 0, self.pipe_width, pipe['top_height'])
-                )
-                # Bottom pipe
-                pygame.draw.rect(
-                    self.screen, 
-                    self.pipe_color, 
-                    pygame.Rect(pipe['x'], pipe['bottom_y'], self.pipe_width, self.height - pipe['bottom_y'])
-                )
-        
-        # Draw base/ground
-        base_y = self.height - 70  # Position of the ground
-        if self.assets_loaded and self.base_img:
-            for i in range(0, self.width, self.base_img.get_width()):
-                self.screen.blit(self.base_img, (i, base_y))
-        else:
-            pygame.draw.rect(
-                self.screen,
-                self.base_color,
-                pygame.Rect(0, base_y, self.width, 70)
-            )
-        
-        # Draw bird
-        if self.assets_loaded and all(self.bird_frames):
-            # Get current bird frame
-            bird_img = self.bird_frames[self.bird_frame_idx]
-            
-            # Rotate bird based on velocity
-            angle = -self.bird_velocity * 2  # Simple rotation based on velocity
-            rotated_bird = pygame.transform.rotate(bird_img, angle)
-            
-            # Calculate new rect to maintain center position after rotation
-            bird_rect = rotated_bird.get_rect(center=(self.bird_x + self.bird_width/2, 
-                                                      self.bird_y + self.bird_height/2))
-            self.screen.blit(rotated_bird, bird_rect.topleft)
-        else:
-            # Draw simple rectangle if no assets
-            pygame.draw.rect(
-                self.screen, 
-                self.bird_color, 
-                pygame.Rect(self.bird_x, self.bird_y, self.bird_width, self.bird_height)
-            )
-        
-        # Draw score
-        score_text = self.font.render(f'Score: {self.score}', True, (255, 255, 255))
-        self.screen.blit(score_text, (10, 10))
-        
-        pygame.display.flip()
-        self.clock.tick(30)
-        
-        # Check for quit event
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.game_over = True
-                pygame.quit()
-    
+            self.recorder.end_episode()
+        self.recorder = None
+        self._owns_recorder = False
+
     def close(self):
         """Close the environment"""
-        pygame.quit()
\ No newline at end of file
+        self.stop_recording()
+        if self.renderer is not None:
+            self.renderer.close()
+            self.renderer = None
@@ -0,0 +1,301 @@
+import numpy as np
+import argparse
+import collections
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+DEFAULT_ADDRESS = '/tmp/flappy_policy.sock'
+
+def load_numpy_policy(model_path, max_batch_size):
+    """Load a DQNNetwork checkpoint (weights or full checkpoint) into a NumpyPolicy"""
+    from checkpoint import load_checkpoint_file
+    from dqn_agent import network_from_state_dict
+    from numpy_policy import NumpyPolicy
+
+    state_dict = load_checkpoint_file(model_path)
+    if 'target_model' in state_dict:  # Full resume checkpoint
+        state_dict = state_dict['model']
+    model = network_from_state_dict(state_dict)
+    model.eval()
+    return NumpyPolicy(model, max_batch_size=max_batch_size)
+
+class PolicyServer:
+    """Serves greedy actions of one checkpoint to many local clients.
+
+    Clients connect over a unix socket (see PolicyClient). Every act request
+    goes on a shared queue; a single batching thread takes the oldest
+    request, waits at most max_delay seconds for more to arrive (up to
+    max_batch_size, or until every connected client is waiting), answers the whole batch with one NumPy forward pass and
+    replies to each client.
+
+    load() swaps in another checkpoint while serving: the new policy is
+    built aside and replaces the old one between batches. With
+    watch_interval set, the checkpoint file is reloaded whenever it changes.
+    """
+
+    def __init__(self, model_path, address=DEFAULT_ADDRESS, max_batch_size=256, max_delay=0.002,
+                 watch_interval=None, latency_window=10000):
+        self.address = address
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.watch_interval = watch_interval
+
+        self.model_path = None
+        self.model_mtime = None
+        self.policy = None
+        self.swaps = -1  # The first load is not a swap
+        self._load_lock = threading.Lock()
+        self.load(model_path)
+
+        self.requests = queue.Queue()
+        self._states = np.zeros((max_batch_size, self.policy.state_size), dtype=np.float32)
+
+        # Statistics
+        self.request_count = 0
+        self.batch_count = 0
+        self.max_batch_seen = 0
+        self.max_queue_depth = 0
+        self.latencies = collections.deque(maxlen=latency_window)  # Seconds, enqueue to reply
+        self.started = time.time()
+
+        self.running = False
+        self.listener = None
+        self.threads = []
+        self.clients = 0  # Connected clients, each has at most one request in flight
+        self._clients_lock = threading.Lock()
+
+    def load(self, model_path):
+        """Load a checkpoint and swap it in for the following batches"""
+        with self._load_lock:
+            policy = load_numpy_policy(model_path, self.max_batch_size)
+            self.policy = policy
+            self.model_path = model_path
+            self.model_mtime = os.path.getmtime(model_path)
+            self.swaps += 1
+
+    def start(self):
+        """Start listening and serving in background threads"""
+        if os.path.exists(self.address):
+            os.remove(self.address)  # Stale socket from a previous run
+        self.listener = Listener(self.address, family='AF_UNIX')
+        self.running = True
+        targets = [self._accept_loop, self._batch_loop]
+        if self.watch_interval:
+            targets.append(self._watch_loop)
+        for target in targets:
+            thread = threading.Thread(target=target, name=f"policy-server{target.__name__[:-5]}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return  # Listener closed
+            threading.Thread(target=self._client_loop, args=(conn,), name='policy-server-client',
+                             daemon=True).start()
+
+    def _client_loop(self, conn):
+        """Read one client's messages until it disconnects"""
+        with self._clients_lock:
+            self.clients += 1
+        try:
+            while self.running:
+                message = conn.recv()
+                kind = message[0]
+                if kind == 'act':
+                    self.requests.put((conn, message[1], time.perf_counter()))
+                elif kind == 'stats':
+                    conn.send(self.stats())
+                elif kind == 'load':
+                    try:
+                        self.load(message[1])
+                        conn.send(('ok', self.model_path))
+                    except Exception as e:
+                        conn.send(('error', f"{type(e).__name__}: {e}"))
+                else:
+                    conn.send(('error', f"Unknown request: {kind}"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._clients_lock:
+                self.clients -= 1
+            conn.close()
+
+    def _next_batch(self):
+        """Block for a request, then collect more until the batch is full or the delay is up"""
+        batch = [self.requests.get()]
+        if batch[0] is None:
+            return None
+        deadline = batch[0][2] + self.max_delay
+        while len(batch) < min(self.max_batch_size, self.clients):
+            timeout = deadline - time.perf_counter()
+            try:
+                # Past the deadline, still take whatever is already queued
+                item = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.requests.put(None)  # Stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            n = len(batch)
+            self.max_queue_depth = max(self.max_queue_depth, n + self.requests.qsize())
+            states = self._states[:n]
+            for i, (_, state, _) in enumerate(batch):
+                states[i] = state
+            actions = self.policy.act_batch(states)
+
+            for (conn, _, enqueued), action in zip(batch, actions):
+                try:
+                    conn.send(int(action))
+                except OSError:
+                    continue  # Client went away
+                self.latencies.append(time.perf_counter() - enqueued)
+            self.request_count += n
+            self.batch_count += 1
+            self.max_batch_seen = max(self.max_batch_seen, n)
+
+    def _watch_loop(self):
+        """Reload the checkpoint whenever its file is rewritten"""
+        while self.running:
+            time.sleep(self.watch_interval)
+            try:
+                if os.path.getmtime(self.model_path) != self.model_mtime:
+                    self.load(self.model_path)
+                    print(f"Reloaded {self.model_path}")
+            except Exception as e:
+                print(f"Failed to reload {self.model_path}: {e}")
+
+    def stats(self):
+        """Queue depth, batch size and latency statistics since the server started"""
+        latencies = np.array(self.latencies) * 1000
+        has_latency = len(latencies) > 0
+        return {
+            'model': self.model_path,
+            'swaps': self.swaps,
+            'uptime': time.time() - self.started,
+            'requests': self.request_count,
+            'batches': self.batch_count,
+            'mean_batch_size': self.request_count / self.batch_count if self.batch_count else 0.0,
+            'max_batch_size': self.max_batch_seen,
+            'clients': self.clients,
+            'queue_depth': self.requests.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'latency_ms_mean': float(latencies.mean()) if has_latency else 0.0,
+            'latency_ms_p50': float(np.percentile(latencies, 50)) if has_latency else 0.0,
+            'latency_ms_p99': float(np.percentile(latencies, 99)) if has_latency else 0.0,
+            'latency_ms_max': float(latencies.max()) if has_latency else 0.0,
+        }
+
+    def close(self):
+        """Stop accepting clients and finish the queued requests"""
+        self.running = False
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        self.requests.put(None)
+        for thread in self.threads:
+            thread.join(timeout=1)
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+class PolicyClient:
+    """Connection to a PolicyServer, usable in place of a local policy's act()"""
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.conn = Client(address, family='AF_UNIX')
+
+    def act(self, state):
+        """Return the served greedy action for a single state"""
+        self.conn.send(('act', np.asarray(state, dtype=np.float32)))
+        return self.conn.recv()
+
+    def stats(self):
+        """Return the server's statistics dict"""
+        self.conn.send(('stats',))
+        return self.conn.recv()
+
+    def load(self, model_path):
+        """Ask the server to hot-swap to another checkpoint (a path on the server's machine)"""
+        self.conn.send(('load', model_path))
+        status, detail = self.conn.recv()
+        if status != 'ok':
+            raise RuntimeError(detail)
+
+    def close(self):
+        self.conn.close()
+
+def _client_process(address, seed, episodes, max_steps):
+    """Load generator: play headless episodes with actions from the server"""
+    from flappy_env import FlappyBirdEnv
+    client = PolicyClient(address)
+    try:
+        for i in range(episodes):
+            env = FlappyBirdEnv(use_assets=False, seed=seed + i)
+            state = env.reset()
+            for _ in range(max_steps):
+                state, _, done, _ = env.step(client.act(state))
+                if done:
+                    break
+    finally:
+        client.close()
+
+def print_stats(stats):
+    print(f"{stats['requests']:,} requests in {stats['batches']:,} batches "
+          f"(mean {stats['mean_batch_size']:.1f}, max {stats['max_batch_size']}), "
+          f"queue depth {stats['queue_depth']} (max {stats['max_queue_depth']}), "
+          f"latency p50 {stats['latency_ms_p50']:.2f}ms p99 {stats['latency_ms_p99']:.2f}ms "
+          f"max {stats['latency_ms_max']:.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched policy inference server for Flappy Bird DQN checkpoints')
+    parser.add_argument('--model', type=str, default='models/flappy_dqn_final.pt', help='checkpoint to serve')
+    parser.add_argument('--socket', type=str, default=DEFAULT_ADDRESS, help='unix socket path')
+    parser.add_argument('--max-batch', type=int, default=256, help='largest batched forward pass')
+    parser.add_argument('--max-delay-ms', type=float, default=2.0, help='longest wait for a batch to fill')
+    parser.add_argument('--watch', type=float, default=None, help='reload the checkpoint when it changes, polled every N seconds')
+    parser.add_argument('--stats-interval', type=float, default=10.0, help='seconds between statistics lines')
+    parser.add_argument('--clients', type=int, default=0, help='start N local load-generating game clients, then exit')
+    parser.add_argument('--episodes', type=int, default=20, help='episodes per load-generating client')
+    parser.add_argument('--max-steps', type=int, default=10000, help='step cap per load-generating episode')
+    args = parser.parse_args()
+
+    server = PolicyServer(args.model, address=args.socket, max_batch_size=args.max_batch,
+                          max_delay=args.max_delay_ms / 1000, watch_interval=args.watch).start()
+    print(f"Serving {args.model} on {args.socket}")
+    try:
+        if args.clients:
+            ctx = mp.get_context('spawn')
+            clients = [ctx.Process(target=_client_process, args=(args.socket, i * args.episodes, args.episodes,
+                                                                  args.max_steps))
+                       for i in range(args.clients)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            print_stats(server.stats())
+        else:
+            while True:
+                time.sleep(args.stats_interval)
+                print_stats(server.stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
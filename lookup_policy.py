@@ -0,0 +1,88 @@
+import numpy as np
+import json
+import os
+
+MAGIC = b'FBLUT1\n'
+HEADER_ALIGN = 64
+
+def save_table(path, table, lows, highs, **metadata):
+    """Write an action table and its grid to a memory-mappable file
+
+    The file is MAGIC, a little-endian uint32 header length, a JSON header
+    (grid, dtype, metadata) padded to HEADER_ALIGN bytes, then the table in
+    C order.
+    """
+    header = json.dumps({
+        'shape': list(table.shape),
+        'dtype': table.dtype.str,
+        'lows': [float(v) for v in lows],
+        'highs': [float(v) for v in highs],
+        'metadata': metadata,
+    }).encode()
+    prefix = len(MAGIC) + 4
+    header += b' ' * (-(prefix + len(header)) % HEADER_ALIGN)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array(len(header), dtype='<u4').tobytes())
+        f.write(header)
+        f.write(np.ascontiguousarray(table).tobytes())
+    os.replace(tmp_path, path)
+
+def read_header(path):
+    """Return (header dict, table offset) of a lookup table file"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a lookup table file")
+        length = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+        header = json.loads(f.read(length))
+    return header, len(MAGIC) + 4 + length
+
+class LookupTablePolicy:
+    """Torch-free policy answering act() from a precomputed action table.
+
+    The table (built by distill.py) holds the greedy action at the centre of
+    every cell of a regular grid over the observation features; states
+    outside the grid use the nearest edge cell. The file is memory-mapped,
+    so loading is instant and the pages are shared between processes.
+    """
+
+    def __init__(self, path):
+        header, offset = read_header(path)
+        self.path = path
+        self.metadata = header['metadata']
+        self.shape = tuple(header['shape'])
+        self.lows = np.array(header['lows'])
+        self.highs = np.array(header['highs'])
+        self.table = np.memmap(path, dtype=np.dtype(header['dtype']), mode='r', offset=offset, shape=self.shape)
+        self.flat_table = self.table.reshape(-1)
+
+        bins = np.array(self.shape)
+        self.scales = bins / (self.highs - self.lows)
+        self.strides = np.array([int(np.prod(self.shape[i + 1:])) for i in range(len(self.shape))])
+
+        # Plain Python copies, scalar lookups are faster without NumPy scalars
+        self._axes = [(float(low), float(scale), int(n) - 1, int(stride)) for low, scale, n, stride
+                      in zip(self.lows, self.scales, bins, self.strides)]
+
+    def act(self, state):
+        """Return the table's action for a single state"""
+        index = 0
+        for value, (low, scale, last, stride) in zip(state, self._axes):
+            i = int((value - low) * scale)
+            if i < 0:
+                i = 0
+            elif i > last:
+                i = last
+            index += i * stride
+        return int(self.flat_table[index])
+
+    def cell_indices(self, states):
+        """Return the flat table index of each row of a batch"""
+        cells = ((np.asarray(states) - self.lows) * self.scales).astype(np.int64)
+        np.clip(cells, 0, np.array(self.shape) - 1, out=cells)
+        return cells @ self.strides
+
+    def act_batch(self, states):
+        """Return the table's action for each row of a batch"""
+        return self.flat_table[self.cell_indices(states)]
@@ -3,11 +3,40 @@ import argparse
 
 def main():
     parser = argparse.ArgumentParser(description='Flappy Bird DQN')
-    parser.add_argument('--mode', type=str, default='train', help='train or test')
+    parser.add_argument('--mode', type=str, default='train', help='train, test or evaluate')
     parser.add_argument('--model', type=str, default='models/flappy_dqn_final.pt', help='model path for testing')
-    parser.add_argument('--episodes', type=int, default=1000, help='number of episodes to train')
+    parser.add_argument('--select', type=str, default=None, help="test the checkpoint in --model's directory matching a query: best, best:<metric>, latest or episode:<N>")
+    parser.add_argument('--episodes', type=int, default=1000, help='number of episodes to train (or per checkpoint when evaluating)')
+    parser.add_argument('--models', type=str, default='models/flappy_dqn_*.pt', help='checkpoint glob pattern for evaluation')
+    parser.add_argument('--max-steps', type=int, default=10000, help='step cap per evaluation episode')
+    parser.add_argument('--workers', type=int, default=None, help='evaluation worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first evaluation episode')
+    parser.add_argument('--no-record', action='store_true', help="don't store evaluation scores in the checkpoint index")
     parser.add_argument('--render_freq', type=int, default=50, help='rendering frequency during training')
     parser.add_argument('--no-assets', action='store_true', help='disable game assets and use simple graphics')
+    parser.add_argument('--actors', type=int, default=0, help='number of actor processes for distributed training (0 = single process)')
+    parser.add_argument('--batch-size', type=int, default=32, help='minibatch size per gradient step')
+    parser.add_argument('--train-freq', type=int, default=1, help='env steps between learner updates (epsilon still decays once per env step)')
+    parser.add_argument('--gradient-steps', type=int, default=1, help='gradient steps per learner update (epsilon still decays once per env step)')
+    parser.add_argument('--target-update-steps', type=int, default=None, help='env steps between target network updates (default: every 10 episodes)')
+    parser.add_argument('--tau', type=float, default=1.0, help='Polyak rate for target updates (1.0 = hard copy)')
+    parser.add_argument('--n-step', type=int, default=1, help='train on n-step returns (1 = one-step targets)')
+    parser.add_argument('--double-dqn', action='store_true', help='use Double-DQN targets')
+    parser.add_argument('--config', type=str, default=None, help='JSON file of training hyperparameters (see config.py), overrides the matching options')
+    parser.add_argument('--keep-checkpoints', type=int, default=None, help='keep only the latest N episode checkpoints (plus the best evaluated ones)')
+    parser.add_argument('--memory-size', type=int, default=50000, help='replay memory capacity in transitions')
+    parser.add_argument('--replay-dir', type=str, default=None, help='keep the replay memory in memory-mapped files in this directory (reused by later runs)')
+    parser.add_argument('--replay-dtype', type=str, default='float32', choices=['float32', 'float16'], help='stored state precision with --replay-dir')
+    parser.add_argument('--record-trajectories', type=str, default=None, help='stream train/test episodes into this trajectory dataset directory (see trajectories.py)')
+    parser.add_argument('--init-model', type=str, default=None, help='start training from these weights (e.g. from pretrain.py)')
+    parser.add_argument('--resume', type=str, default=None, help='resume training from a full checkpoint (e.g. models/flappy_dqn_resume.ckpt)')
+    parser.add_argument('--record', type=str, default=None, choices=['png', 'gif', 'mp4'], help='record test episodes to recordings/ in this format')
+    parser.add_argument('--frame-stride', type=int, default=1, help='keep every n-th frame when recording')
+    parser.add_argument('--pixels', action='store_true', help='train a convolutional network on stacked grayscale frames')
+    parser.add_argument('--live-plot', action='store_true', help='refresh logs/training_progress.png from a separate viewer process while training')
+    parser.add_argument('--print-freq', type=int, default=1, help='episodes between training progress lines')
+    parser.add_argument('--profile', action='store_true', help='record training loop phase timings to logs/profile.jsonl')
+    parser.add_argument('--prioritized-replay', action='store_true', help='use prioritized experience replay during training')
     args = parser.parse_args()
     
     # Create models directory if it doesn't exist
@@ -24,23 +53,79 @@ def main():
     use_assets = not args.no_assets
     
     if args.mode == 'train':
+        from config import make_config, load_config
+        config = make_config(batch_size=args.batch_size, memory_size=args.memory_size,
+                             train_freq=args.train_freq,
+                             gradient_steps=args.gradient_steps,
+                             target_update_steps=args.target_update_steps, tau=args.tau,
+                             n_step=args.n_step, double_dqn=args.double_dqn)
+        if args.config:
+            config = load_config(args.config, base=config)
+
+    if args.mode == 'train' and args.actors > 0:
+        from distributed import train_distributed
+        # Options of the single-process trainer the actors/learner split has no use for
+        unsupported = [flag for flag in ('--resume', '--pixels', '--live-plot', '--profile',
+                                         '--prioritized-replay', '--replay-dir', '--record-trajectories',
+                                         '--init-model')
+                       if getattr(args, flag[2:].replace('-', '_')) != parser.get_default(flag[2:].replace('-', '_'))]
+        if unsupported:
+            parser.error(f"--actors can't be combined with {', '.join(unsupported)}")
+        if config['n_step'] != 1:
+            parser.error("--actors requires --n-step 1")
+        print(f"Starting distributed training for {args.episodes} episodes with {args.actors} actors...")
+        agent = train_distributed(episodes=args.episodes, num_actors=args.actors,
+                                  keep_checkpoints=args.keep_checkpoints, print_freq=args.print_freq, **config)
+        print("Training completed!")
+
+    elif args.mode == 'train':
         from train import train_dqn_agent
         print(f"Starting training for {args.episodes} episodes...")
         print(f"Using {'simple graphics' if not use_assets else 'game assets'}")
-        agent = train_dqn_agent(episodes=args.episodes, use_assets=use_assets)
+        agent = train_dqn_agent(episodes=args.episodes, use_assets=use_assets,
+                                prioritized_replay=args.prioritized_replay,
+                                render_freq=args.render_freq, profile=args.profile,
+                                resume=args.resume, pixels=args.pixels, live_plot=args.live_plot,
+                                print_freq=args.print_freq, keep_checkpoints=args.keep_checkpoints,
+                                replay_dir=args.replay_dir, replay_dtype=args.replay_dtype,
+                                record_dir=args.record_trajectories, init_model=args.init_model, **config)
         print("Training completed!")
         
     elif args.mode == 'test':
         from test import test_trained_agent
+        if args.select:
+            from registry import CheckpointRegistry
+            registry = CheckpointRegistry(os.path.dirname(args.model) or '.')
+            registry.scan()  # Index checkpoints saved before the registry existed
+            try:
+                args.model = registry.select(args.select)
+            except (LookupError, ValueError) as e:
+                print(e)
+                return
         if os.path.exists(args.model):
             print(f"Testing agent with model: {args.model}")
             print(f"Using {'simple graphics' if not use_assets else 'game assets'}")
-            test_trained_agent(args.model, use_assets=use_assets)
+            test_trained_agent(args.model, use_assets=use_assets, record=args.record,
+                               frame_stride=args.frame_stride, trajectory_dir=args.record_trajectories)
         else:
             print(f"Model {args.model} not found. Please train first or specify correct model path.")
             
+    elif args.mode == 'evaluate':
+        import glob
+        from evaluate import evaluate_checkpoints, print_results, checkpoint_sort_key, record_eval_scores
+        model_paths = sorted(glob.glob(args.models), key=checkpoint_sort_key)
+        if model_paths:
+            print(f"Evaluating {len(model_paths)} checkpoints x {args.episodes} episodes...")
+            results = evaluate_checkpoints(model_paths, episodes=args.episodes,
+                                           max_steps=args.max_steps, workers=args.workers, seed=args.seed)
+            print_results(results)
+            if not args.no_record:
+                record_eval_scores(results, seed=args.seed)
+        else:
+            print(f"No checkpoints match {args.models}")
+            
     else:
-        print("Invalid mode. Use 'train' or 'test'.")
+        print("Invalid mode. Use 'train', 'test' or 'evaluate'.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
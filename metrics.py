@@ -0,0 +1,139 @@
+import numpy as np
+import os
+import time
+
+MAGIC = b'FBMETR1\n'
+
+# One fixed-size little-endian record per episode
+RECORD_DTYPE = np.dtype([
+    ('episode', '<u4'),
+    ('score', '<i4'),
+    ('reward', '<f4'),
+    ('steps', '<u4'),
+    ('epsilon', '<f4'),
+    ('loss', '<f4'),  # Mean training loss over the episode's updates, NaN without updates
+    ('mean_q', '<f4'),  # Mean Q-value of the taken actions in those updates
+    ('wall_time', '<f4'),  # Seconds spent on the episode
+    ('timestamp', '<f8'),  # Unix time at the end of the episode
+])
+
+class RollingWindow:
+    """Mean and standard deviation of the last `size` values in O(1) per push"""
+
+    def __init__(self, size=100):
+        self.size = size
+        self.values = np.zeros(size)
+        self.clear()
+
+    def clear(self):
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value):
+        """Add a value, dropping the oldest one once the window is full"""
+        if self.count == self.size:
+            old = self.values[self.pos]
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+        self.values[self.pos] = value
+        self.total += value
+        self.total_sq += value * value
+        self.pos = (self.pos + 1) % self.size
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        if not self.count:
+            return 0.0
+        return float(np.sqrt(max(self.total_sq / self.count - self.mean ** 2, 0.0)))
+
+    def state_dict(self):
+        """Window contents, oldest first"""
+        start = self.pos - self.count
+        return {'size': self.size, 'values': np.roll(self.values, -start)[:self.count].copy()}
+
+    def load_state_dict(self, state):
+        self.clear()
+        for value in state['values'][-self.size:]:
+            self.push(float(value))
+
+class MetricsLogger:
+    """Append-only per-episode training metrics with rolling statistics.
+
+    log() appends one RECORD_DTYPE record (40 bytes) to path and flushes it,
+    so a separate process can tail the file (see metrics_viewer.py) while
+    training runs. Rolling means over the last `window` scores and rewards
+    are kept in O(1) per episode. Pass resume_episode to continue an existing
+    log: records after that episode (written after the checkpoint being
+    resumed) are dropped.
+    """
+
+    def __init__(self, path='logs/metrics.bin', window=100, resume_episode=None):
+        self.path = path
+        self.scores = RollingWindow(window)
+        self.rewards = RollingWindow(window)
+        self.best_score = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume_episode is not None and os.path.exists(path):
+            records = read_metrics(path)
+            keep = int(np.sum(records['episode'] <= resume_episode))
+            self.file = open(path, 'r+b')
+            self.file.truncate(len(MAGIC) + keep * RECORD_DTYPE.itemsize)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+            self.file.flush()
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+
+    def log(self, episode, score, reward, steps, epsilon, loss=float('nan'), mean_q=float('nan'), wall_time=0.0):
+        """Append an episode's record and update the rolling statistics"""
+        record = self._record[0]
+        record['episode'] = episode
+        record['score'] = score
+        record['reward'] = reward
+        record['steps'] = steps
+        record['epsilon'] = epsilon
+        record['loss'] = loss
+        record['mean_q'] = mean_q
+        record['wall_time'] = wall_time
+        record['timestamp'] = time.time()
+        self.file.write(self._record.tobytes())
+        self.file.flush()
+
+        self.scores.push(score)
+        self.rewards.push(reward)
+        self.best_score = max(self.best_score, score)
+
+    def state_dict(self):
+        """Rolling windows for a resume checkpoint"""
+        return {'scores': self.scores.state_dict(), 'rewards': self.rewards.state_dict(),
+                'best_score': self.best_score}
+
+    def load_state_dict(self, state):
+        self.scores.load_state_dict(state['scores'])
+        self.rewards.load_state_dict(state['rewards'])
+        self.best_score = state['best_score']
+
+    def close(self):
+        self.file.close()
+
+def read_metrics(path, offset=0):
+    """Read the complete records of a metrics file, starting at record offset"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a metrics file")
+        f.seek(len(MAGIC) + offset * RECORD_DTYPE.itemsize)
+        data = f.read()
+    complete = len(data) - len(data) % RECORD_DTYPE.itemsize  # A record may be half written
+    return np.frombuffer(data[:complete], dtype=RECORD_DTYPE)
@@ -0,0 +1,107 @@
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Renders to files only, never opens a window
+import matplotlib.pyplot as plt
+import argparse
+import os
+import time
+from metrics import MAGIC, RECORD_DTYPE, read_metrics
+
+class MetricsTail:
+    """Follows a growing metrics file, reading only the records added since the last poll"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def poll(self):
+        """Read new records, return how many arrived
+
+        If the file was truncated or restarted (a new or resumed run), it is
+        read again from the start.
+        """
+        try:
+            if os.path.getsize(self.path) < len(MAGIC) + len(self.records) * RECORD_DTYPE.itemsize:
+                self.records = self.records[:0]
+            # Reread from the last known record to check it is still the same one
+            offset = max(len(self.records) - 1, 0)
+            new = read_metrics(self.path, offset=offset)
+            if len(self.records) and (not len(new) or new[:1].tobytes() != self.records[-1:].tobytes()):
+                self.records = self.records[:0]
+                new = read_metrics(self.path)
+            elif len(self.records):
+                new = new[1:]
+        except (OSError, ValueError):
+            return 0  # Not created or header not written yet
+        if len(new):
+            self.records = np.concatenate([self.records, new])
+        return len(new)
+
+def rolling_mean(values, window):
+    """Mean of each value and up to window - 1 values before it, ignoring NaNs"""
+    valid = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    n = counts[1:] - counts[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sums[1:] - sums[start]) / n
+
+def plot_metrics(records, output, window=100):
+    """Plot score, reward, steps, epsilon, loss and mean Q per episode to an image file
+
+    The image is written to a temporary file and renamed, so a reader never
+    sees a half-written plot.
+    """
+    episodes = records['episode']
+    panels = [('score', 'Score'), ('reward', 'Reward'), ('steps', 'Steps'),
+              ('epsilon', 'Exploration Rate (Epsilon)'), ('loss', 'Loss'), ('mean_q', 'Mean Q-Value')]
+
+    fig, axes = plt.subplots(2, 3, figsize=(15, 8))
+    for ax, (field, title) in zip(axes.flat, panels):
+        values = records[field].astype(np.float64)
+        if field == 'epsilon':
+            ax.plot(episodes, values)
+        else:
+            ax.plot(episodes, values, alpha=0.3, label='episode')
+            ax.plot(episodes, rolling_mean(values, window), label=f'mean of last {window}')
+            ax.legend(loc='upper left', fontsize=8)
+        ax.set_title(title)
+        ax.set_xlabel('Episode')
+    if len(records):
+        elapsed = records['timestamp'][-1] - records['timestamp'][0] + records['wall_time'][0]
+        fig.suptitle(f"{len(records)} episodes, {np.sum(records['steps']):,} steps, "
+                     f"best score {records['score'].max()}, {elapsed / 60:.1f} min")
+    fig.tight_layout()
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    root, ext = os.path.splitext(output)
+    tmp_path = f"{root}.tmp{ext}"
+    fig.savefig(tmp_path, dpi=100)
+    plt.close(fig)
+    os.replace(tmp_path, output)
+
+def main():
+    parser = argparse.ArgumentParser(description='Tail a training metrics log and keep its plots up to date')
+    parser.add_argument('--log', type=str, default='logs/metrics.bin', help='metrics file written by training')
+    parser.add_argument('--output', type=str, default='logs/training_progress.png', help='plot image to refresh')
+    parser.add_argument('--interval', type=float, default=10.0, help='seconds between checks for new episodes')
+    parser.add_argument('--window', type=int, default=100, help='episodes in the rolling means')
+    parser.add_argument('--once', action='store_true', help='plot the current log once and exit')
+    args = parser.parse_args()
+
+    tail = MetricsTail(args.log)
+    try:
+        while True:
+            if tail.poll() and len(tail.records):
+                plot_metrics(tail.records, args.output, args.window)
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
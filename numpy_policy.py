@@ -0,0 +1,92 @@
+import numpy as np
+import torch
+import torch.nn as nn
+
+class NumpyPolicy:
+    """Torch-free inference path for a DQNNetwork.
+
+    Snapshots the network's Linear layers into contiguous float32 NumPy
+    matrices (dropout is dropped, matching eval mode) and evaluates the MLP
+    into preallocated buffers, so act() allocates nothing per call.
+    Call refresh() after the source model's weights change.
+    """
+
+    def __init__(self, model, max_batch_size=256):
+        self.model = model
+        layers = [m for m in model.modules() if isinstance(m, nn.Linear)]
+        # Stored transposed so a forward pass is x @ W + b
+        # Always copied: on the CPU .numpy() shares the parameter's memory
+        self.weights = [np.array(l.weight.detach().cpu().numpy().T, dtype=np.float32, order='C') for l in layers]
+        self.biases = [np.array(l.bias.detach().cpu().numpy(), dtype=np.float32) for l in layers]
+        self.layers = layers
+        self.state_size = self.weights[0].shape[0]
+        self.action_size = self.weights[-1].shape[1]
+
+        # Buffers for single states
+        self._x = np.zeros(self.state_size, dtype=np.float32)
+        self._hidden = [np.zeros(w.shape[1], dtype=np.float32) for w in self.weights]
+
+        # Buffers for batches, grown on demand
+        self._batch_x = None
+        self._batch_hidden = None
+        self._batch_actions = None
+        self._ensure_batch_buffers(max_batch_size)
+
+    def _ensure_batch_buffers(self, batch_size):
+        """Make sure the batch buffers hold at least batch_size rows"""
+        if self._batch_x is not None and len(self._batch_x) >= batch_size:
+            return
+        self._batch_x = np.zeros((batch_size, self.state_size), dtype=np.float32)
+        self._batch_hidden = [np.zeros((batch_size, w.shape[1]), dtype=np.float32) for w in self.weights]
+        self._batch_actions = np.zeros(batch_size, dtype=np.int64)
+
+    def refresh(self):
+        """Copy the source model's current weights into the existing arrays"""
+        with torch.no_grad():
+            for layer, w, b in zip(self.layers, self.weights, self.biases):
+                np.copyto(w, layer.weight.detach().cpu().numpy().T)
+                np.copyto(b, layer.bias.detach().cpu().numpy())
+
+    def _forward(self, x, hidden):
+        """Run the MLP on x writing every layer into the given buffers"""
+        last = len(self.weights) - 1
+        for i, (w, b, out) in enumerate(zip(self.weights, self.biases, hidden)):
+            np.matmul(x, w, out=out)
+            out += b
+            if i < last:
+                np.maximum(out, 0, out=out)  # ReLU
+            x = out
+        return x
+
+    def q_values(self, state):
+        """Return the Q-values of a single state (a view into an internal buffer)"""
+        self._x[:] = state
+        return self._forward(self._x, self._hidden)
+
+    def act(self, state):
+        """Return the greedy action for a single state"""
+        return int(self.q_values(state).argmax())
+
+    def q_values_batch(self, states):
+        """Return the (N, action_size) Q-values of a batch (a view into an internal buffer)"""
+        n = len(states)
+        self._ensure_batch_buffers(n)
+        x = self._batch_x[:n]
+        x[:] = states
+        return self._forward(x, [h[:n] for h in self._batch_hidden])
+
+    def act_batch(self, states):
+        """Return the greedy action for each row of a batch (a view into an internal buffer)"""
+        q = self.q_values_batch(states)
+        actions = self._batch_actions[:len(q)]
+        np.argmax(q, axis=1, out=actions)
+        return actions
+
+    def verify(self, states):
+        """Return the max absolute Q-value difference against the torch model in eval mode"""
+        was_training = self.model.training
+        self.model.eval()
+        with torch.no_grad():
+            expected = self.model(torch.as_tensor(np.asarray(states, dtype=np.float32))).cpu().numpy()
+        self.model.train(was_training)
+        return float(np.abs(self.q_values_batch(states) - expected).max())
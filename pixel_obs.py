@@ -0,0 +1,65 @@
+import numpy as np
+
+class PixelObservationWrapper:
+    """Replace FlappyBirdEnv's feature vector with stacked grayscale frames.
+
+    Every step the game is drawn offscreen, downsampled by taking every
+    stride-th pixel and converted to grayscale uint8 straight from the
+    surface. Observations are the last `stack` frames as a (stack, H, W)
+    uint8 array; after reset the stack is filled with the first frame.
+    """
+
+    def __init__(self, env, stride=4, stack=4):
+        from renderer import FlappyBirdRenderer
+
+        self.env = env
+        self.stride = stride
+        self.stack = stack
+        self.frame_shape = (-(-env.height // stride), -(-env.width // stride))
+        self.observation_shape = (stack,) + self.frame_shape
+
+        # Separate offscreen renderer so env.render() keeps working as usual
+        self.renderer = FlappyBirdRenderer(env, mode='rgb_array', use_assets=env.use_assets)
+
+        # Ring of the last `stack` frames, newest at self.head
+        self.frames = np.zeros(self.observation_shape, dtype=np.uint8)
+        self.head = 0
+
+    @property
+    def last_frame(self):
+        """The most recent grayscale frame"""
+        return self.frames[self.head]
+
+    def _capture(self):
+        """Draw the current state and write its frame into the next ring slot"""
+        self.head = (self.head + 1) % self.stack
+        self.renderer.draw()
+        self.renderer.grayscale(self.frames[self.head], self.stride)
+
+    def _observation(self):
+        """Return the stacked frames, oldest first"""
+        order = (np.arange(1, self.stack + 1) + self.head) % self.stack
+        return self.frames[order]
+
+    def reset(self):
+        """Reset the environment and return the initial frame stack"""
+        self.env.reset()
+        self.renderer.invalidate()
+        self._capture()
+        self.frames[:] = self.frames[self.head]
+        return self._observation()
+
+    def step(self, action):
+        """Take an action, return (frame stack, reward, done, info)"""
+        _, reward, done, info = self.env.step(action)
+        self._capture()
+        return self._observation(), reward, done, info
+
+    def render(self, mode=None):
+        """Render through the wrapped environment"""
+        return self.env.render(mode)
+
+    def close(self):
+        """Close the offscreen renderer and the environment"""
+        self.renderer.close()
+        self.env.close()
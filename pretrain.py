@@ -0,0 +1,104 @@
+import torch
+import torch.nn.functional as F
+import argparse
+import os
+import time
+from dqn_agent import DQNAgent
+from trajectories import TrajectoryDataset
+
+def pretrain(data_dir, output='models/flappy_dqn_pretrained.pt', mode='bc', epochs=5, batch_size=256,
+             min_score=None, top=None, hidden_size=64, learning_rate=0.0005, gamma=0.99,
+             target_update_steps=1000, seed=0, device=None):
+    """Train a DQNNetwork offline on a recorded trajectory dataset
+
+    mode='bc' is behavior cloning: the Q-values are trained as logits of the
+    recorded actions with a cross-entropy loss, best on episodes of a strong
+    policy (min_score / top pick the top-scoring ones). mode='dqn' runs the
+    agent's DQN update on the recorded transitions, with the target network
+    copied every target_update_steps updates. Minibatches are streamed from
+    disk (see TrajectoryDataset.iter_batches). Returns the agent; its weights
+    are saved to output.
+    """
+    if mode not in ('bc', 'dqn'):
+        raise ValueError(f"Invalid mode: {mode}. Use 'bc' or 'dqn'")
+    if device is None:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    torch.manual_seed(seed)
+
+    dataset = TrajectoryDataset(data_dir)
+    episodes = dataset.select(min_score=min_score, top=top)
+    steps = int(episodes['length'].sum())
+    if not steps:
+        raise ValueError(f"No recorded episodes in {data_dir} match the selection")
+    print(f"Pretraining ({mode}) on {len(episodes)} episodes, {steps:,} steps, "
+          f"mean score {episodes['score'].mean():.2f}")
+
+    agent = DQNAgent(dataset.state_size, 2, device=device, hidden_size=hidden_size, learning_rate=learning_rate,
+                     gamma=gamma, memory_size=1)
+    updates = 0
+    for epoch in range(epochs):
+        start = time.time()
+        loss_sum = 0.0
+        correct = 0
+        seen = 0
+        for batch in dataset.iter_batches(batch_size, episodes, seed=seed + epoch, drop_last=True):
+            states, actions, rewards, next_states, dones = (torch.from_numpy(a).to(device) for a in batch)
+            actions = actions.long()
+            q_values = agent.model(states)
+            if mode == 'bc':
+                loss = F.cross_entropy(q_values, actions)
+            else:
+                current_q_values = q_values.gather(1, actions.unsqueeze(1)).squeeze(1)
+                with torch.no_grad():
+                    max_next_q_values = agent.target_model(next_states).max(1)[0]
+                    target_q_values = rewards + (1 - dones.float()) * gamma * max_next_q_values
+                loss = F.mse_loss(current_q_values, target_q_values)
+
+            agent.optimizer.zero_grad()
+            loss.backward()
+            agent.optimizer.step()
+            updates += 1
+            if mode == 'dqn' and updates % target_update_steps == 0:
+                agent.update_target_model()
+
+            loss_sum += loss.item() * len(actions)
+            correct += (q_values.argmax(1) == actions).sum().item()
+            seen += len(actions)
+        print(f"Epoch {epoch + 1}/{epochs}: loss {loss_sum / max(seen, 1):.4f}, "
+              f"greedy action matches recorded {correct / max(seen, 1):.1%}, {time.time() - start:.1f}s")
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    agent.save(output, step=updates, source=f"pretrain-{mode}", dataset=os.path.abspath(data_dir))
+    return agent
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline pretraining / behavior cloning from recorded trajectories')
+    parser.add_argument('--data', type=str, required=True, help='trajectory dataset directory (see trajectories.py)')
+    parser.add_argument('--output', type=str, default='models/flappy_dqn_pretrained.pt', help='weights file to write')
+    parser.add_argument('--mode', type=str, default='bc', choices=['bc', 'dqn'], help='behavior cloning or offline DQN')
+    parser.add_argument('--epochs', type=int, default=5, help='passes over the selected episodes')
+    parser.add_argument('--batch-size', type=int, default=256, help='minibatch size')
+    parser.add_argument('--min-score', type=int, default=None, help='only use episodes scoring at least this')
+    parser.add_argument('--top', type=int, default=None, help='only use the N best-scoring episodes')
+    parser.add_argument('--hidden-size', type=int, default=64, help='MLP width')
+    parser.add_argument('--learning-rate', type=float, default=0.0005, help='Adam learning rate')
+    parser.add_argument('--seed', type=int, default=0, help='seed for initialization and shuffling')
+    parser.add_argument('--eval-episodes', type=int, default=20, help='seeded greedy episodes scoring the result (0 to skip)')
+    args = parser.parse_args()
+
+    pretrain(args.data, output=args.output, mode=args.mode, epochs=args.epochs, batch_size=args.batch_size,
+             min_score=args.min_score, top=args.top, hidden_size=args.hidden_size,
+             learning_rate=args.learning_rate, seed=args.seed)
+    print(f"Weights saved to: {args.output}")
+
+    if args.eval_episodes:
+        from evaluate import load_policy, run_episode, summarize
+        policy = load_policy(args.output)
+        scores, steps = zip(*(run_episode(policy, 1000000 + i, 10000) for i in range(args.eval_episodes)))
+        result = summarize(scores, steps, 10000)
+        print(f"Greedy evaluation: mean score {result['mean']:.2f}, median {result['median']:.1f}, max {result['max']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import json
+import os
+import time
+from collections import defaultdict
+
+class NullProfiler:
+    """Profiler stand-in used when profiling is disabled; every call is a no-op"""
+
+    enabled = False
+
+    def start(self):
+        return 0.0
+
+    def stop(self, phase, start):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def end_episode(self, episode, **extra):
+        pass
+
+    def close(self):
+        pass
+
+class TrainingProfiler:
+    """Low-overhead phase timer for the training loop.
+
+    Wrap a hot-path phase as `t = profiler.start()` ... `profiler.stop('phase', t)`
+    and count events with `profiler.count('name', n)`. end_episode() turns the
+    episode's timings and counters into a record; records are appended as JSON
+    lines to log_path every flush_every episodes.
+
+    On CUDA devices GPU work is asynchronous, so time is attributed to the
+    phase that waits for it rather than the one that launched it.
+    """
+
+    enabled = True
+
+    def __init__(self, log_path='logs/profile.jsonl', flush_every=10):
+        self.log_path = log_path
+        self.flush_every = flush_every
+        self.totals = defaultdict(float)  # Cumulative seconds per phase
+        self.counts = defaultdict(int)  # Cumulative event counts
+        self.episode_totals = defaultdict(float)
+        self.episode_counts = defaultdict(int)
+        self.pending = []
+
+        log_dir = os.path.dirname(log_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        self.start_time = time.perf_counter()
+        self.episode_start = self.start_time
+
+    def start(self):
+        """Return a start timestamp for stop()"""
+        return time.perf_counter()
+
+    def stop(self, phase, start):
+        """Add the time since start to phase"""
+        self.episode_totals[phase] += time.perf_counter() - start
+
+    def count(self, name, n=1):
+        """Increment the counter name by n"""
+        self.episode_counts[name] += n
+
+    def end_episode(self, episode, **extra):
+        """Close the current episode's record and flush periodically"""
+        now = time.perf_counter()
+        wall_time = now - self.episode_start
+        self.episode_start = now
+
+        for phase, seconds in self.episode_totals.items():
+            self.totals[phase] += seconds
+        for name, n in self.episode_counts.items():
+            self.counts[name] += n
+        elapsed = now - self.start_time
+
+        record = {
+            'episode': episode,
+            'wall_time': wall_time,
+            'phases': dict(self.episode_totals),
+            'counts': dict(self.episode_counts),
+            'env_steps_per_sec': self.episode_counts['env_steps'] / wall_time if wall_time > 0 else 0.0,
+            'updates_per_sec': self.episode_counts['gradient_updates'] / wall_time if wall_time > 0 else 0.0,
+            'cumulative': {
+                'elapsed': elapsed,
+                'phases': dict(self.totals),
+                'counts': dict(self.counts),
+                'env_steps_per_sec': self.counts['env_steps'] / elapsed if elapsed > 0 else 0.0,
+                'updates_per_sec': self.counts['gradient_updates'] / elapsed if elapsed > 0 else 0.0,
+            },
+        }
+        record.update(extra)
+        self.pending.append(record)
+        self.episode_totals.clear()
+        self.episode_counts.clear()
+
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append pending episode records to the log file"""
+        if not self.pending:
+            return
+        with open(self.log_path, 'a') as f:
+            for record in self.pending:
+                f.write(json.dumps(record) + '\n')
+        self.pending = []
+
+    def close(self):
+        """Flush remaining records"""
+        self.flush()
+
+    def summary(self):
+        """Return cumulative seconds per phase, largest first"""
+        return sorted(self.totals.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,148 @@
+import pygame
+import numpy as np
+import os
+import queue
+import threading
+
+try:
+    import imageio.v2 as imageio
+except ImportError:  # Only needed for GIF/MP4 output
+    imageio = None
+
+class FrameRecorder:
+    """Records rendered frames without stalling the game loop.
+
+    capture() copies the surface into a raw RGB buffer and puts it on a
+    bounded queue; a background thread encodes the frames of each episode
+    into an image sequence (format='png') or a single GIF/MP4 file
+    (format='gif' or 'mp4', requires imageio). Only every frame_stride-th
+    captured frame is kept. When the queue is full, frames are dropped
+    (counted in dropped_frames) unless block=True.
+    """
+
+    formats = ('png', 'gif', 'mp4')
+
+    def __init__(self, output_dir='recordings', format='png', frame_stride=1, fps=30,
+                 max_queue=512, block=False):
+        if format not in self.formats:
+            raise ValueError(f"Invalid format: {format}. Use one of {self.formats}")
+        if format != 'png' and imageio is None:
+            raise ImportError(f"Recording to {format} requires imageio (pip install imageio)")
+
+        self.output_dir = output_dir
+        self.format = format
+        self.frame_stride = frame_stride
+        self.fps = fps
+        self.block = block
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.frame_count = 0  # Frames offered to capture() in the current episode
+        self.dropped_frames = 0
+        self.episode = 0
+        self.recording = False
+
+        self.thread = threading.Thread(target=self._run, name='frame-writer', daemon=True)
+        self.thread.start()
+
+    def _put(self, item, drop_if_full=False):
+        """Queue an item for the writer thread, return False if it was dropped"""
+        if drop_if_full and not self.block:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.dropped_frames += 1
+                return False
+        else:
+            self.queue.put(item)
+        return True
+
+    def begin_episode(self, name=None):
+        """Start a new recording (a directory or video file per episode)"""
+        if self.recording and self.frame_count == 0 and name is None:
+            return  # Nothing captured yet, keep using the current episode
+        if self.recording:
+            self.end_episode()
+        self.episode += 1
+        self.frame_count = 0
+        self.recording = True
+        self._put(('begin', name or f"episode_{self.episode:04d}"))
+
+    def end_episode(self):
+        """Finish the current episode's recording"""
+        if self.recording:
+            self._put(('end',))
+            self.recording = False
+
+    def capture(self, surface):
+        """Grab a frame from a pygame surface if it falls on the frame stride"""
+        if not self.recording:
+            return
+        keep = self.frame_count % self.frame_stride == 0
+        self.frame_count += 1
+        if keep:
+            self._put(('frame', pygame.image.tobytes(surface, 'RGB'), surface.get_size()), drop_if_full=True)
+
+    def save_image(self, surface, path):
+        """Write a single screenshot of surface to path in the background"""
+        self._put(('image', pygame.image.tobytes(surface, 'RGB'), surface.get_size(), path))
+
+    def _open(self, name):
+        """Create the output for an episode, returns (imageio writer, frame directory)"""
+        if self.format == 'png':
+            frame_dir = os.path.join(self.output_dir, name)
+            os.makedirs(frame_dir, exist_ok=True)
+            return None, frame_dir
+        path = os.path.join(self.output_dir, f"{name}.{self.format}")
+        if self.format == 'gif':
+            return imageio.get_writer(path, mode='I', duration=1000 / self.fps, loop=0), None
+        return imageio.get_writer(path, fps=self.fps), None
+
+    def _run(self):
+        name = None  # Current episode, its output is created on the first frame
+        writer = None  # imageio writer for gif/mp4
+        frame_dir = None  # Output directory for png sequences
+        frame_idx = 0
+        while True:
+            item = self.queue.get()
+            try:
+                kind = item[0]
+                if kind == 'stop':
+                    return
+                elif kind == 'begin':
+                    name = item[1]
+                    frame_idx = 0
+                elif kind == 'end':
+                    if writer is not None:
+                        writer.close()
+                    name, writer, frame_dir = None, None, None
+                elif kind == 'frame' and name is not None:
+                    _, data, (width, height) = item
+                    if frame_idx == 0:
+                        writer, frame_dir = self._open(name)
+                    if writer is not None:
+                        writer.append_data(np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3))
+                    else:
+                        frame = pygame.image.frombuffer(data, (width, height), 'RGB')
+                        pygame.image.save(frame, os.path.join(frame_dir, f"frame_{frame_idx:06d}.png"))
+                    frame_idx += 1
+                elif kind == 'image':
+                    _, data, size, path = item
+                    pygame.image.save(pygame.image.frombuffer(data, size, 'RGB'), path)
+            except Exception as e:
+                print(f"Frame recorder error: {e}")
+                name = None  # Skip the rest of a failed episode
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Block until every queued frame has been written"""
+        self.queue.join()
+
+    def close(self):
+        """Finish the current episode, write all queued frames and stop the writer"""
+        self.end_episode()
+        self.queue.put(('stop',))
+        self.thread.join()
+        if self.dropped_frames:
+            print(f"Frame recorder dropped {self.dropped_frames} frames (queue full)")
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import re
+import time
+
+INDEX_NAME = 'checkpoint_index.json'
+
+class CheckpointRegistry:
+    """Sidecar index of the weight checkpoints in one directory.
+
+    Every DQNAgent.save() adds an entry (episode, training step, config hash,
+    epsilon, file size, timestamp) to directory/checkpoint_index.json, and
+    evaluate.py adds eval scores, so the best or latest checkpoint can be
+    picked without loading any weights. The index is small JSON, rewritten
+    atomically on every change.
+    """
+
+    def __init__(self, directory='models'):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self.checkpoints = {}  # File name -> metadata
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.checkpoints = json.load(f)['checkpoints']
+
+    @classmethod
+    def for_path(cls, path):
+        """The registry of the directory holding path"""
+        return cls(os.path.dirname(path) or '.')
+
+    def _write(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 1, 'checkpoints': self.checkpoints}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def register(self, path, **metadata):
+        """Add or replace the entry of a checkpoint file that was just written"""
+        name = os.path.basename(path)
+        stat = os.stat(path)
+        entry = {'file': name, 'size': stat.st_size, 'timestamp': stat.st_mtime}
+        entry.update(metadata)
+        self.checkpoints[name] = entry
+        self._write()
+        return entry
+
+    def update(self, path, **metadata):
+        """Merge metadata (e.g. eval scores) into an existing entry, registering the file if needed"""
+        name = os.path.basename(path)
+        if name not in self.checkpoints:
+            return self.register(path, **_metadata_from_name(name), **metadata)
+        self.checkpoints[name].update(metadata)
+        self._write()
+        return self.checkpoints[name]
+
+    def scan(self, pattern='*.pt'):
+        """Index checkpoint files saved before the registry existed, from their names only"""
+        import fnmatch
+        added = []
+        for name in sorted(os.listdir(self.directory)):
+            if fnmatch.fnmatch(name, pattern) and name not in self.checkpoints:
+                entry = {'file': name, 'size': os.path.getsize(os.path.join(self.directory, name)),
+                         'timestamp': os.path.getmtime(os.path.join(self.directory, name))}
+                entry.update(_metadata_from_name(name))
+                self.checkpoints[name] = entry
+                added.append(name)
+        if added:
+            self._write()
+        return added
+
+    def path(self, entry):
+        return os.path.join(self.directory, entry['file'])
+
+    def entries(self):
+        """Entries whose files still exist, oldest first"""
+        present = [e for e in self.checkpoints.values() if os.path.exists(self.path(e))]
+        return sorted(present, key=lambda e: (e.get('episode') if e.get('episode') is not None else -1,
+                                              e['timestamp']))
+
+    def latest(self):
+        """The entry with the highest episode (newest file on ties), or None"""
+        entries = self.entries()
+        return entries[-1] if entries else None
+
+    def best(self, metric='eval_mean'):
+        """The entry with the highest value of metric, or None if no entry has it"""
+        scored = [e for e in self.entries() if e.get(metric) is not None]
+        return max(scored, key=lambda e: (e[metric], e['timestamp'])) if scored else None
+
+    def select(self, query):
+        """Return the checkpoint path for 'best', 'best:<metric>', 'latest' or 'episode:<N>'"""
+        if query == 'latest':
+            entry = self.latest()
+        elif query == 'best' or query.startswith('best:'):
+            metric = query.split(':', 1)[1] if ':' in query else 'eval_mean'
+            entry = self.best(metric)
+            if entry is None:
+                raise LookupError(f"No checkpoint in {self.directory} has {metric}; run evaluate.py first")
+        elif query.startswith('episode:'):
+            episode = int(query.split(':', 1)[1])
+            matches = [e for e in self.entries() if e.get('episode') == episode]
+            entry = matches[-1] if matches else None
+        else:
+            raise ValueError(f"Invalid query: {query}. Use 'best', 'best:<metric>', 'latest' or 'episode:<N>'")
+        if entry is None:
+            raise LookupError(f"No checkpoint in {self.directory} matches {query}")
+        return self.path(entry)
+
+    def prune(self, keep_last=5, keep_best=3, metric='eval_mean', keep_names=('flappy_dqn_final.pt',),
+              config_hash=None, since=None, dry_run=False):
+        """Delete checkpoints outside the retention policy, return the removed file names
+
+        Files named in keep_names are never deleted; of the others, the
+        keep_last latest and the keep_best best by metric are kept. With
+        config_hash and/or since (a timestamp) set, only the checkpoints of
+        that config saved since then are considered, so one training run
+        leaves the checkpoints of others alone. Entries of missing files are
+        dropped from the index.
+        """
+        entries = [e for e in self.entries() if e['file'] not in keep_names
+                   and (config_hash is None or e.get('config_hash') == config_hash)
+                   and (since is None or e['timestamp'] >= since)]
+        keep = {e['file'] for e in entries[-keep_last:]} if keep_last else set()
+        scored = sorted((e for e in entries if e.get(metric) is not None), key=lambda e: e[metric], reverse=True)
+        keep.update(e['file'] for e in scored[:keep_best])
+
+        removed = [e['file'] for e in entries if e['file'] not in keep]
+        if dry_run:
+            return removed
+        for name in removed:
+            os.remove(os.path.join(self.directory, name))
+        self.checkpoints = {name: e for name, e in self.checkpoints.items()
+                            if name not in removed and os.path.exists(self.path(e))}
+        self._write()
+        return removed
+
+def _metadata_from_name(name):
+    """Guess the episode from a checkpoint file name like flappy_dqn_episode_1200.pt"""
+    match = re.search(r'(\d+)\.pt$', name)
+    return {'episode': int(match.group(1)) if match else None}
+
+def print_entries(entries):
+    print(f"{'Checkpoint':<36} {'Episode':>8} {'Step':>9} {'Epsilon':>8} {'Eval':>7} {'Size':>8}  Saved")
+    for e in entries:
+        episode = e.get('episode')
+        step = e.get('step')
+        epsilon = e.get('epsilon')
+        score = e.get('eval_mean')
+        print(f"{e['file']:<36} {episode if episode is not None else '-':>8} {step if step is not None else '-':>9} "
+              f"{f'{epsilon:.3f}' if epsilon is not None else '-':>8} {f'{score:.2f}' if score is not None else '-':>7} "
+              f"{e['size'] / 1024:>6.0f}KB  {time.strftime('%Y-%m-%d %H:%M', time.localtime(e['timestamp']))}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Query and prune the checkpoint index of a models directory')
+    parser.add_argument('command', choices=['list', 'scan', 'select', 'prune'])
+    parser.add_argument('query', nargs='?', default='best', help="for select: best, best:<metric>, latest or episode:<N>")
+    parser.add_argument('--dir', type=str, default='models', help='checkpoint directory')
+    parser.add_argument('--keep-last', type=int, default=5, help='prune: latest checkpoints to keep')
+    parser.add_argument('--keep-best', type=int, default=3, help='prune: best evaluated checkpoints to keep')
+    parser.add_argument('--config-hash', type=str, default=None, help='prune: only checkpoints of this config')
+    parser.add_argument('--dry-run', action='store_true', help='prune: only list what would be deleted')
+    args = parser.parse_args()
+
+    registry = CheckpointRegistry(args.dir)
+    if args.command == 'list':
+        print_entries(registry.entries())
+    elif args.command == 'scan':
+        added = registry.scan()
+        print(f"Indexed {len(added)} checkpoints from their file names")
+    elif args.command == 'select':
+        print(registry.select(args.query))
+    else:
+        removed = registry.prune(keep_last=args.keep_last, keep_best=args.keep_best,
+                                 config_hash=args.config_hash, dry_run=args.dry_run)
+        print(f"{'Would remove' if args.dry_run else 'Removed'} {len(removed)} checkpoints")
+        for name in removed:
+            print(f"  {name}")
+
+if __name__ == "__main__":
+    main()
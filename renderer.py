@@ -0,0 +1,270 @@
+import pygame
+import numpy as np
+import os
+
+class FlappyBirdRenderer:
+    """Pygame renderer for a FlappyBirdEnv.
+
+    mode='human' opens a window and limits the frame rate, mode='rgb_array'
+    draws to an offscreen surface and returns the frame as a NumPy array.
+
+    Static scenery is composed once into a background surface, the flipped
+    pipe, bird rotations (bucketed to angle_step degrees) and score text are
+    cached, and each frame only restores and redraws the regions covered by
+    pipes, the bird and the score in the previous and current frame.
+    """
+
+    def __init__(self, env, mode='human', use_assets=True, angle_step=3):
+        self.env = env
+        self.mode = mode
+        self.width = env.width
+        self.height = env.height
+        self.quit_requested = False
+
+        # Initialize pygame
+        pygame.init()
+        if self.mode == 'human':
+            self.screen = pygame.display.set_mode((self.width, self.height))
+            pygame.display.set_caption('Flappy Bird RL')
+            self.clock = pygame.time.Clock()
+        else:
+            self.screen = pygame.Surface((self.width, self.height))
+            self.clock = None
+        self.font = pygame.font.Font(None, 36)
+
+        # Create assets directory if it doesn't exist
+        if not os.path.exists('assets'):
+            os.makedirs('assets')
+            print("Please download and place the following files in the 'assets' directory:")
+            print("- background.png (game background)")
+            print("- bird1.png, bird2.png, bird3.png (bird animation frames)")
+            print("- pipe.png (pipe obstacle)")
+            print("- base.png (ground)")
+
+        # Load images if assets are available and use_assets is True
+        self.bg_color = (135, 206, 250)  # Sky blue (fallback)
+        self.bird_color = (255, 255, 0)  # Yellow (fallback)
+        self.pipe_color = (0, 128, 0)  # Green (fallback)
+        self.base_color = (222, 216, 149)  # Tan (fallback)
+
+        self.bird_frame_idx = 0
+        self.animation_time = 0
+
+        if use_assets:
+            try:
+                # Try to load assets
+                self.bg_img = self.load_image('assets/background.png')
+                self.base_img = self.load_image('assets/base.png')
+                self.pipe_img = self.load_image('assets/pipe.png')
+
+                # Load bird animation frames
+                self.bird_frames = [
+                    self.load_image('assets/bird1.png'),
+                    self.load_image('assets/bird2.png'),
+                    self.load_image('assets/bird3.png')
+                ]
+
+                # Check if all assets loaded successfully
+                self.assets_loaded = bool(self.bg_img and self.base_img and
+                                          self.pipe_img and all(self.bird_frames))
+
+                if not self.assets_loaded:
+                    print("Some assets failed to load. Using simple graphics instead.")
+                else:
+                    print("Assets loaded successfully!")
+
+            except Exception as e:
+                print(f"Error loading assets: {e}")
+                self.assets_loaded = False
+        else:
+            self.assets_loaded = False
+
+        self.base_y = self.height - 70  # Position of the ground
+        self.angle_step = angle_step
+        self._bird_cache = {}  # (frame index, angle bucket) -> rotated bird
+        self._score_value = None
+        self._score_surface = None
+        self._dirty_rects = []  # Regions drawn over in the previous frame
+        self._full_redraw = True
+        self._gray_buffers = None  # Scratch buffers for grayscale()
+
+        if self.assets_loaded:
+            self.top_pipe_img = pygame.transform.flip(self.pipe_img, False, True)
+        self.background = self._build_background()
+
+    def _build_background(self):
+        """Compose sky and ground into one surface, drawn once"""
+        background = pygame.Surface((self.width, self.height))
+        if self.assets_loaded and self.bg_img:
+            # Tile the background if needed
+            for i in range(0, self.width, self.bg_img.get_width()):
+                background.blit(self.bg_img, (i, 0))
+        else:
+            background.fill(self.bg_color)
+
+        if self.assets_loaded and self.base_img:
+            for i in range(0, self.width, self.base_img.get_width()):
+                background.blit(self.base_img, (i, self.base_y))
+        else:
+            pygame.draw.rect(background, self.base_color, pygame.Rect(0, self.base_y, self.width, 70))
+        return background
+
+    def _rotated_bird(self, frame_idx, velocity):
+        """Return the bird frame rotated for velocity, from the rotation cache"""
+        angle = max(-90, min(90, -velocity * 2))  # Simple rotation based on velocity
+        bucket = int(round(angle / self.angle_step))
+        key = (frame_idx, bucket)
+        if key not in self._bird_cache:
+            self._bird_cache[key] = pygame.transform.rotate(self.bird_frames[frame_idx], bucket * self.angle_step)
+        return self._bird_cache[key]
+
+    def _score_text(self, score):
+        """Return the score text surface, re-rendered only when the score changes"""
+        if score != self._score_value:
+            self._score_value = score
+            self._score_surface = self.font.render(f'Score: {score}', True, (255, 255, 255))
+        return self._score_surface
+
+    def invalidate(self):
+        """Force the next frame to redraw the whole screen"""
+        self._full_redraw = True
+
+    def load_image(self, path):
+        """Load an image and return the surface, or None if it fails"""
+        try:
+            if os.path.exists(path):
+                image = pygame.image.load(path)
+                # convert_alpha needs a display mode, offscreen surfaces keep the raw image
+                if pygame.display.get_surface() is not None:
+                    image = image.convert_alpha()
+                return image
+            else:
+                print(f"Warning: Asset not found: {path}")
+                return None
+        except pygame.error:
+            print(f"Failed to load image: {path}")
+            return None
+
+    def draw(self):
+        """Draw the environment's current state onto self.screen, return the changed rects"""
+        env = self.env
+        screen_rect = self.screen.get_rect()
+
+        # Update bird animation
+        self.animation_time += 1
+        if self.animation_time % 5 == 0:  # Change frame every 5 ticks
+            self.bird_frame_idx = (self.bird_frame_idx + 1) % 3
+
+        # Restore the background under everything drawn last frame
+        if self._full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self._dirty_rects:
+                self.screen.blit(self.background, rect, rect)
+        drawn = []
+
+        # Draw pipes, clipped so the ground stays on top of them
+        self.screen.set_clip(pygame.Rect(0, 0, self.width, self.base_y))
+        for x, top_height, bottom_y, _ in env.iter_pipes():
+            if self.assets_loaded:
+                # Top pipe (flipped)
+                self.screen.blit(self.top_pipe_img, (x, top_height - self.top_pipe_img.get_height()))
+
+                # Bottom pipe
+                self.screen.blit(self.pipe_img, (x, bottom_y))
+            else:
+                # Draw simple rectangles if no assets
+                # Top pipe
+                pygame.draw.rect(
+                    self.screen,
+                    self.pipe_color,
+                    pygame.Rect(x, 0, env.pipe_width, top_height)
+                )
+                # Bottom pipe
+                pygame.draw.rect(
+                    self.screen,
+                    self.pipe_color,
+                    pygame.Rect(x, bottom_y, env.pipe_width, self.height - bottom_y)
+                )
+            # Pipe column, widened by a pixel for fractional positions
+            drawn.append(pygame.Rect(int(x) - 1, 0, env.pipe_width + 2, self.base_y))
+        self.screen.set_clip(None)
+
+        # Draw bird
+        if self.assets_loaded:
+            rotated_bird = self._rotated_bird(self.bird_frame_idx, env.bird_velocity)
+
+            # Calculate new rect to maintain center position after rotation
+            bird_rect = rotated_bird.get_rect(center=(env.bird_x + env.bird_width/2,
+                                                      env.bird_y + env.bird_height/2))
+            self.screen.blit(rotated_bird, bird_rect.topleft)
+        else:
+            # Draw simple rectangle if no assets
+            bird_rect = pygame.Rect(env.bird_x, env.bird_y, env.bird_width, env.bird_height)
+            pygame.draw.rect(self.screen, self.bird_color, bird_rect)
+        drawn.append(bird_rect.inflate(2, 2))
+
+        # Draw score
+        score_text = self._score_text(env.score)
+        self.screen.blit(score_text, (10, 10))
+        drawn.append(score_text.get_rect(topleft=(10, 10)))
+
+        drawn = [rect.clip(screen_rect) for rect in drawn]
+        if self._full_redraw:
+            updated = [screen_rect]
+        else:
+            updated = self._dirty_rects + drawn
+        self._dirty_rects = drawn
+        self._full_redraw = False
+        return updated
+
+    def render(self):
+        """Draw the environment's current state, return an RGB array in 'rgb_array' mode"""
+        updated = self.draw()
+
+        if self.mode == 'rgb_array':
+            # surfarray is indexed (x, y), transpose to (height, width, 3)
+            return np.transpose(pygame.surfarray.array3d(self.screen), (1, 0, 2))
+
+        pygame.display.update(updated)
+        self.clock.tick(30)
+
+        # Check for quit event
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.quit_requested = True
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self._full_redraw = True
+        return None
+
+    def grayscale(self, out, stride=4):
+        """Write a downsampled grayscale copy of the screen into out
+
+        Reads the screen through surfarray views (no RGB copy) taking every
+        stride-th pixel; out must be a uint8 array of shape
+        (height // stride, width // stride) (rounded up).
+        """
+        if self._gray_buffers is None or self._gray_buffers[0].shape != out.shape:
+            self._gray_buffers = (np.empty(out.shape, dtype=np.uint16), np.empty(out.shape, dtype=np.uint16))
+        total, channel = self._gray_buffers
+
+        # Integer luma weights (77 + 150 + 29 = 256), views are (x, y) so transpose to (y, x)
+        red = pygame.surfarray.pixels_red(self.screen)
+        np.multiply(red[::stride, ::stride].T, np.uint16(77), out=total)
+        del red
+        green = pygame.surfarray.pixels_green(self.screen)
+        np.multiply(green[::stride, ::stride].T, np.uint16(150), out=channel)
+        total += channel
+        del green
+        blue = pygame.surfarray.pixels_blue(self.screen)
+        np.multiply(blue[::stride, ::stride].T, np.uint16(29), out=channel)
+        total += channel
+        del blue  # Release the surface lock
+
+        np.right_shift(total, 8, out=total)
+        np.copyto(out, total, casting='unsafe')
+        return out
+
+    def close(self):
+        """Close the renderer"""
+        pygame.quit()
@@ -0,0 +1,561 @@
+import numpy as np
+import torch
+import json
+import os
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions stored in preallocated arrays.
+
+    States are kept as float32, actions as int8 and dones as bool, so inserting
+    is O(1) and sampling is a vectorized gather whose cost does not depend on
+    capacity.
+
+    n_step_batch() turns sampled transitions into n-step transitions. This
+    relies on add() being called in episode order by a single environment;
+    transitions stored with add_batch() are each treated as their own
+    episode, so they always yield 1-step returns.
+    """
+
+    def __init__(self, capacity, state_size, pin_memory=False):
+        self.capacity = capacity
+        self.state_size = state_size
+
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.episode_ends = np.zeros(capacity, dtype=bool)  # Last transition of an episode (done or truncated)
+
+        self.pos = 0  # Next slot to write
+        self.size = 0  # Number of stored transitions
+
+        # Pinned host memory only helps (and only works) with a CUDA device
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self._staging = {}
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """Store one transition, overwriting the oldest when full"""
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.episode_ends[i] = done
+
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def end_episode(self):
+        """Mark the newest transition as the end of an episode that was cut off without done"""
+        if self.size:
+            self.episode_ends[(self.pos - 1) % self.capacity] = True
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions, e.g. one step of a VecFlappyBirdEnv"""
+        n = len(actions)
+        if n > self.capacity:
+            # Only the newest transitions would survive anyway
+            states, actions, rewards, next_states, dones = (
+                a[-self.capacity:] for a in (states, actions, rewards, next_states, dones))
+            n = self.capacity
+
+        idx = (self.pos + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.episode_ends[idx] = True  # Neighbouring slots may come from different environments
+
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def state_dict(self):
+        """Return a copy of the stored transitions and write position"""
+        n = self.size
+        return {
+            'capacity': self.capacity,
+            'pos': self.pos,
+            'size': n,
+            'states': self.states[:n].copy(),
+            'actions': self.actions[:n].copy(),
+            'rewards': self.rewards[:n].copy(),
+            'next_states': self.next_states[:n].copy(),
+            'dones': self.dones[:n].copy(),
+            'episode_ends': self.episode_ends[:n].copy(),
+        }
+
+    def load_state_dict(self, state):
+        """Restore transitions saved by state_dict() into a buffer of the same capacity"""
+        if state['capacity'] != self.capacity:
+            raise ValueError(f"Replay capacity mismatch: saved {state['capacity']}, buffer {self.capacity}")
+        n = state['size']
+        self.states[:n] = state['states']
+        self.actions[:n] = state['actions']
+        self.rewards[:n] = state['rewards']
+        self.next_states[:n] = state['next_states']
+        self.dones[:n] = state['dones']
+        self.episode_ends[:n] = state.get('episode_ends', state['dones'])
+        self.pos = state['pos']
+        self.size = n
+
+    def sample_indices(self, batch_size):
+        """Draw batch_size uniformly random indices of stored transitions"""
+        return np.random.randint(0, self.size, size=batch_size)
+
+    def sample(self, batch_size):
+        """Return (states, actions, rewards, next_states, dones) NumPy arrays"""
+        idx = self.sample_indices(batch_size)
+        return (self.states[idx], self.actions[idx], self.rewards[idx],
+                self.next_states[idx], self.dones[idx])
+
+    def sample_tensors(self, batch_size, device="cpu"):
+        """Sample a batch and return it as torch tensors on device
+
+        With pin_memory=True the batch is gathered straight into reusable
+        pinned tensors and copied to the GPU asynchronously.
+        """
+        return self.gather_tensors(self.sample_indices(batch_size), device)
+
+    def gather_tensors(self, idx, device="cpu"):
+        """Return the transitions at idx as torch tensors on device"""
+        if not self.pin_memory:
+            batch = (torch.from_numpy(self.states[idx]), torch.from_numpy(self.actions[idx]),
+                     torch.from_numpy(self.rewards[idx]), torch.from_numpy(self.next_states[idx]),
+                     torch.from_numpy(self.dones[idx]))
+            states, actions, rewards, next_states, dones = (t.to(device) for t in batch)
+        else:
+            staging = self._get_staging(len(idx))
+            # Wait until the previous asynchronous copy out of these buffers is done
+            if staging['copied'] is not None:
+                staging['copied'].synchronize()
+            np.take(self.states, idx, axis=0, out=staging['states'][1])
+            np.take(self.actions, idx, out=staging['actions'][1])
+            np.take(self.rewards, idx, out=staging['rewards'][1])
+            np.take(self.next_states, idx, axis=0, out=staging['next_states'][1])
+            np.take(self.dones, idx, out=staging['dones'][1])
+            states, actions, rewards, next_states, dones = (
+                staging[key][0].to(device, non_blocking=True)
+                for key in ('states', 'actions', 'rewards', 'next_states', 'dones'))
+            staging['copied'] = torch.cuda.Event()
+            staging['copied'].record()
+
+        # Compact storage dtypes are widened on the device
+        return states, actions.long(), rewards, next_states, dones.float()
+
+    def n_step_batch(self, idx, n_step, gamma):
+        """Return n-step transitions starting at idx as NumPy arrays
+
+        Returns (states, actions, returns, next_states, dones, discounts):
+        returns are the discounted reward sums over up to n_step transitions,
+        stopping after the end of the episode or at the newest transition,
+        next_states/dones are those of the last transition used and
+        discounts is gamma ** (transitions used), the factor for bootstrapping
+        from next_states.
+        """
+        offsets = np.arange(n_step)
+        rows = (idx[:, None] + offsets) % self.capacity
+        available = (self.pos - idx - 1) % self.capacity + 1  # Transitions from idx up to the newest
+
+        # Step k is used if no episode ended in the steps before it
+        ends = self.episode_ends[rows]
+        used = np.ones(rows.shape, dtype=bool)
+        used[:, 1:] = ~np.logical_or.accumulate(ends[:, :-1], axis=1)
+        used &= offsets < available[:, None]
+        counts = used.sum(axis=1)
+
+        discounts = (gamma ** offsets).astype(np.float32)
+        returns = np.where(used, self.rewards[rows], 0.0).astype(np.float32) @ discounts
+        last = rows[np.arange(len(idx)), counts - 1]
+        return (self.states[idx], self.actions[idx], returns, self.next_states[last], self.dones[last],
+                (gamma ** counts).astype(np.float32))
+
+    def gather_n_step_tensors(self, idx, n_step, gamma, device="cpu"):
+        """n_step_batch() as torch tensors on device, with long actions and float dones"""
+        batch = self.n_step_batch(idx, n_step, gamma)
+        states, actions, returns, next_states, dones, discounts = (torch.from_numpy(a).to(device) for a in batch)
+        return states, actions.long(), returns, next_states, dones.float(), discounts
+
+    def _get_staging(self, batch_size):
+        """Return pinned (tensor, NumPy view) pairs for a batch size, allocating once"""
+        if batch_size not in self._staging:
+            def pinned(shape, dtype):
+                tensor = torch.empty(shape, dtype=dtype).pin_memory()
+                return tensor, tensor.numpy()
+            self._staging[batch_size] = {
+                'states': pinned((batch_size, self.state_size), torch.float32),
+                'actions': pinned((batch_size,), torch.int8),
+                'rewards': pinned((batch_size,), torch.float32),
+                'next_states': pinned((batch_size, self.state_size), torch.float32),
+                'dones': pinned((batch_size,), torch.bool),
+                'copied': None,
+            }
+        return self._staging[batch_size]
+
+
+class DiskReplayBuffer(ReplayBuffer):
+    """ReplayBuffer whose arrays are memory-mapped .npy files in a directory.
+
+    Capacity is limited by disk space rather than RAM: the OS pages
+    transitions in and out as they are written and gathered. States are
+    stored as float32 or float16 (half the size, about 3 significant
+    digits), actions as uint8 and dones as one byte each; gathered batches
+    are widened to float32.
+
+    Opening a directory that already holds a buffer reopens it with its
+    stored transitions, so a later run can warm-start from the experience
+    of earlier ones. The write position is saved in meta.json by flush();
+    transitions added after the last flush are ignored when reopening.
+    """
+
+    FIELDS = ('states', 'actions', 'rewards', 'next_states', 'dones', 'episode_ends')
+
+    def __init__(self, directory, capacity, state_size, state_dtype='float32', pin_memory=False):
+        if np.dtype(state_dtype) not in (np.float16, np.float32):
+            raise ValueError(f"Invalid state_dtype: {state_dtype}. Use 'float16' or 'float32'")
+        self.directory = directory
+        self.capacity = capacity
+        self.state_size = state_size
+        self.state_dtype = np.dtype(state_dtype).name
+        self.meta_path = os.path.join(directory, 'meta.json')
+        dtypes = {'states': self.state_dtype, 'actions': np.uint8, 'rewards': np.float32,
+                  'next_states': self.state_dtype, 'dones': bool, 'episode_ends': bool}
+
+        self.pos = 0
+        self.size = 0
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            saved = (meta['capacity'], meta['state_size'], meta['state_dtype'])
+            if saved != (capacity, state_size, self.state_dtype):
+                raise ValueError(f"Replay directory {directory} holds capacity {saved[0]}, state size "
+                                 f"{saved[1]}, {saved[2]} states; requested {capacity}, {state_size}, "
+                                 f"{self.state_dtype}")
+            for field in self.FIELDS:
+                setattr(self, field, np.load(os.path.join(directory, f"{field}.npy"), mmap_mode='r+'))
+            self.pos = meta['pos']
+            self.size = meta['size']
+        else:
+            os.makedirs(directory, exist_ok=True)
+            for field in self.FIELDS:
+                shape = (capacity, state_size) if field in ('states', 'next_states') else (capacity,)
+                # Created sparse, disk blocks are only allocated as slots are written
+                setattr(self, field, np.lib.format.open_memmap(os.path.join(directory, f"{field}.npy"),
+                                                               mode='w+', dtype=dtypes[field], shape=shape))
+            self.flush()
+
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+
+    def flush(self, pos=None, size=None):
+        """Write pending pages to disk and record the write position
+
+        pos and size default to the current ones; pass those of a
+        state_dict() snapshot to persist it from a background thread while
+        transitions are still being added.
+        """
+        for field in self.FIELDS:
+            getattr(self, field).flush()
+        meta = {'capacity': self.capacity, 'state_size': self.state_size, 'state_dtype': self.state_dtype,
+                'pos': self.pos if pos is None else pos, 'size': self.size if size is None else size}
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def state_dict(self):
+        """Return a reference to the directory and the write position instead of a copy of the transitions
+
+        Nothing is flushed here, the msync of a large buffer would stall
+        training; call flush(state['pos'], state['size']) off the training
+        thread (e.g. through AsyncCheckpointWriter's before_write).
+        """
+        return {'capacity': self.capacity, 'directory': self.directory, 'pos': self.pos, 'size': self.size}
+
+    def load_state_dict(self, state):
+        """Restore a ReplayBuffer's copied transitions; a DiskReplayBuffer reference is a no-op
+
+        The reopened directory already holds the referenced transitions and
+        any added after the checkpoint was taken.
+        """
+        if 'states' in state:
+            super().load_state_dict(state)
+
+    def sample(self, batch_size):
+        """Return (states, actions, rewards, next_states, dones) NumPy arrays with float32 states"""
+        idx = self.sample_indices(batch_size)
+        return (self.states[idx].astype(np.float32), self.actions[idx], self.rewards[idx],
+                self.next_states[idx].astype(np.float32), self.dones[idx])
+
+    def gather_tensors(self, idx, device="cpu"):
+        """Return the transitions at idx as torch tensors on device"""
+        batch = [torch.from_numpy(a) for a in (self.states[idx].astype(np.float32), self.actions[idx],
+                                               self.rewards[idx], self.next_states[idx].astype(np.float32),
+                                               self.dones[idx])]
+        if self.pin_memory:
+            batch = [t.pin_memory() for t in batch]
+        states, actions, rewards, next_states, dones = (t.to(device, non_blocking=self.pin_memory) for t in batch)
+        return states, actions.long(), rewards, next_states, dones.float()
+
+    def n_step_batch(self, idx, n_step, gamma):
+        """ReplayBuffer.n_step_batch() with float32 states"""
+        states, actions, returns, next_states, dones, discounts = super().n_step_batch(idx, n_step, gamma)
+        return states.astype(np.float32), actions, returns, next_states.astype(np.float32), dones, discounts
+
+
+class SumTree:
+    """Array-backed binary sum tree for O(log n) proportional sampling.
+
+    Leaves hold priorities, every internal node holds the sum of its children
+    and the root (index 1) holds the total. Updates and sampling work on whole
+    batches of indices, one tree level at a time.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.leaf_offset = 2 ** self.depth
+        self.tree = np.zeros(2 * self.leaf_offset, dtype=np.float64)
+
+    def total(self):
+        """Sum of all priorities"""
+        return self.tree[1]
+
+    def update(self, idx, priorities):
+        """Set the priorities of data indices idx and refresh their ancestors"""
+        nodes = np.asarray(idx) + self.leaf_offset
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def get(self, idx):
+        """Return the priorities of data indices idx"""
+        return self.tree[np.asarray(idx) + self.leaf_offset]
+
+    def find(self, values):
+        """Return the data index whose cumulative priority range contains each value"""
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values -= left_sum * go_right
+            nodes = left + go_right
+        return nodes - self.leaf_offset
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Replay buffer sampling transitions in proportion to priority ** alpha.
+
+    New transitions get the largest priority seen so far, so every transition
+    is replayed at least once before its TD error is known. Sampling returns
+    importance-sampling weights that correct for the non-uniform sampling.
+    """
+
+    def __init__(self, capacity, state_size, alpha=0.6, pin_memory=False, priority_eps=1e-6):
+        super().__init__(capacity, state_size, pin_memory=pin_memory)
+        self.alpha = alpha
+        self.priority_eps = priority_eps  # Keeps zero-error transitions sampleable
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def add(self, state, action, reward, next_state, done):
+        """Store one transition with maximal priority"""
+        i = self.pos
+        super().add(state, action, reward, next_state, done)
+        self.tree.update([i], self.max_priority ** self.alpha)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions with maximal priority"""
+        n = min(len(actions), self.capacity)
+        idx = (self.pos + np.arange(n)) % self.capacity
+        super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(idx, self.max_priority ** self.alpha)
+
+    def sample_indices(self, batch_size):
+        """Draw batch_size indices with stratified proportional sampling"""
+        segment = self.tree.total() / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def state_dict(self):
+        """Return a copy of the stored transitions and their priorities"""
+        state = super().state_dict()
+        state['priorities'] = self.tree.get(np.arange(self.size))
+        state['max_priority'] = self.max_priority
+        state['alpha'] = self.alpha
+        return state
+
+    def load_state_dict(self, state):
+        """Restore transitions and priorities saved by state_dict()"""
+        super().load_state_dict(state)
+        self.tree.tree[:] = 0
+        if self.size > 0:
+            self.tree.update(np.arange(self.size), state.get('priorities', self.max_priority ** self.alpha))
+        self.max_priority = state.get('max_priority', self.max_priority)
+        self.alpha = state.get('alpha', self.alpha)
+
+    def sample_prioritized(self, batch_size, beta=0.4):
+        """Return (indices, importance-sampling weights) for a prioritized batch"""
+        idx = self.sample_indices(batch_size)
+        probs = self.tree.get(idx) / self.tree.total()
+        weights = (self.size * probs) ** (-beta)
+        weights /= weights.max()
+        return idx, weights.astype(np.float32)
+
+    def update_priorities(self, idx, td_errors):
+        """Set priorities of sampled transitions from their absolute TD errors"""
+        priorities = np.abs(td_errors) + self.priority_eps
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update(idx, priorities ** self.alpha)
+
+
+class FrameReplayBuffer:
+    """Replay memory for stacked-frame observations that stores every frame once.
+
+    add() takes the same (state, action, reward, next_state, done) arguments as
+    ReplayBuffer but keeps only the newest frame of state, so consecutive
+    transitions share frames. Stacks are rebuilt by index when sampling,
+    repeating an episode's first frame where the stack would reach back into
+    the previous episode (matching PixelObservationWrapper.reset()).
+    Episodes are expected to end with done=True; call end_episode() when one
+    is cut short instead, its last transition is then never sampled since its
+    true next frame isn't stored.
+    """
+
+    def __init__(self, capacity, frame_shape, stack=4, pin_memory=False):
+        self.capacity = capacity
+        self.frame_shape = tuple(frame_shape)
+        self.stack = stack
+
+        self.frames = np.zeros((capacity,) + self.frame_shape, dtype=np.uint8)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.firsts = np.zeros(capacity, dtype=bool)  # Frame starts an episode
+        self.episode_ends = np.zeros(capacity, dtype=bool)  # Last transition of an episode (done or truncated)
+
+        self.pos = 0
+        self.size = 0
+        self._episode_start = True
+        self._offsets = np.arange(-stack + 1, 1)
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """Store a transition, keeping only the newest frame of state"""
+        i = self.pos
+        self.frames[i] = state[-1]
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.dones[i] = done
+        self.episode_ends[i] = done
+        self.firsts[i] = self._episode_start
+        self._episode_start = bool(done)
+
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def end_episode(self):
+        """Mark the newest transition as cut off and the next added frame as a new episode's start"""
+        if self.size:
+            self.episode_ends[(self.pos - 1) % self.capacity] = True
+        self._episode_start = True
+
+    def state_dict(self):
+        """Return a copy of the stored frames and write position"""
+        n = self.size
+        return {
+            'capacity': self.capacity,
+            'pos': self.pos,
+            'size': n,
+            'episode_start': self._episode_start,
+            'frames': self.frames[:n].copy(),
+            'actions': self.actions[:n].copy(),
+            'rewards': self.rewards[:n].copy(),
+            'dones': self.dones[:n].copy(),
+            'firsts': self.firsts[:n].copy(),
+            'episode_ends': self.episode_ends[:n].copy(),
+        }
+
+    def load_state_dict(self, state):
+        """Restore frames saved by state_dict() into a buffer of the same capacity"""
+        if state['capacity'] != self.capacity:
+            raise ValueError(f"Replay capacity mismatch: saved {state['capacity']}, buffer {self.capacity}")
+        n = state['size']
+        for key in ('frames', 'actions', 'rewards', 'dones', 'firsts'):
+            getattr(self, key)[:n] = state[key]
+        self.episode_ends[:n] = state.get('episode_ends', state['dones'])
+        self.pos = state['pos']
+        self.size = n
+        self._episode_start = state['episode_start']
+
+    def _valid(self, idx):
+        """Mask of indices whose state and next state can be rebuilt"""
+        latest = (self.pos - 1) % self.capacity
+        # The next frame of the newest transition hasn't been stored yet, and
+        # that of a truncated episode's last one was never stored
+        valid = ((idx != latest) | self.dones[idx]) & ~(self.episode_ends[idx] & ~self.dones[idx])
+        if self.size == self.capacity:
+            # Stacks of the oldest frames may reach into overwritten data
+            age = (idx - self.pos) % self.capacity
+            valid &= (age >= self.stack - 1) | self._has_start(idx, age)
+        return valid
+
+    def _has_start(self, idx, age):
+        """Whether an episode start lies within the stored part of each stack"""
+        has_start = np.zeros(len(idx), dtype=bool)
+        for back in range(self.stack - 1):
+            has_start |= (back <= age) & self.firsts[(idx - back) % self.capacity]
+        return has_start
+
+    def _stack_indices(self, idx):
+        """(N, stack) frame indices of the stacks ending at idx"""
+        window = (idx[:, None] + self._offsets[None, :]) % self.capacity
+        starts = self.firsts[window]
+        starts[:, 0] = True  # Columns before the last episode start repeat it
+        last_start = self.stack - 1 - np.argmax(starts[:, ::-1], axis=1)
+        cols = np.maximum(np.arange(self.stack)[None, :], last_start[:, None])
+        return window[np.arange(len(idx))[:, None], cols]
+
+    def sample_indices(self, batch_size):
+        """Draw batch_size uniformly random indices of valid transitions
+
+        Raises ValueError if no stored transition is valid yet (e.g. only
+        one-step episodes, or just after the buffer wrapped around).
+        """
+        chosen = np.empty(0, dtype=np.int64)
+        attempts = 0
+        while len(chosen) < batch_size:
+            candidates = np.random.randint(0, self.size, size=2 * batch_size)
+            chosen = np.concatenate([chosen, candidates[self._valid(candidates)]])
+            attempts += 1
+            # Only check every index once random draws keep coming up empty
+            if attempts == 100 and not len(chosen) and not self._valid(np.arange(self.size)).any():
+                raise ValueError(f"None of the {self.size} stored transitions can be sampled yet")
+        return chosen[:batch_size]
+
+    def sample(self, batch_size):
+        """Return (states, actions, rewards, next_states, dones) with uint8 frame stacks"""
+        idx = self.sample_indices(batch_size)
+        next_idx = (idx + 1) % self.capacity
+        return (self.frames[self._stack_indices(idx)], self.actions[idx], self.rewards[idx],
+                self.frames[self._stack_indices(next_idx)], self.dones[idx])
+
+    def sample_tensors(self, batch_size, device="cpu"):
+        """Sample a batch as torch tensors on device, frames stay uint8"""
+        states, actions, rewards, next_states, dones = self.sample(batch_size)
+        batch = [torch.from_numpy(a) for a in (states, actions, rewards, next_states, dones)]
+        if self.pin_memory:
+            batch = [t.pin_memory() for t in batch]
+        states, actions, rewards, next_states, dones = (t.to(device, non_blocking=self.pin_memory) for t in batch)
+        return states, actions.long(), rewards, next_states, dones.float()
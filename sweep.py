@@ -0,0 +1,177 @@
+import numpy as np
+import torch
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import shutil
+import time
+from config import make_config, save_config, config_hash
+
+# Values tried for each swept hyperparameter
+DEFAULT_SPACE = {
+    'gamma': [0.95, 0.98, 0.99],
+    'learning_rate': [0.0001, 0.0005, 0.001],
+    'epsilon_decay': [0.999, 0.9995, 0.9999],
+    'hidden_size': [32, 64, 128],
+    'batch_size': [32, 64, 128],
+}
+
+def sample_configs(space, trials=None, seed=0):
+    """Configs from the grid of a search space, a random subset of trials if given"""
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if trials is not None and trials < len(grid):
+        grid = random.Random(seed).sample(grid, trials)
+    return [make_config(**values) for values in grid]
+
+def _load_trial_policy(model_path):
+    """Load a trial's latest weights (not cached, the file changes between rungs)"""
+    from dqn_agent import network_from_state_dict
+    from numpy_policy import NumpyPolicy
+    model = network_from_state_dict(torch.load(model_path, map_location='cpu'))
+    model.eval()
+    return NumpyPolicy(model, max_batch_size=1)
+
+def _run_trial(task):
+    """Worker entry point: train one trial up to its rung budget, then evaluate it"""
+    from train import train_dqn_agent
+    from evaluate import run_episode, summarize
+
+    torch.set_num_threads(1)  # One core per trial
+    trial_dir = task['dir']
+    resume_path = os.path.join(trial_dir, 'flappy_dqn_resume.ckpt')
+    resume = resume_path if os.path.exists(resume_path) else None
+    if resume is None:
+        # First rung, later rungs restore the RNG states from the checkpoint
+        random.seed(task['seed'])
+        np.random.seed(task['seed'])
+        torch.manual_seed(task['seed'])
+
+    start = time.time()
+    try:
+        with open(os.path.join(trial_dir, 'train.log'), 'a') as log, contextlib.redirect_stdout(log):
+            train_dqn_agent(episodes=task['episodes'], use_assets=False, render_freq=0, save_dir=trial_dir,
+                            plot=False, resume=resume, metrics_log=os.path.join(trial_dir, 'metrics.bin'),
+                            print_freq=10, seed=task['seed'], **task['config'])
+        train_seconds = time.time() - start
+
+        policy = _load_trial_policy(os.path.join(trial_dir, 'flappy_dqn_final.pt'))
+        scores, steps = zip(*(run_episode(policy, seed, task['max_steps']) for seed in task['eval_seeds']))
+    except Exception as e:
+        return {'trial': task['trial'], 'rung': task['rung'], 'error': f"{type(e).__name__}: {e}"}
+
+    return {'trial': task['trial'], 'rung': task['rung'], 'train_episodes': task['episodes'],
+            'train_seconds': train_seconds, **summarize(scores, steps, task['max_steps'])}
+
+def _rank_key(result):
+    """Trials that survived more rungs first, then by mean and median evaluation score"""
+    if 'error' in result:
+        return (-1, float('-inf'), float('-inf'))
+    return (result['rung'], result['mean'], result['median'])
+
+def run_sweep(configs, output_dir='sweeps/sweep', min_episodes=100, eta=2, rungs=3, eval_episodes=20,
+              max_steps=5000, workers=None, seed=0):
+    """Train configs concurrently with successive halving
+
+    Every trial trains headlessly for min_episodes in a process pool and is
+    scored on the same eval_episodes seeded greedy episodes. The best
+    1/eta of the trials continue from their resume checkpoints for eta times
+    as many episodes, for rungs rounds in total. Each trial keeps its
+    checkpoints and training log in output_dir/trial_NNN; the best trial's
+    final weights are copied to output_dir/best.pt. Returns the results
+    ranked best first.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count()
+    eval_seeds = [1000000 + seed + i for i in range(eval_episodes)]  # Not the seeds trials train with
+
+    trials = []
+    for i, config in enumerate(configs):
+        trial_dir = os.path.join(output_dir, f"trial_{i:03d}")
+        os.makedirs(trial_dir, exist_ok=True)
+        save_config(config, os.path.join(trial_dir, 'config.json'))
+        trials.append({'trial': i, 'config': config, 'dir': trial_dir, 'seed': seed + i})
+    results = {t['trial']: {'trial': t['trial'], 'config': t['config'], 'config_hash': config_hash(t['config']),
+                            'rung': -1} for t in trials}
+
+    active = [t['trial'] for t in trials]
+    ctx = mp.get_context('spawn')
+    with ctx.Pool(min(workers, len(trials))) as pool:
+        for rung in range(rungs):
+            episodes = min_episodes * eta ** rung
+            print(f"Rung {rung}: {len(active)} trials x {episodes} episodes")
+            tasks = [dict(trials[i], rung=rung, episodes=episodes, eval_seeds=eval_seeds, max_steps=max_steps)
+                     for i in active]
+            for result in pool.imap_unordered(_run_trial, tasks):
+                results[result['trial']].update(result)
+                if 'error' in result:
+                    print(f"  trial {result['trial']:3d} failed: {result['error']}")
+                else:
+                    print(f"  trial {result['trial']:3d} mean score {result['mean']:.2f} "
+                          f"({result['train_seconds']:.0f}s)")
+
+            ranked = sorted(active, key=lambda i: _rank_key(results[i]), reverse=True)
+            active = [i for i in ranked[:max(1, len(ranked) // eta)] if 'error' not in results[i]]
+            if not active:
+                break
+
+    ranking = sorted(results.values(), key=_rank_key, reverse=True)
+    best = ranking[0]
+    if 'error' not in best and best['rung'] >= 0:
+        best_dir = trials[best['trial']]['dir']
+        shutil.copy(os.path.join(best_dir, 'flappy_dqn_final.pt'), os.path.join(output_dir, 'best.pt'))
+        save_config(best['config'], os.path.join(output_dir, 'best_config.json'))
+    with open(os.path.join(output_dir, 'results.json'), 'w') as f:
+        json.dump(ranking, f, indent=2)
+    return ranking
+
+def print_ranking(ranking, space):
+    """Print the ranked results with the swept hyperparameters"""
+    names = sorted(space)
+    print(f"{'Rank':>4} {'Trial':>5} {'Episodes':>8} {'Mean':>7} {'Median':>7} {'Max':>5}  "
+          + " ".join(f"{name:>14}" for name in names))
+    for rank, r in enumerate(ranking, 1):
+        values = " ".join(f"{r['config'][name]!s:>14}" for name in names)
+        if 'error' in r:
+            print(f"{rank:>4} {r['trial']:>5} {'failed':>8} {'':>7} {'':>7} {'':>5}  {values}")
+        elif r['rung'] < 0:
+            continue
+        else:
+            print(f"{rank:>4} {r['trial']:>5} {r['train_episodes']:>8} {r['mean']:>7.2f} {r['median']:>7.1f} "
+                  f"{r['max']:>5}  {values}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter sweep with successive halving')
+    parser.add_argument('--space', type=str, default=None, help='JSON file mapping hyperparameters to lists of values')
+    parser.add_argument('--trials', type=int, default=16, help='configs sampled from the grid (default 16)')
+    parser.add_argument('--min-episodes', type=int, default=100, help='training episodes in the first rung')
+    parser.add_argument('--eta', type=int, default=2, help='keep the best 1/eta trials per rung, eta times the budget')
+    parser.add_argument('--rungs', type=int, default=3, help='successive halving rounds')
+    parser.add_argument('--eval-episodes', type=int, default=20, help='seeded greedy episodes scoring each trial')
+    parser.add_argument('--max-steps', type=int, default=5000, help='step cap per evaluation episode')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for config sampling and trials')
+    parser.add_argument('--output-dir', type=str, default='sweeps/sweep', help='trial checkpoints, results and best.pt')
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    configs = sample_configs(space, args.trials, args.seed)
+
+    start = time.time()
+    ranking = run_sweep(configs, output_dir=args.output_dir, min_episodes=args.min_episodes, eta=args.eta,
+                        rungs=args.rungs, eval_episodes=args.eval_episodes, max_steps=args.max_steps,
+                        workers=args.workers, seed=args.seed)
+    print_ranking(ranking, space)
+    print(f"Sweep took {time.time() - start:.0f}s, results in {args.output_dir}/results.json")
+    if os.path.exists(os.path.join(args.output_dir, 'best.pt')):
+        print(f"Best checkpoint: {os.path.join(args.output_dir, 'best.pt')}")
+
+if __name__ == "__main__":
+    main()
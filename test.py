@@ -4,14 +4,16 @@ import time
 import os
 from datetime import datetime
 import matplotlib.pyplot as plt
-import pygame
 from flappy_env import FlappyBirdEnv
+from recorder import FrameRecorder
 from dqn_agent import DQNAgent
+from trajectories import TrajectoryWriter
 
-def test_trained_agent(model_path='models/flappy_dqn_final.pt', use_assets=True, num_episodes=50):
-    # Create directory for screenshots if it doesn't exist
+def test_trained_agent(model_path='models/flappy_dqn_final.pt', use_assets=True, num_episodes=50,
+                       record=None, frame_stride=1, record_dir='recordings', trajectory_dir=None):
+    # Screenshots are written by a background thread so the game loop never waits on disk
     screenshot_dir = "screenshots"
-    os.makedirs(screenshot_dir, exist_ok=True)
+    screenshots = FrameRecorder(screenshot_dir)
     
     # Check if CUDA is available
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -20,12 +22,20 @@ def test_trained_agent(model_path='models/flappy_dqn_final.pt', use_assets=True,
     # Create environment
     env = FlappyBirdEnv(use_assets=use_assets)
     
+    # Optionally record every episode ('png', 'gif' or 'mp4')
+    if record:
+        env.start_recording(output_dir=record_dir, format=record, frame_stride=frame_stride)
+    
+    # Optionally stream the episodes into a trajectory dataset (see trajectories.py)
+    trajectories = TrajectoryWriter(trajectory_dir) if trajectory_dir else None
+    
     # Get state and action dimensions
     state_size = 5  # Number of observations
     action_size = 2  # Number of actions
     
-    # Create agent
-    agent = DQNAgent(state_size, action_size, device=device)
+    # Create agent, as wide as the saved network
+    hidden_size = torch.load(model_path, map_location='cpu')['fc1.weight'].shape[0]
+    agent = DQNAgent(state_size, action_size, device=device, hidden_size=hidden_size)
     
     # Load the trained model
     agent.load(model_path)
@@ -39,8 +49,14 @@ def test_trained_agent(model_path='models/flappy_dqn_final.pt', use_assets=True,
     
     # Test for specified number of episodes
     for e in range(num_episodes):
+        # Per-episode seed, recorded so the episode's pipe sequence can be replayed
+        episode_seed = env.rng.getrandbits(31)
+        env.seed(episode_seed)
         state = env.reset()
         episode_score = 0
+        if trajectories is not None:
+            trajectories.start_episode(state, seed=episode_seed)
+        last_screenshot_score = 0
         
         done = False
         while not done:
@@ -53,23 +69,29 @@ def test_trained_agent(model_path='models/flappy_dqn_final.pt', use_assets=True,
             
             # Take action
             next_state, reward, done, info = env.step(action)
+            if trajectories is not None:
+                trajectories.add(action, reward, next_state, done)
             
             # Update state and score
             state = next_state
             episode_score = info['score']
             
-            # Take screenshot if this is a good score
-            if (episode_score >= 10 and episode_score % 5 == 0) or (done and episode_score >= 10):
+            # Take screenshot once per 5-point milestone from 10 up, and at the end of good runs
+            milestone = episode_score >= 10 and episode_score % 5 == 0 and episode_score != last_screenshot_score
+            if milestone or (done and episode_score >= 10):
+                last_screenshot_score = episode_score
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 screenshot_path = os.path.join(screenshot_dir, f"flappy_score_{episode_score}_ep{e+1}_{timestamp}.png")
                 
                 # Take screenshot using pygame
-                if hasattr(env, 'screen'):
-                    pygame.image.save(env.screen, screenshot_path)
+                if env.renderer is not None:
+                    screenshots.save_image(env.renderer.screen, screenshot_path)
                     print(f"Screenshot saved: {screenshot_path}")
             
             if done:
                 all_scores.append(episode_score)
+                if trajectories is not None:
+                    trajectories.end_episode(episode_score)
                 print(f"Episode: {e+1}, Score: {episode_score}")
                 
                 # Update best score and take screenshot if it's the best
@@ -78,8 +100,8 @@ def test_trained_agent(model_path='models/flappy_dqn_final.pt', use_assets=True,
                     best_screenshot_path = os.path.join(screenshot_dir, f"flappy_best_score_{best_score}.png")
                     
                     # Take screenshot using pygame
-                    if hasattr(env, 'screen'):
-                        pygame.image.save(env.screen, best_screenshot_path)
+                    if env.renderer is not None:
+                        screenshots.save_image(env.renderer.screen, best_screenshot_path)
                         print(f"New best score: {best_score}, screenshot saved!")
                 
                 time.sleep(1)  # Pause between episodes
@@ -104,6 +126,9 @@ def test_trained_agent(model_path='models/flappy_dqn_final.pt', use_assets=True,
     plt.savefig(score_dist_path)
     print(f"Score distribution saved to: {score_dist_path}")
     
+    screenshots.close()
+    if trajectories is not None:
+        trajectories.close()
     env.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+import numpy as np
+import torch
+from dqn_agent import DQNAgent, DQNNetwork
+from numpy_policy import NumpyPolicy
+
+STATE_SIZE = 5
+ACTION_SIZE = 2
+
+def _torch_q_values(model, states):
+    """Q-values of the torch model in eval mode (no dropout)"""
+    model.eval()
+    with torch.no_grad():
+        return model(torch.as_tensor(np.asarray(states, dtype=np.float32))).numpy()
+
+def _states(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, STATE_SIZE)).astype(np.float32)
+
+def _randomize(model, seed):
+    """Overwrite a model's weights in place with new random values"""
+    torch.manual_seed(seed)
+    with torch.no_grad():
+        for param in model.parameters():
+            param.normal_(0, 0.5)
+
+def test_single_state_matches_torch():
+    torch.manual_seed(0)
+    model = DQNNetwork(STATE_SIZE, ACTION_SIZE, hidden_size=64)
+    policy = NumpyPolicy(model)
+    states = _states(200)
+    expected = _torch_q_values(model, states)
+    for state, q in zip(states, expected):
+        assert np.allclose(policy.q_values(state), q, atol=1e-5)
+        assert policy.act(state) == int(q.argmax())
+
+def test_batch_matches_torch():
+    torch.manual_seed(1)
+    model = DQNNetwork(STATE_SIZE, ACTION_SIZE, hidden_size=32)
+    policy = NumpyPolicy(model, max_batch_size=16)
+    states = _states(1000, seed=1)  # Larger than max_batch_size, the buffers grow
+    expected = _torch_q_values(model, states)
+    assert np.allclose(policy.q_values_batch(states), expected, atol=1e-5)
+    assert np.array_equal(policy.act_batch(states), expected.argmax(axis=1))
+    assert policy.verify(states) < 1e-5
+
+def test_refresh_picks_up_new_weights():
+    torch.manual_seed(2)
+    model = DQNNetwork(STATE_SIZE, ACTION_SIZE)
+    policy = NumpyPolicy(model)
+    states = _states(500, seed=2)
+    old = _torch_q_values(model, states)
+
+    _randomize(model, seed=3)
+    new = _torch_q_values(model, states)
+    assert not np.allclose(old, new, atol=1e-3)
+    assert np.allclose(policy.q_values_batch(states), old, atol=1e-5)  # Stale until refreshed
+
+    weights = policy.weights[0]
+    policy.refresh()
+    assert policy.weights[0] is weights  # Updated in place
+    assert np.allclose(policy.q_values_batch(states), new, atol=1e-5)
+    assert np.array_equal(policy.act_batch(states), new.argmax(axis=1))
+
+def test_agent_load_refreshes_numpy_inference(tmp_path):
+    torch.manual_seed(4)
+    agent = DQNAgent(STATE_SIZE, ACTION_SIZE, memory_size=10)
+    agent.enable_numpy_inference()
+    states = _states(500, seed=4)
+    assert np.array_equal(agent.act_batch(states, training=False), _torch_q_values(agent.model, states).argmax(axis=1))
+
+    other = DQNNetwork(STATE_SIZE, ACTION_SIZE)
+    _randomize(other, seed=5)
+    path = str(tmp_path / 'other.pt')
+    torch.save(other.state_dict(), path)
+    agent.load(path)
+
+    expected = _torch_q_values(other, states).argmax(axis=1)
+    assert np.array_equal(agent.act_batch(states, training=False), expected)
+    assert [agent.act(state, training=False) for state in states] == expected.tolist()
+    assert np.allclose(agent.numpy_policy.q_values_batch(states), _torch_q_values(other, states), atol=1e-5)
@@ -0,0 +1,35 @@
+import os
+import random
+import numpy as np
+import torch
+from checkpoint import load_checkpoint_file
+from train import train_dqn_agent
+
+def _seed_all(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+def _train(save_dir, episodes, resume=None):
+    return train_dqn_agent(episodes=episodes, use_assets=False, render_freq=0, save_dir=str(save_dir), plot=False,
+                           resume=resume, metrics_log=os.path.join(str(save_dir), 'metrics.bin'), print_freq=0,
+                           seed=0)
+
+def test_end_of_run_resume_matches_uninterrupted_run(tmp_path):
+    _seed_all(0)
+    straight = _train(tmp_path / 'straight', 60)
+
+    # 30 is not a multiple of 100, so the resume point is the end-of-run one
+    _seed_all(0)
+    _train(tmp_path / 'resumed', 30)
+    resume_path = str(tmp_path / 'resumed' / 'flappy_dqn_resume.ckpt')
+    first = load_checkpoint_file(resume_path)
+    assert first['episode'] == 30 and 'env_rng' in first
+    resumed = _train(tmp_path / 'resumed', 60, resume=resume_path)
+
+    for name, param in straight.model.state_dict().items():
+        assert torch.equal(param, resumed.model.state_dict()[name]), name
+    assert resumed.epsilon == straight.epsilon
+    assert len(resumed.memory) == len(straight.memory)
+    # The resumed run is still the same run for checkpoint pruning
+    assert load_checkpoint_file(resume_path)['run_start'] == first['run_start']
@@ -1,59 +1,212 @@
-import numpy as np
-import matplotlib.pyplot as plt
 import torch
 from flappy_env import FlappyBirdEnv
+from pixel_obs import PixelObservationWrapper
 from dqn_agent import DQNAgent
+from profiler import NullProfiler, TrainingProfiler
+from checkpoint import AsyncCheckpointWriter
+from metrics import MetricsLogger, read_metrics
+from config import make_config, config_hash
+from registry import CheckpointRegistry
+from trajectories import TrajectoryWriter
+import subprocess
+import sys
 import time
 import os
 
-def train_dqn_agent(episodes=1000, use_assets=True):
+def train_dqn_agent(episodes=1000, use_assets=True, prioritized_replay=False,
+                    per_alpha=0.6, per_alpha_final=None, per_beta=0.4, per_beta_final=1.0,
+                    per_anneal_steps=100000, batch_size=32, train_freq=1, gradient_steps=1,
+                    target_update_steps=None, tau=1.0, render_freq=50, save_dir='models', plot=True,
+                    profile=False, profile_log='logs/profile.jsonl', resume=None,
+                    pixels=False, pixel_stride=4, frame_stack=4, memory_size=50000, gamma=0.99,
+                    learning_rate=0.0005, epsilon_decay=0.9995, epsilon_min=0.01, hidden_size=64,
+                    metrics_log='logs/metrics.bin', print_freq=1, live_plot=False, n_step=1, double_dqn=False,
+                    keep_checkpoints=None, replay_dir=None, replay_dtype='float32', record_dir=None,
+                    init_model=None, seed=None):
+    """Train a DQN agent on FlappyBirdEnv
+
+    Learner schedule: every train_freq env steps, run gradient_steps updates of
+    batch_size transitions each, sliced from one superbatch sampled at once.
+    With target_update_steps set, the target network is updated every that many
+    env steps (a hard copy for tau=1.0, Polyak averaging with rate tau
+    otherwise); without it, it is copied every 10 episodes. Epsilon decays by
+    epsilon_decay once per env step after the memory holds batch_size
+    transitions, so the learner schedule doesn't change exploration.
+
+    Every render_freq-th episode is rendered (0 disables rendering), checkpoints
+    go to save_dir and plot=False skips the final training plot.
+
+    Per-episode metrics (score, reward, steps, epsilon, loss, mean Q, time)
+    are appended to metrics_log (see metrics.py) and a progress line is printed
+    every print_freq episodes. live_plot=True starts metrics_viewer.py in a
+    separate process to keep logs/training_progress.png up to date.
+
+    profile=True records per-phase timings (env step, render, act, replay
+    sampling/update, checkpointing) and throughput to profile_log as JSON lines.
+
+    Every 100 episodes a full checkpoint (networks, optimizer, epsilon, RNG
+    states, replay memory, score history) is written in the background to
+    save_dir/flappy_dqn_resume.ckpt; pass its path as resume to continue a run.
+    Weight checkpoints are recorded in save_dir's checkpoint index (see
+    registry.py) with their episode, step, epsilon and config hash; with
+    keep_checkpoints set, only that many of the run's latest episode
+    checkpoints (plus its best evaluated ones) are kept on disk; checkpoints
+    of earlier runs in save_dir are left alone.
+
+    pixels=True trains a convolutional network on stacks of frame_stack
+    grayscale frames downsampled by pixel_stride instead of the 5 features.
+
+    replay_dir keeps the replay memory in memory-mapped files (see
+    DiskReplayBuffer), so memory_size can exceed RAM; a later run given the
+    same replay_dir and memory_size warm-starts from the stored transitions.
+    replay_dtype='float16' halves the size of the stored states.
+
+    record_dir streams every episode into a trajectory dataset (see
+    trajectories.py) for offline pretraining; init_model starts from the
+    weights of a checkpoint, e.g. one written by pretrain.py. seed seeds the
+    environment's pipe heights (from OS entropy if None); every episode
+    reseeds the env with a seed drawn from it, recorded with the episode so
+    FlappyBirdEnv(seed=...) replays its pipe sequence.
+
+    gamma, learning_rate, epsilon_decay, epsilon_min and hidden_size (MLP
+    width) are passed to the DQNAgent; see config.py for loading them (and
+    the other keyword arguments) from a JSON file. n_step > 1 trains on
+    n-step returns (cut at episode ends) and double_dqn=True uses Double-DQN
+    targets.
+    """
     # Check if CUDA is available
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"Using device: {device}")
     
     # Create environment
-    env = FlappyBirdEnv(use_assets=use_assets)
+    env = FlappyBirdEnv(use_assets=use_assets, seed=seed)
+    base_env = env  # Unwrapped, for reseeding
+    env_rng = env.rng  # Pipe heights, saved with full checkpoints
     
     # Get state and action dimensions
     state_size = 5  # Number of observations (bird_y, velocity, horizontal_distance, height_diff_top, height_diff_bottom)
     action_size = 2  # Number of actions (do nothing, flap)
     
+    # Pixel observations: (frame_stack, H, W) uint8 frame stacks
+    if pixels:
+        env = PixelObservationWrapper(env, stride=pixel_stride, stack=frame_stack)
+        state_size = env.observation_shape
+    
     # Create agent
-    agent = DQNAgent(state_size, action_size, device=device)
+    agent = DQNAgent(state_size, action_size, device=device, memory_size=memory_size,
+                     prioritized=prioritized_replay, alpha=per_alpha, beta=per_beta,
+                     network='conv' if pixels else 'mlp', gamma=gamma, learning_rate=learning_rate,
+                     epsilon_decay=epsilon_decay, epsilon_min=epsilon_min, hidden_size=hidden_size,
+                     n_step=n_step, double_dqn=double_dqn, replay_dir=replay_dir, replay_dtype=replay_dtype)
+    if init_model is not None:
+        if not os.path.isfile(init_model):
+            raise FileNotFoundError(f"Initial model {init_model} not found")
+        agent.load(init_model)
+    if replay_dir is not None and len(agent.memory):
+        print(f"Warm-starting from {len(agent.memory)} transitions in {replay_dir}")
+
+    # Identifies the hyperparameters in the checkpoint index
+    run_hash = config_hash(make_config(gamma=gamma, learning_rate=learning_rate, epsilon_decay=epsilon_decay,
+                                       epsilon_min=epsilon_min, hidden_size=hidden_size, batch_size=batch_size,
+                                       memory_size=memory_size, train_freq=train_freq,
+                                       gradient_steps=gradient_steps, target_update_steps=target_update_steps,
+                                       tau=tau, n_step=n_step, double_dqn=double_dqn))
+
+    # Prioritized replay exponents are annealed linearly over per_anneal_steps env steps
+    if per_alpha_final is None:
+        per_alpha_final = per_alpha
+    total_steps = 0
+    run_start = time.time()  # Scopes checkpoint pruning to this run
+
+    # Opt-in hot-path profiling, the NullProfiler's calls are no-ops
+    profiler = TrainingProfiler(profile_log) if profile else NullProfiler()
+    agent.profiler = profiler
     
     # Training parameters
-    batch_size = 32
-    target_update_frequency = 10  # How often to update target network
+    target_update_frequency = 10  # How often (in episodes) to update target network by default
     
     # Create folder for saving models
-    if not os.path.exists('models'):
-        os.makedirs('models')
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    
+    start_episode = 0
+    checkpoint = None
+    
+    # Resume an interrupted run
+    if resume is not None:
+        checkpoint = agent.load_checkpoint(resume)
+        start_episode = checkpoint['episode']
+        total_steps = checkpoint.get('total_steps', 0)
+        run_start = checkpoint.get('run_start', run_start)
+        if 'env_rng' in checkpoint:
+            env_rng.setstate(checkpoint['env_rng'])
+        print(f"Resumed from {resume} at episode {start_episode}")
+    
+    # Streaming per-episode metrics with rolling averages
+    metrics = MetricsLogger(metrics_log, resume_episode=start_episode if resume is not None else None)
+    if checkpoint is not None and 'metrics' in checkpoint:
+        metrics.load_state_dict(checkpoint['metrics'])
+    elif checkpoint is not None:
+        for reward in checkpoint.get('scores', [])[-metrics.rewards.size:]:  # Older checkpoints
+            metrics.rewards.push(reward)
+    viewer = None
+    if live_plot:
+        viewer_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics_viewer.py')
+        viewer = subprocess.Popen([sys.executable, viewer_script, '--log', metrics_log, '--interval', '5'])
+    
+    # Full checkpoints are written off a snapshot by a background thread
+    checkpoint_writer = AsyncCheckpointWriter()
+    resume_path = os.path.join(save_dir, "flappy_dqn_resume.ckpt")
+
+    def save_resume_point(episode):
+        """Write everything a resumed run needs to continue exactly where this one is"""
+        checkpoint = agent.checkpoint_state(episode, metrics=metrics.state_dict(), total_steps=total_steps,
+                                            run_start=run_start, env_rng=env_rng.getstate())
+        before_write = None
+        if replay_dir is not None:
+            # The memory-mapped replay is flushed by the writer thread, not the training loop
+            memory_state = checkpoint['memory']
+            before_write = lambda: agent.memory.flush(memory_state['pos'], memory_state['size'])
+        checkpoint_writer.save(checkpoint, resume_path, before_write=before_write)
     
-    # Track scores and epsilon values for plotting
-    scores = []
-    epsilons = []
+    # Optional recording of the experience for offline training
+    recorder = TrajectoryWriter(record_dir) if record_dir is not None and not pixels else None
     
     # Start training
-    for e in range(episodes):
-        # Reset environment
+    for e in range(start_episode, episodes):
+        # Reset environment, from a per-episode seed so recorded episodes can be replayed
+        episode_seed = env_rng.getrandbits(31)
+        base_env.seed(episode_seed)
         state = env.reset()
+        episode_start = time.perf_counter()
+        if recorder is not None:
+            recorder.start_episode(state, seed=episode_seed)
         
         total_reward = 0
         max_steps = 10000  # Limit on steps per episode
         
         for step in range(max_steps):
             # For visualization (can be turned off for faster training)
-            if e % 50 == 0:  # Render every 50 episodes
+            if render_freq and e % render_freq == 0:  # Render every render_freq episodes
+                profile_start = profiler.start()
                 env.render()
+                profiler.stop('render', profile_start)
                 
             # Choose action
+            profile_start = profiler.start()
             action = agent.act(state)
+            profiler.stop('act', profile_start)
             
             # Take action and observe result
+            profile_start = profiler.start()
             next_state, reward, done, info = env.step(action)
+            profiler.stop('env_step', profile_start)
+            profiler.count('env_steps')
             
             # Remember experience
             agent.remember(state, action, reward, next_state, done)
+            if recorder is not None:
+                recorder.add(action, reward, next_state, done)
             
             # Update state
             state = next_state
@@ -61,56 +214,93 @@ def train_dqn_agent(episodes=1000, use_assets=True):
             # Accumulate reward
             total_reward += reward
             
-            # Train the agent (experience replay)
+            # Anneal prioritized replay exponents
+            total_steps += 1
+            if prioritized_replay:
+                progress = min(1.0, total_steps / per_anneal_steps)
+                agent.memory.alpha = per_alpha + progress * (per_alpha_final - per_alpha)
+                agent.beta = per_beta + progress * (per_beta_final - per_beta)
+            
+            # Train the agent (experience replay); epsilon decays per env step
+            # once learning starts, whatever train_freq and gradient_steps are
             if len(agent.memory) > batch_size:
-                agent.replay(batch_size)
+                agent.decay_epsilon()
+                if total_steps % train_freq == 0:
+                    agent.replay(batch_size, gradient_steps=gradient_steps)
+            
+            # Step-based target network updates
+            if target_update_steps is not None and total_steps % target_update_steps == 0:
+                if tau < 1.0:
+                    agent.soft_update_target_model(tau)
+                else:
+                    agent.update_target_model()
             
             # If game over, exit loop
             if done:
                 # Update target model periodically
-                if e % target_update_frequency == 0:
+                if target_update_steps is None and e % target_update_frequency == 0:
                     agent.update_target_model()
                     
                 break
         
-        # Save scores and epsilon values
-        scores.append(total_reward)
-        epsilons.append(agent.epsilon)
+        # Replay must know when a truncated episode ends (frame stacks, n-step returns)
+        if not done:
+            agent.memory.end_episode()
+        if recorder is not None:
+            recorder.end_episode(info['score'])
+        
+        # Record the episode's metrics
+        loss, mean_q = agent.pop_training_stats()
+        metrics.log(e + 1, info['score'], total_reward, step + 1, agent.epsilon, loss, mean_q,
+                    time.perf_counter() - episode_start)
         
         # Print progress
-        avg_score = np.mean(scores[-100:]) if len(scores) >= 100 else np.mean(scores)
-        print(f"Episode: {e+1}/{episodes}, Score: {info['score']}, Reward: {total_reward:.2f}, Epsilon: {agent.epsilon:.2f}, Avg Score (last 100): {avg_score:.2f}")
+        if print_freq and (e + 1) % print_freq == 0:
+            print(f"Episode: {e+1}/{episodes}, Score: {info['score']}, Reward: {total_reward:.2f}, Epsilon: {agent.epsilon:.2f}, Avg Score (last 100): {metrics.rewards.mean:.2f}")
         
         # Save model every 100 episodes
         if (e+1) % 100 == 0:
-            agent.save(f"models/flappy_dqn_episode_{e+1}.pt")
+            profile_start = profiler.start()
+            agent.save(os.path.join(save_dir, f"flappy_dqn_episode_{e+1}.pt"), episode=e + 1,
+                       step=total_steps, config_hash=run_hash, pixels=pixels)
+            if keep_checkpoints:
+                CheckpointRegistry(save_dir).prune(keep_last=keep_checkpoints, config_hash=run_hash,
+                                                   since=run_start)
+            save_resume_point(e + 1)
+            profiler.stop('checkpoint', profile_start)
+        
+        profiler.end_episode(e + 1, score=info['score'], reward=total_reward, epsilon=agent.epsilon)
     
-    # Save final model
-    agent.save("models/flappy_dqn_final.pt")
+    # Save final model, and a resume point if the run didn't end on one
+    agent.save(os.path.join(save_dir, "flappy_dqn_final.pt"), episode=episodes, step=total_steps,
+               config_hash=run_hash, pixels=pixels)
+    if episodes > start_episode and episodes % 100 != 0:
+        save_resume_point(episodes)
+    checkpoint_writer.close()
+    if recorder is not None:
+        recorder.close()
     env.close()
     
-    # Plot training results
-    plt.figure(figsize=(12, 5))
+    profiler.close()
+    if profiler.enabled:
+        print("Time per phase (s): " + ", ".join(f"{phase}: {seconds:.2f}" for phase, seconds in profiler.summary()))
     
-    plt.subplot(1, 2, 1)
-    plt.plot(scores)
-    plt.title('Episode Rewards')
-    plt.xlabel('Episode')
-    plt.ylabel('Reward')
+    metrics.close()
+    if viewer is not None:
+        viewer.terminate()
     
-    plt.subplot(1, 2, 2)
-    plt.plot(epsilons)
-    plt.title('Exploration Rate (Epsilon)')
-    plt.xlabel('Episode')
-    plt.ylabel('Epsilon')
+    if not plot and viewer is None:
+        return agent
     
-    os.makedirs("figures", exist_ok=True)  # Add this line
-    plt.tight_layout()
-    plt.plot(scores)
-    plt.savefig('figures/training_results.png', dpi=300)
-    plt.show()
+    # Plot training results from the metrics log (written to file, never blocks)
+    from metrics_viewer import plot_metrics
+    records = read_metrics(metrics_log)
+    if viewer is not None:
+        plot_metrics(records, 'logs/training_progress.png')  # Final refresh of the live plot
+    if plot:
+        plot_metrics(records, 'figures/training_results.png')
     
     return agent
 
 if __name__ == "__main__":
-    train_dqn_agent()
\ No newline at end of file
+    train_dqn_agent()
@@ -0,0 +1,283 @@
+import numpy as np
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+# One index record per recorded episode
+EPISODE_DTYPE = np.dtype([
+    ('episode', '<u4'),
+    ('chunk', '<u4'),
+    ('step_start', '<u4'),  # First row of the episode's steps in its chunk
+    ('obs_start', '<u4'),  # First row of its observations (length + 1 rows)
+    ('length', '<u4'),
+    ('score', '<i4'),
+    ('total_reward', '<f4'),
+    ('seed', '<i8'),  # Environment seed, -1 if unseeded
+    ('timestamp', '<f8'),
+])
+
+def _atomic_save(path, write):
+    """Write a file through write(f) on a temporary file, then rename it into place"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+class TrajectoryWriter:
+    """Streams episodes into compressed columnar chunk files with an episode index.
+
+    Finished episodes are buffered until they hold chunk_steps steps, then
+    written as one chunk_NNNNN.npz (observations, actions, rewards, dones)
+    and episodes.npy, the index of every episode's chunk, rows, score and
+    seed, is rewritten. Chunks only hold whole episodes and both files are
+    replaced atomically, so readers always see a consistent dataset. An
+    episode of length T stores T + 1 observations, each step's next
+    observation is the row after its observation.
+
+    Opening a directory that already holds a dataset appends to it.
+    """
+
+    def __init__(self, directory, state_size=5, chunk_steps=50000):
+        self.directory = directory
+        self.state_size = state_size
+        self.chunk_steps = chunk_steps
+        os.makedirs(directory, exist_ok=True)
+
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta['state_size'] != state_size:
+                raise ValueError(f"{directory} holds state size {meta['state_size']}, not {state_size}")
+            self.index = np.load(os.path.join(directory, 'episodes.npy'))
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump({'version': 1, 'state_size': state_size}, f)
+            self.index = np.zeros(0, dtype=EPISODE_DTYPE)
+        self.next_chunk = int(self.index['chunk'].max()) + 1 if len(self.index) else 0
+        self.next_episode = int(self.index['episode'].max()) + 1 if len(self.index) else 0
+
+        self._pending = []  # Finished episodes of the next chunk
+        self._pending_steps = 0
+        self._episode = None
+
+    def start_episode(self, observation, seed=-1):
+        """Begin an episode from its reset observation"""
+        self._episode = {'observations': [np.asarray(observation, dtype=np.float32)], 'actions': [],
+                         'rewards': [], 'dones': [], 'seed': seed}
+
+    def add(self, action, reward, next_observation, done):
+        """Record one step of the current episode"""
+        episode = self._episode
+        episode['observations'].append(np.asarray(next_observation, dtype=np.float32))
+        episode['actions'].append(action)
+        episode['rewards'].append(reward)
+        episode['dones'].append(done)
+
+    def end_episode(self, score):
+        """Finish the current episode (done or truncated), writing a chunk once enough steps are pending"""
+        episode, self._episode = self._episode, None
+        if episode is None or not episode['actions']:
+            return
+        self._pending.append((np.stack(episode['observations']), np.array(episode['actions'], dtype=np.uint8),
+                              np.array(episode['rewards'], dtype=np.float32),
+                              np.array(episode['dones'], dtype=bool), score, episode['seed']))
+        self._pending_steps += len(episode['actions'])
+        if self._pending_steps >= self.chunk_steps:
+            self.flush()
+
+    def flush(self):
+        """Write the pending episodes as a chunk and update the index"""
+        if not self._pending:
+            return
+        observations, actions, rewards, dones, scores, seeds = zip(*self._pending)
+        chunk = self.next_chunk
+        path = os.path.join(self.directory, f"chunk_{chunk:05d}.npz")
+        _atomic_save(path, lambda f: np.savez_compressed(
+            f, observations=np.concatenate(observations), actions=np.concatenate(actions),
+            rewards=np.concatenate(rewards), dones=np.concatenate(dones)))
+
+        records = np.zeros(len(self._pending), dtype=EPISODE_DTYPE)
+        lengths = np.array([len(a) for a in actions])
+        records['episode'] = self.next_episode + np.arange(len(records))
+        records['chunk'] = chunk
+        records['step_start'] = np.cumsum(lengths) - lengths
+        records['obs_start'] = records['step_start'] + np.arange(len(records))
+        records['length'] = lengths
+        records['score'] = scores
+        records['total_reward'] = [r.sum() for r in rewards]
+        records['seed'] = seeds
+        records['timestamp'] = time.time()
+        self.index = np.concatenate([self.index, records])
+        _atomic_save(os.path.join(self.directory, 'episodes.npy'), lambda f: np.save(f, self.index))
+
+        self.next_chunk += 1
+        self.next_episode += len(records)
+        self._pending = []
+        self._pending_steps = 0
+
+    def close(self):
+        """Write the remaining finished episodes, an unfinished one is dropped"""
+        self.flush()
+
+class TrajectoryDataset:
+    """Reader of a TrajectoryWriter directory that streams transitions chunk by chunk"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.state_size = self.meta['state_size']
+        self.episodes = np.load(os.path.join(directory, 'episodes.npy'))
+
+    def __len__(self):
+        """Number of recorded steps"""
+        return int(self.episodes['length'].sum())
+
+    def select(self, min_score=None, top=None):
+        """Index records of the episodes scoring at least min_score, or of the top best-scoring ones"""
+        episodes = self.episodes
+        if min_score is not None:
+            episodes = episodes[episodes['score'] >= min_score]
+        if top is not None:
+            episodes = episodes[np.argsort(-episodes['score'], kind='stable')[:top]]
+        return episodes
+
+    def load_chunk(self, chunk, episodes=None):
+        """Return (states, actions, rewards, next_states, dones) of a chunk's episodes
+
+        episodes is an array of index records (e.g. from select()), all of the
+        chunk's episodes if None.
+        """
+        if episodes is None:
+            episodes = self.episodes
+        episodes = episodes[episodes['chunk'] == chunk]
+        with np.load(os.path.join(self.directory, f"chunk_{chunk:05d}.npz")) as data:
+            observations = data['observations']
+            actions, rewards, dones = data['actions'], data['rewards'], data['dones']
+
+        lengths = episodes['length'].astype(np.int64)
+        offsets = np.cumsum(lengths) - lengths
+        # Row of every selected step in the chunk, and of its observation
+        steps = np.repeat(episodes['step_start'] - offsets, lengths) + np.arange(lengths.sum())
+        obs_rows = steps + np.repeat(episodes['obs_start'].astype(np.int64) - episodes['step_start'], lengths)
+        return observations[obs_rows], actions[steps], rewards[steps], observations[obs_rows + 1], dones[steps]
+
+    def iter_batches(self, batch_size, episodes=None, shuffle=True, shuffle_chunks=4, seed=None, drop_last=False):
+        """Yield (states, actions, rewards, next_states, dones) minibatches without loading the whole dataset
+
+        Chunks are decompressed by a background thread, in random order with
+        shuffle=True; transitions are shuffled across a window of
+        shuffle_chunks chunks, so only that many chunks are in memory at once.
+        episodes restricts the batches to those index records (see select()).
+        """
+        rng = np.random.default_rng(seed)
+        selected = self.episodes if episodes is None else episodes
+        chunks = np.unique(selected['chunk'])
+        if shuffle:
+            chunks = rng.permutation(chunks)
+
+        loaded = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def load_chunks():
+            try:
+                for chunk in chunks:
+                    if stop.is_set():
+                        return
+                    loaded.put(self.load_chunk(int(chunk), selected))
+            except Exception as e:
+                loaded.put(e)  # Raised again by the consumer
+            loaded.put(None)
+
+        loader = threading.Thread(target=load_chunks, name='trajectory-loader', daemon=True)
+        loader.start()
+        try:
+            window = []
+            finished = False
+            while not finished:
+                # Fill the shuffle window, keeping what is left of the previous one
+                while len(window) < shuffle_chunks:
+                    columns = loaded.get()
+                    if isinstance(columns, Exception):
+                        raise columns
+                    if columns is None:
+                        finished = True
+                        break
+                    window.append(columns)
+                if not window:
+                    break
+                columns = [np.concatenate(c) for c in zip(*window)]
+                n = len(columns[1])
+                order = rng.permutation(n) if shuffle else np.arange(n)
+                # Hold back the partial batch (unless this is the end) to mix into the next window
+                full = n - n % batch_size
+                for start in range(0, full, batch_size):
+                    rows = order[start:start + batch_size]
+                    yield tuple(c[rows] for c in columns)
+                rest = order[full:]
+                window = [tuple(c[rest] for c in columns)] if len(rest) else []
+                if finished and window and not drop_last:
+                    yield window[0]
+        finally:
+            stop.set()
+            while loader.is_alive():
+                try:
+                    loaded.get_nowait()  # Unblock a loader waiting to put
+                except queue.Empty:
+                    loader.join(timeout=0.01)
+
+def collect(policy, output, episodes=100, seed=0, max_steps=10000, chunk_steps=50000):
+    """Record seeded greedy episodes of a policy, return their scores"""
+    from flappy_env import FlappyBirdEnv
+    writer = TrajectoryWriter(output, chunk_steps=chunk_steps)
+    scores = []
+    for i in range(episodes):
+        env = FlappyBirdEnv(use_assets=False, seed=seed + i)
+        state = env.reset()
+        writer.start_episode(state, seed=seed + i)
+        for _ in range(max_steps):
+            action = policy.act(state)
+            state, reward, done, info = env.step(action)
+            writer.add(action, reward, state, done)
+            if done:
+                break
+        writer.end_episode(info['score'])
+        scores.append(info['score'])
+    writer.close()
+    return scores
+
+def print_summary(dataset):
+    episodes = dataset.episodes
+    if not len(episodes):
+        print(f"{dataset.directory}: empty")
+        return
+    seeded = int(np.sum(episodes['seed'] >= 0))
+    print(f"{dataset.directory}: {len(episodes)} episodes ({seeded} seeded), {len(dataset):,} steps "
+          f"in {len(np.unique(episodes['chunk']))} chunks")
+    print(f"Score mean {episodes['score'].mean():.2f}, median {np.median(episodes['score']):.1f}, "
+          f"max {episodes['score'].max()}; length mean {episodes['length'].mean():.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Record and inspect chunked trajectory datasets')
+    parser.add_argument('command', choices=['collect', 'info'])
+    parser.add_argument('directory', type=str, help='dataset directory')
+    parser.add_argument('--model', type=str, default='models/flappy_dqn_final.pt', help='collect: checkpoint to play')
+    parser.add_argument('--episodes', type=int, default=100, help='collect: episodes to record')
+    parser.add_argument('--seed', type=int, default=0, help='collect: seed of the first episode')
+    parser.add_argument('--max-steps', type=int, default=10000, help='collect: step cap per episode')
+    args = parser.parse_args()
+
+    if args.command == 'collect':
+        from evaluate import load_policy
+        start = time.time()
+        scores = collect(load_policy(args.model), args.directory, episodes=args.episodes, seed=args.seed,
+                         max_steps=args.max_steps)
+        print(f"Recorded {len(scores)} episodes (mean score {np.mean(scores):.2f}) in {time.time() - start:.1f}s")
+    print_summary(TrajectoryDataset(args.directory))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import numpy as np
+
+class VecFlappyBirdEnv:
+    """Run N independent Flappy Bird games in lockstep using NumPy array ops.
+
+    Follows the same rules, observations and rewards as FlappyBirdEnv, but keeps
+    every game's state as struct-of-arrays so one step() advances all of them.
+    Finished games are reset automatically.
+    """
+
+    max_pipes = 3  # FlappyBirdEnv never holds more than 3 pipes at once
+
+    def __init__(self, num_envs, width=288, height=512, seed=None):
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.pipe_gap = 100  # Gap between pipes
+        self.pipe_width = 52
+        self.bird_width = 34
+        self.bird_height = 24
+        self.bird_x = 50
+        self.gravity = 0.5
+        self.flap_power = -8
+        self.pipe_speed = 3
+        self.base_y = self.height - 70  # Ground position
+
+        self.rng = np.random.default_rng(seed)
+
+        # Bird state
+        self.bird_y = np.zeros(num_envs, dtype=np.float64)
+        self.bird_velocity = np.zeros(num_envs, dtype=np.float64)
+
+        # Pipe state, columns are ordered oldest (leftmost) to newest
+        shape = (num_envs, self.max_pipes)
+        self.pipe_x = np.zeros(shape, dtype=np.float64)
+        self.pipe_top = np.zeros(shape, dtype=np.float64)
+        self.pipe_bottom = np.zeros(shape, dtype=np.float64)
+        self.pipe_passed = np.zeros(shape, dtype=bool)
+        self.pipe_count = np.zeros(num_envs, dtype=np.int64)
+
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+
+        self._rows = np.arange(num_envs)
+        self._cols = np.arange(self.max_pipes)
+
+        self.reset()
+
+    def reset(self):
+        """Reset every environment and return the (N, 5) observation batch"""
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._get_observation()
+
+    def _reset_envs(self, mask):
+        """Reset the environments selected by a boolean mask"""
+        self.bird_y[mask] = self.height // 2
+        self.bird_velocity[mask] = 0
+        self.pipe_passed[mask] = False
+        self.pipe_count[mask] = 0
+        self.score[mask] = 0
+        self.ticks[mask] = 0
+        self._add_pipes(mask)
+
+    def _add_pipes(self, mask):
+        """Append a new pipe to each environment selected by mask"""
+        idx = np.flatnonzero(mask)
+        if idx.size == 0:
+            return
+        # Same range as random.randint(pipe_gap + 50, height - 50 - pipe_gap)
+        pipe_y = self.rng.integers(self.pipe_gap + 50, self.height - 50 - self.pipe_gap + 1, size=idx.size)
+        col = self.pipe_count[idx]
+        self.pipe_x[idx, col] = self.width
+        self.pipe_top[idx, col] = pipe_y - self.pipe_gap // 2
+        self.pipe_bottom[idx, col] = pipe_y + self.pipe_gap // 2
+        self.pipe_passed[idx, col] = False
+        self.pipe_count[idx] += 1
+
+    def _active(self):
+        """Boolean (N, max_pipes) mask of slots holding a pipe"""
+        return self._cols[None, :] < self.pipe_count[:, None]
+
+    def _get_observation(self):
+        """Return the (N, 5) observation batch for the RL agent"""
+        active = self._active()
+
+        # Next pipe is the first one the bird hasn't passed yet, else the oldest
+        ahead = active & (self.pipe_x + self.pipe_width > self.bird_x) & ~self.pipe_passed
+        next_col = np.where(ahead.any(axis=1), ahead.argmax(axis=1), 0)
+        has_pipe = self.pipe_count > 0
+
+        next_x = self.pipe_x[self._rows, next_col]
+        next_top = self.pipe_top[self._rows, next_col]
+        next_bottom = self.pipe_bottom[self._rows, next_col]
+
+        horizontal_distance = np.where(has_pipe, next_x - self.bird_x, self.width)
+        height_diff_top = np.where(has_pipe, self.bird_y - next_top, 0)
+        height_diff_bottom = np.where(has_pipe, next_bottom - self.bird_y, 0)
+
+        obs = np.empty((self.num_envs, 5), dtype=np.float64)
+        obs[:, 0] = self.bird_y / self.height
+        obs[:, 1] = self.bird_velocity / 10.0
+        obs[:, 2] = horizontal_distance / self.width
+        obs[:, 3] = height_diff_top / self.height
+        obs[:, 4] = height_diff_bottom / self.height
+        return obs
+
+    def step(self, actions):
+        """
+        Take one action per environment:
+        actions: array of shape (N,), 0 = do nothing, 1 = flap
+
+        Returns (observations, rewards, dones, info). Environments that finish
+        are reset in place; their final observation is in
+        info['terminal_observation'] and their final score in info['score'].
+        """
+        actions = np.asarray(actions)
+        rewards = np.full(self.num_envs, 0.2)  # Small reward for staying alive
+
+        # Apply action and update bird position
+        flap = actions == 1
+        self.bird_velocity[flap] = self.flap_power
+        self.bird_y += self.bird_velocity
+        self.bird_velocity += self.gravity
+
+        # Update pipes and score the ones the bird has just passed
+        active = self._active()
+        self.pipe_x[active] -= self.pipe_speed
+        newly_passed = active & ~self.pipe_passed & (self.pipe_x + self.pipe_width < self.bird_x)
+        self.pipe_passed |= newly_passed
+        passed_count = newly_passed.sum(axis=1)
+        self.score += passed_count
+        rewards += 2.0 * passed_count
+
+        # Remove the oldest pipe once it has gone off-screen
+        off_screen = (self.pipe_count > 0) & (self.pipe_x[:, 0] <= -self.pipe_width)
+        if off_screen.any():
+            for arr in (self.pipe_x, self.pipe_top, self.pipe_bottom, self.pipe_passed):
+                arr[off_screen, :-1] = arr[off_screen, 1:]
+            self.pipe_count[off_screen] -= 1
+
+        # Add new pipes if needed
+        last_x = self.pipe_x[self._rows, np.maximum(self.pipe_count - 1, 0)]
+        needs_pipe = (self.pipe_count < self.max_pipes) & (
+            (self.pipe_count == 0) | (last_x < self.width - 150))
+        self._add_pipes(needs_pipe)
+
+        # Check for collisions
+        dones = self._check_collision()
+        rewards[dones] = -1.0  # Penalty for crashing
+
+        self.ticks += 1
+
+        obs = self._get_observation()
+        info = {"score": self.score.copy(), "terminal_observation": obs[dones].copy()}
+
+        # Auto-reset finished environments
+        if dones.any():
+            self._reset_envs(dones)
+            obs[dones] = self._get_observation()[dones]
+
+        return obs, rewards, dones, info
+
+    def _check_collision(self):
+        """Return a boolean (N,) array marking birds that hit pipes or boundaries"""
+        hit_bounds = (self.bird_y <= 0) | (self.bird_y + self.bird_height >= self.base_y)
+
+        bird_y = self.bird_y[:, None]
+        overlap_x = (self.pipe_x < self.bird_x + self.bird_width) & (self.pipe_x + self.pipe_width > self.bird_x)
+        outside_gap = (bird_y < self.pipe_top) | (bird_y + self.bird_height > self.pipe_bottom)
+        hit_pipe = (self._active() & overlap_x & outside_gap).any(axis=1)
+
+        return hit_bounds | hit_pipe
+
+    def close(self):
+        """Close the environment"""
+        pass